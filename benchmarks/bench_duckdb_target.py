@@ -0,0 +1,92 @@
+"""
+Load time, file size and latency of common agent queries of DuckDBTarget
+against SQLiteTarget on a synthetic flattened snapshot
+
+Run with `python -m benchmarks.bench_duckdb_target --rows 500000`
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+import duckdb
+from discovery.repository.targets import DuckDBTarget, SQLiteTarget
+from benchmarks.bench_sqlite_target import generate_snapshot
+
+REPEAT = 5
+
+QUERIES = {
+    "group by count": "SELECT location, COUNT(*) FROM az_microsoft_synthetic_type0 GROUP BY location",
+    "filter few columns": "SELECT id, name FROM az_microsoft_synthetic_type1 WHERE properties_key3 > 1000",
+    "distinct values": "SELECT COUNT(DISTINCT properties_key5) FROM az_microsoft_synthetic_type2",
+}
+
+
+def run_save(target_class: Callable, snapshot: Dict[str, List[Dict]], path: Path) -> float:
+    start = time.perf_counter()
+
+    with target_class(path) as target:
+        target.save(snapshot)
+
+    return time.perf_counter() - start
+
+
+def run_query(conn, query: str) -> float:
+    """
+    Best latency over REPEAT runs of the query in milliseconds
+    """
+    latencies = []
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        latencies.append(time.perf_counter() - start)
+
+    return min(latencies) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    snapshot = generate_snapshot(args.rows)
+
+    with tempfile.TemporaryDirectory() as folder:
+        sqlite_path = Path(folder) / "snapshot.db"
+        duckdb_path = Path(folder) / "snapshot.duckdb"
+
+        load_seconds = {
+            "sqlite": run_save(SQLiteTarget, snapshot, sqlite_path),
+            "duckdb": run_save(DuckDBTarget, snapshot, duckdb_path),
+        }
+        size_mib = {
+            "sqlite": sqlite_path.stat().st_size / 2**20,
+            "duckdb": duckdb_path.stat().st_size / 2**20,
+        }
+        connections = {
+            "sqlite": sqlite3.connect(sqlite_path),
+            "duckdb": duckdb.connect(str(duckdb_path), read_only=True),
+        }
+
+        print(f"{'engine':>8} {'load s':>8} {'rows/sec':>10} {'size MiB':>9}")
+        for engine in connections:
+            print(
+                f"{engine:>8} {load_seconds[engine]:>8.2f} "
+                f"{args.rows / load_seconds[engine]:>10.0f} {size_mib[engine]:>9.1f}"
+            )
+
+        print()
+        print(f"{'query':>20} {'sqlite ms':>10} {'duckdb ms':>10}")
+        for name, query in QUERIES.items():
+            latencies = [run_query(conn, query) for conn in connections.values()]
+            print(f"{name:>20} {latencies[0]:>10.2f} {latencies[1]:>10.2f}")
+
+        for conn in connections.values():
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Flattening time per resource over realistic virtual machine, network interface and
+storage account payloads: the previous recursive flatten_json called on the generic
+projection and on the full resource, against the single iterative pass with cached keys
+
+Run with `python -m benchmarks.bench_flatten_json`
+"""
+
+import timeit
+from benchmarks.synthetic import realistic_resources
+from discovery.helpers.flatten_json import flatten_json_with_projection
+from discovery.sources.azure_arm import GENERIC_RESOURCE_PROJECTION
+
+RESOURCES_COUNT = 3000
+REPEAT = 10
+
+
+def flatten_json_recursive(input_json_object: dict | list) -> dict:
+    """
+    The recursive implementation flatten_json had before the iterative engine
+    """
+    out = {}
+
+    def flatten(json_element, parent_json_key=''):
+        if type(json_element) is dict:
+            for json_element_key in json_element:
+                flatten(json_element[json_element_key], parent_json_key + json_element_key + '_')
+        elif type(json_element) is list:
+            i = 0
+            for json_list_element in json_element:
+                flatten(json_list_element, parent_json_key + str(i) + '_')
+                i += 1
+        else:
+            out[parent_json_key[:-1]] = json_element
+
+    flatten(input_json_object)
+    return out
+
+
+def recursive_twice(resources: list) -> None:
+    for resource in resources:
+        flatten_json_recursive(
+            {
+                "id": resource["id"],
+                "name": resource["name"],
+                "type": resource["type"],
+                "location": resource.get("location", ""),
+                "tags": resource.get("tags", {}),
+            }
+        )
+        flatten_json_recursive(resource)
+
+
+def iterative_single_pass(resources: list) -> None:
+    caches = {}
+
+    for resource in resources:
+        flatten_json_with_projection(
+            resource,
+            GENERIC_RESOURCE_PROJECTION,
+            caches.setdefault(resource["type"], {}),
+        )
+
+
+def main() -> None:
+    resources = realistic_resources(RESOURCES_COUNT)
+
+    print(f"{'implementation':>22} {'us/resource':>12}")
+
+    for name, function in (
+        ("recursive, two calls", recursive_twice),
+        ("iterative, single pass", iterative_single_pass),
+    ):
+        duration = min(timeit.repeat(lambda: function(resources), number=1, repeat=REPEAT))
+        print(f"{name:>22} {duration / RESOURCES_COUNT * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Time to add resources to a repository and save them, and the resulting snapshot size,
+with flattened storage against JSON documents with generated columns. Realistic
+resources share their shape, sparse resources each set a few of many properties,
+like resource types whose properties depend on their kind.
+
+Run with `python -m benchmarks.bench_json_storage`
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+from benchmarks.synthetic import realistic_resources
+from discovery.repository import MemoryRepository
+from discovery.repository.targets import JSONSQLiteTarget, SQLiteTarget
+from discovery.sources.azure_arm import AzureARM
+
+RESOURCES_COUNT = 30_000
+SPARSE_PROPERTIES_COUNT = 1500
+SPARSE_PROPERTIES_PER_RESOURCE = 30
+
+
+def sparse_resources(count: int) -> List[Dict]:
+    """
+    Resources of a single type each setting a random subset of nested properties
+    """
+    generator = random.Random(0)
+
+    return [
+        {
+            "id": f"/subscriptions/s/resourceGroups/rg/providers/Microsoft.Synthetic/sparse/res-{i}",
+            "name": f"res-{i}",
+            "type": "Microsoft.Synthetic/sparse",
+            "location": "westeurope",
+            "tags": {},
+            "properties": {
+                f"group{p % 50}": {f"setting{p}": f"value-{p}-{i % 10}"}
+                for p in generator.sample(range(SPARSE_PROPERTIES_COUNT), SPARSE_PROPERTIES_PER_RESOURCE)
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def run_extract(target_class: Callable, flatten: bool, resources: list, path: Path) -> float:
+    start = time.perf_counter()
+
+    repository = MemoryRepository()
+    azure_arm = AzureARM(None, repository, client=object(), flatten=flatten)
+    azure_arm._add_resources_to_repository(resources)
+
+    with target_class(path) as target:
+        repository.save_to(target)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'resources':>10} {'storage':>10} {'seconds':>8} {'size MiB':>9}")
+
+    for name, resources in (
+        ("realistic", realistic_resources(RESOURCES_COUNT)),
+        ("sparse", sparse_resources(RESOURCES_COUNT)),
+    ):
+        with tempfile.TemporaryDirectory() as folder:
+            for storage, target_class, flatten in (
+                ("flattened", SQLiteTarget, True),
+                ("json", JSONSQLiteTarget, False),
+            ):
+                path = Path(folder) / f"{storage}.db"
+                seconds = run_extract(target_class, flatten, resources, path)
+
+                print(f"{name:>10} {storage:>10} {seconds:>8.2f} {path.stat().st_size / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Memory held by the resources of an extraction kept in MemoryRepository against
+CompactMemoryRepository, measured with tracemalloc, and the time to add them
+
+Run with `python -m benchmarks.bench_memory_repository`
+"""
+
+import time
+import tracemalloc
+from typing import Callable
+from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant, realistic_resources
+from discovery.repository import CompactMemoryRepository, MemoryRepository, Repository
+from discovery.sources.azure_arm import AzureARM
+
+RESOURCES_COUNT = 30_000
+
+
+def measure(repository_class: Callable[[], Repository], client: FakeResourceGraphClient) -> tuple:
+    """
+    Seconds to extract the resources and bytes allocated by the repository holding them
+    """
+    repository = repository_class()
+    azure_arm = AzureARM(None, repository, client=client)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    azure_arm.extract_all_resources()
+    seconds = time.perf_counter() - start
+    del azure_arm
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, allocated
+
+
+def main() -> None:
+    resource_containers, _ = generate_tenant(1, 0)
+    client = FakeResourceGraphClient(realistic_resources(RESOURCES_COUNT), resource_containers)
+
+    print(f"{'repository':>24} {'seconds':>8} {'MiB':>8} {'bytes/resource':>15}")
+
+    for repository_class in (MemoryRepository, CompactMemoryRepository):
+        seconds, allocated = measure(repository_class, client)
+
+        print(
+            f"{repository_class.__name__:>24} {seconds:>8.2f} {allocated / 2**20:>8.1f} "
+            f"{allocated / RESOURCES_COUNT:>15.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
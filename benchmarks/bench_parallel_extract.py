@@ -0,0 +1,48 @@
+"""
+Wall-clock time of serial and subscription-partitioned extraction against a fake
+Resource Graph client with a simulated latency per page
+
+Run with `python -m benchmarks.bench_parallel_extract`
+"""
+
+import time
+from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+from discovery.repository import MemoryRepository
+from discovery.sources.azure_arm import AzureARM
+
+LATENCY = 0.05
+PAGE_SIZE = 100
+RESOURCES_PER_SUBSCRIPTION = 300
+CONCURRENCY = 8
+
+
+def run_extract(client: FakeResourceGraphClient, concurrency: int) -> float:
+    azure_arm = AzureARM(None, MemoryRepository(), client=client)
+
+    start = time.perf_counter()
+    azure_arm.extract_all_resources(concurrency=concurrency)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'subscriptions':>13} {'serial (s)':>10} {'parallel (s)':>12} {'speedup':>8}")
+
+    for subscriptions_count in (1, 2, 4, 8, 16):
+        resource_containers, resources = generate_tenant(
+            subscriptions_count, RESOURCES_PER_SUBSCRIPTION
+        )
+        client = FakeResourceGraphClient(
+            resources, resource_containers, page_size=PAGE_SIZE, latency=LATENCY
+        )
+
+        serial = run_extract(client, concurrency=1)
+        parallel = run_extract(client, concurrency=CONCURRENCY)
+
+        print(
+            f"{subscriptions_count:>13} {serial:>10.2f} {parallel:>12.2f} {serial / parallel:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
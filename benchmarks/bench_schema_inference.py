@@ -0,0 +1,105 @@
+"""
+Schema inference time of the previous per-resource column discovery of SQLiteTarget
+against SchemaInference, on a wide sparse table and on a long narrow table
+
+Run with `python -m benchmarks.bench_schema_inference`
+"""
+
+import argparse
+import time
+from typing import Dict, List
+from discovery.repository.targets.schema import SchemaInference
+
+
+def normalize_column_name(column_name: str) -> str:
+    column_name = column_name.lower()
+
+    return "".join(char if char.isalnum() else "_" for char in column_name)
+
+
+def discover_columns_over_list(resources: List[Dict]):
+    """
+    Column discovery SQLiteTarget had before SchemaInference
+    """
+    columns_with_types_dict = {}
+    columns_names_set = set()
+
+    for resource in resources:
+        for key, value in resource.items():
+            column_name_type = normalize_column_name(key)
+            column = columns_with_types_dict.get(column_name_type, {})
+            column["key"] = key
+            column["name"] = column_name_type
+
+            if column.get("type") is None and isinstance(value, int):
+                column["type"] = "INTEGER"
+            elif column.get("type") is None and isinstance(value, float):
+                column["type"] = " REAL"
+            elif column.get("type") is None:
+                column["type"] = "TEXT"
+            elif (
+                column["type"] != "TEXT"
+                and not isinstance(value, int)
+                and not isinstance(value, float)
+            ):
+                column["type"] = "TEXT"
+
+            columns_with_types_dict[column_name_type] = column
+
+        columns_names_set.update(
+            [tuple([normalize_column_name(k), k]) for k in resource.keys()]
+        )
+
+    return columns_with_types_dict, columns_names_set
+
+
+def wide_table(rows_count: int, columns_count: int, columns_per_row: int) -> List[Dict]:
+    return [
+        {
+            "id": f"id-{r}",
+            **{
+                f"properties_securityRules_{(r + c) % columns_count}_properties_access": c
+                for c in range(columns_per_row)
+            },
+        }
+        for r in range(rows_count)
+    ]
+
+
+def long_table(rows_count: int, columns_count: int) -> List[Dict]:
+    return [
+        {"id": f"id-{r}", **{f"properties_key{c}": f"value-{r}" for c in range(columns_count)}}
+        for r in range(rows_count)
+    ]
+
+
+def measure(function, resources: List[Dict]) -> float:
+    start = time.perf_counter()
+    function(resources)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wide-rows", type=int, default=20_000)
+    parser.add_argument("--wide-columns", type=int, default=3_000)
+    parser.add_argument("--long-rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    tables = {
+        f"wide ({args.wide_columns} columns)": wide_table(args.wide_rows, args.wide_columns, 200),
+        f"long ({args.long_rows} rows)": long_table(args.long_rows, 30),
+    }
+
+    print(f"{'table':>24} {'previous (s)':>12} {'inference (s)':>13}")
+
+    for name, resources in tables.items():
+        previous = measure(discover_columns_over_list, resources)
+        inference = measure(lambda r: SchemaInference().update("table", r), resources)
+
+        print(f"{name:>24} {previous:>12.2f} {inference:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
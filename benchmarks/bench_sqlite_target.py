@@ -0,0 +1,66 @@
+"""
+Rows per second written by SQLiteTarget.save in default and bulk-load modes
+on a synthetic flattened snapshot
+
+Run with `python -m benchmarks.bench_sqlite_target --rows 1000000`
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+from discovery.repository.targets import SQLiteTarget
+
+TABLES_COUNT = 10
+COLUMNS_COUNT = 15
+
+
+def generate_snapshot(rows_count: int) -> Dict[str, List[Dict]]:
+    """
+    Generate flattened resources evenly spread over TABLES_COUNT tables
+    """
+    snapshot = {}
+
+    for t in range(TABLES_COUNT):
+        table_name = f"az_microsoft_synthetic_type{t}"
+        snapshot[table_name] = [
+            {
+                "id": f"/subscriptions/s/resourceGroups/rg/providers/Microsoft.Synthetic/type{t}/res-{r}",
+                "name": f"res-{r}",
+                "location": "westeurope",
+                **{f"properties_key{c}": (r * c) if c % 2 else f"value-{c}" for c in range(COLUMNS_COUNT - 3)},
+            }
+            for r in range(t, rows_count, TABLES_COUNT)
+        ]
+
+    return snapshot
+
+
+def run_save(snapshot: Dict[str, List[Dict]], path: Path, bulk_load: bool) -> float:
+    start = time.perf_counter()
+
+    with SQLiteTarget(path, bulk_load=bulk_load) as target:
+        target.save(snapshot)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    snapshot = generate_snapshot(args.rows)
+
+    with tempfile.TemporaryDirectory() as folder:
+        default = run_save(snapshot, Path(folder) / "default.db", bulk_load=False)
+        bulk_load = run_save(snapshot, Path(folder) / "bulk_load.db", bulk_load=True)
+
+    print(f"{'mode':>10} {'seconds':>8} {'rows/sec':>10}")
+    print(f"{'default':>10} {default:>8.2f} {args.rows / default:>10.0f}")
+    print(f"{'bulk load':>10} {bulk_load:>8.2f} {args.rows / bulk_load:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
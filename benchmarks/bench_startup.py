@@ -0,0 +1,137 @@
+"""
+Startup time of the CLI commands, the cost paid by every cron invocation before any work.
+Each command runs through click in a fresh interpreter, timed with `python -X importtime`,
+with Resource Graph and the agent model mocked so only the command path itself is measured,
+and the slowest top-level imports are listed. Imports a command must not pay for, like
+smolagents for extract, fail the benchmark.
+
+Run with `python -m benchmarks.bench_startup`
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+REPEAT = 5
+SLOWEST_IMPORTS_COUNT = 8
+
+COMMANDS = {
+    "--help": ["--help"],
+    "extract": ["extract", "--target-path", "{target_path}"],
+    "run": ["run", "--target-path", "{target_path}", "--query", "How many resources are there?"],
+}
+
+AGENT_ENVIRONMENT = {
+    "DISCOVERY_AZURE_OPENAI_DEPLOYMENT_NAME": "deployment",
+    "DISCOVERY_AZURE_OPENAI_ENDPOINT": "https://localhost",
+    "DISCOVERY_AZURE_OPENAI_KEY": "key",
+    "DISCOVERY_AZURE_OPENAI_API_VERSION": "2024-10-21",
+}
+"""
+Settings of the run command, the model is never called
+"""
+
+FORBIDDEN_IMPORTS = {
+    "--help": ["pydantic_settings", "azure", "smolagents", "duckdb"],
+    "extract": ["smolagents", "duckdb", "discovery.agents.sqlite"],
+    "run": ["duckdb", "azure.identity", "azure.mgmt.resourcegraph"],
+}
+
+
+def run_command(args: List[str]) -> None:
+    """
+    Run the CLI with the arguments as click does, without querying Resource Graph nor the model
+    """
+    from unittest import mock
+    from click.testing import CliRunner
+
+    from discovery.cli import cli
+
+    patches = []
+    if args[0] == "extract":
+        patches.append(mock.patch("discovery.sources.azure_arm.AzureARM.extract_all_resources"))
+    elif args[0] == "run":
+        patches.append(mock.patch("smolagents.CodeAgent.run"))
+
+    for patch in patches:
+        patch.start()
+
+    try:
+        result = CliRunner().invoke(cli, args)
+    finally:
+        for patch in patches:
+            patch.stop()
+
+    if result.exit_code != 0:
+        raise RuntimeError(f"{' '.join(args)} failed: {result.output}") from result.exception
+
+
+def command_statement(args: List[str]) -> str:
+    """
+    Statement running the command in a fresh interpreter
+    """
+    return f"from benchmarks.bench_startup import run_command; run_command({args!r})"
+
+
+def import_times(statement: str) -> Tuple[float, List[Tuple[str, int]], set]:
+    """
+    Wall-clock time of the statement in a fresh interpreter, the cumulative import time
+    in microseconds of its top-level imports and the names of all imported modules
+    """
+    env = {k: v for k, v in os.environ.items() if not k.upper().startswith("DISCOVERY_")}
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{statement}; import sys; print(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**env, **AGENT_ENVIRONMENT, "PYTHONPATH": os.getcwd()},
+    )
+    seconds = time.perf_counter() - start
+
+    top_level = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative)))
+
+    return seconds, top_level, set(process.stdout.split())
+
+
+def main() -> None:
+    forbidden_loaded: Dict[str, List[str]] = {}
+
+    for command, args in COMMANDS.items():
+        best_seconds = None
+
+        for _ in range(REPEAT):
+            with tempfile.TemporaryDirectory() as target_path:
+                statement = command_statement([arg.format(target_path=target_path) for arg in args])
+                seconds, top_level, modules = import_times(statement)
+            if best_seconds is None or seconds < best_seconds:
+                best_seconds, best_top_level = seconds, top_level
+
+        print(f"{command:>8} {best_seconds:>8.3f} s")
+        for name, microseconds in sorted(best_top_level, key=lambda item: -item[1])[:SLOWEST_IMPORTS_COUNT]:
+            print(f"{'':>8} {microseconds / 1e6:>8.3f} s {name}")
+
+        loaded = [name for name in FORBIDDEN_IMPORTS[command] if name in modules]
+        if loaded:
+            forbidden_loaded[command] = loaded
+
+    for command, loaded in forbidden_loaded.items():
+        print(f"Error: {command} imports {', '.join(loaded)}", file=sys.stderr)
+
+    if forbidden_loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Extraction against a fake Resource Graph client enforcing a quota of requests per window,
+with requests paced by the remaining quota against only backing off once throttled
+
+Run with `python -m benchmarks.bench_throttling`
+"""
+
+import time
+from benchmarks.synthetic import ThrottlingResourceGraphClient, generate_tenant
+from discovery.repository import CompactMemoryRepository
+from discovery.sources.azure_arm import AzureARM
+from discovery.sources.scheduler import RequestScheduler
+
+SUBSCRIPTIONS_COUNT = 8
+RESOURCES_PER_SUBSCRIPTION = 500
+PAGE_SIZE = 50
+QUOTA = 15
+WINDOW_SECONDS = 1.0
+LATENCY = 0.02
+CONCURRENCY = 8
+
+
+def main() -> None:
+    resource_containers, resources = generate_tenant(SUBSCRIPTIONS_COUNT, RESOURCES_PER_SUBSCRIPTION)
+
+    print(f"{'scheduler':>10} {'seconds':>8} {'requests':>9} {'throttled':>10} {'wait (s)':>9}")
+
+    for name, pace_below in (("reactive", 0), ("paced", 5)):
+        client = ThrottlingResourceGraphClient(
+            resources,
+            resource_containers,
+            page_size=PAGE_SIZE,
+            latency=LATENCY,
+            quota=QUOTA,
+            window_seconds=WINDOW_SECONDS,
+        )
+        scheduler = RequestScheduler(backoff_seconds=0.1, max_retries=20, pace_below=pace_below)
+        azure_arm = AzureARM(None, CompactMemoryRepository(), client=client, scheduler=scheduler)
+
+        start = time.perf_counter()
+        azure_arm.extract_all_resources(concurrency=CONCURRENCY)
+        seconds = time.perf_counter() - start
+
+        stats = scheduler.stats
+        print(
+            f"{name:>10} {seconds:>8.2f} {stats.requests:>9} {stats.throttled:>10} "
+            f"{stats.wait_seconds:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Wall-clock time of a streaming extraction to SQLite with resources flattened and schemas
+inferred in the querying thread against the same work in worker processes, on the same
+synthetic tenant. The CPU time of the main process phases shows the work left to it,
+which bounds the speedup once workers have their own cores.
+
+Run with `python -m benchmarks.bench_transform_workers`
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from benchmarks.synthetic import FakeResourceGraphClient, generate_resources, generate_tenant
+from discovery.helpers.metrics import metrics
+from discovery.repository import StreamingRepository
+from discovery.repository.targets import SQLiteTarget
+from discovery.sources.azure_arm import AzureARM
+
+RESOURCES_COUNT = 50_000
+SUBSCRIPTIONS_COUNT = 8
+TYPES_COUNT = 32
+PAGE_SIZE = 1000
+WORKERS = [0, 1, 2, 4, 8, 16]
+
+MAIN_PHASES = [
+    "resource_graph_query",
+    "flatten",
+    "transform_wait",
+    "repository_add",
+    "schema_inference",
+    "insert",
+]
+
+
+def run_extract(client: FakeResourceGraphClient, db_path: Path, transform_workers: int) -> float:
+    metrics.reset()
+    start = time.perf_counter()
+
+    with SQLiteTarget(db_path) as target:
+        repository = StreamingRepository(target)
+        azure_arm = AzureARM(None, repository, client=client, transform_workers=transform_workers)
+        azure_arm.extract_all_resources()
+        repository.save_to(target)
+
+    return time.perf_counter() - start
+
+
+def main_phases_seconds() -> List[str]:
+    """
+    CPU time of the main process by phase, workers are not instrumented
+    """
+    return [
+        f"{name}={metrics.phases[name].self_cpu_seconds:.2f}"
+        for name in MAIN_PHASES
+        if name in metrics.phases
+    ]
+
+
+def main() -> None:
+    resource_containers, _ = generate_tenant(SUBSCRIPTIONS_COUNT, 0)
+    resources = generate_resources(
+        RESOURCES_COUNT, subscriptions_count=SUBSCRIPTIONS_COUNT, types_count=TYPES_COUNT
+    )
+    client = FakeResourceGraphClient(resources, resource_containers, page_size=PAGE_SIZE)
+
+    print(f"{os.cpu_count()} CPUs, {RESOURCES_COUNT} resources of {TYPES_COUNT} types")
+    print(f"{'workers':>7} {'seconds':>8} {'speedup':>8}  main process CPU seconds")
+
+    with tempfile.TemporaryDirectory() as folder:
+        serial = None
+
+        for transform_workers in WORKERS:
+            db_path = Path(folder) / f"extract_{transform_workers}.db"
+            seconds = run_extract(client, db_path, transform_workers)
+            serial = serial or seconds
+
+            print(
+                f"{transform_workers:>7} {seconds:>8.2f} {serial / seconds:>7.2f}x  "
+                + " ".join(main_phases_seconds())
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Benchmark suite of the extraction, the targets and the agent tools on a deterministic
+synthetic tenant. Each case runs REPEAT times and its best time is reported, with its
+change against the latest recorded run with the same parameters. Runs are appended to
+benchmarks/results.jsonl with --record, so regressions are visible over time.
+
+Run with `python -m benchmarks.suite --resources 20000 --record`
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from typing import Callable, Dict
+from benchmarks.synthetic import FakeResourceGraphClient, generate_resources, generate_tenant
+from discovery.agents import duckdb as duckdb_tools
+from discovery.agents import sqlite as sqlite_tools
+from discovery.agents.cache import results_cache
+from discovery.agents.connections import connections as sqlite_connections
+from discovery.helpers.flatten_json import flatten_json_with_projection
+from discovery.repository import CompactMemoryRepository, MemoryRepository
+from discovery.repository.targets import DuckDBTarget, SQLiteTarget
+from discovery.sources.azure_arm import GENERIC_RESOURCE_PROJECTION, AzureARM
+
+REPEAT = 3
+TOOLS_REPEAT = 20
+
+RESULTS_PATH = Path(__file__).parent / "results.jsonl"
+
+TABLE_NAME = "az_microsoft_synthetic_type0"
+
+QUERIES = {
+    "group by": f"SELECT location, COUNT(*) FROM {TABLE_NAME} GROUP BY location",
+    "filter": f"SELECT id, name FROM {TABLE_NAME} WHERE properties_index < 100",
+    "select all": f"SELECT * FROM {TABLE_NAME}",
+}
+
+
+def best_time(function: Callable[[], None], repeat: int) -> float:
+    """
+    Best wall-clock time of repeat calls of the function in seconds
+    """
+    times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def uncached(tool: Callable, *args) -> Callable[[], None]:
+    """
+    Call the agent tool without its results cache
+    """
+
+    def call() -> None:
+        results_cache.clear()
+        tool(*args)
+
+    return call
+
+
+def run_cases(args: argparse.Namespace, folder: Path) -> Dict[str, Dict[str, float]]:
+    """
+    Time of each case and its count of operations: resources, rows or tool calls
+    """
+    resource_containers, _ = generate_tenant(args.subscriptions, 0)
+    resources = generate_resources(
+        args.resources,
+        subscriptions_count=args.subscriptions,
+        types_count=args.types,
+        type_skew=args.type_skew,
+        nesting_depth=args.nesting_depth,
+        array_size=args.array_size,
+        tags_cardinality=args.tags_cardinality,
+    )
+    paths = (folder / f"snapshot_{i}" for i in count())
+    results = {}
+
+    def case(name: str, function: Callable[[], None], operations: int, repeat: int = REPEAT) -> None:
+        seconds = best_time(function, repeat)
+        results[name] = {"seconds": seconds, "operations": operations}
+
+        print(f"{name:>40} {seconds:>10.4f} {operations / seconds:>12.0f}", flush=True)
+
+    print(f"{'case':>40} {'seconds':>10} {'ops/sec':>12}")
+
+    def extract() -> None:
+        client = FakeResourceGraphClient(resources, resource_containers)
+        AzureARM(None, MemoryRepository(), client=client).extract_all_resources()
+
+    case("extract with fake client", extract, len(resources))
+
+    flattened = []
+
+    def flatten() -> None:
+        caches = {}
+        flattened.clear()
+
+        for resource in resources:
+            flattened.append(
+                flatten_json_with_projection(
+                    resource,
+                    GENERIC_RESOURCE_PROJECTION,
+                    caches.setdefault(resource["type"], {}),
+                )
+            )
+
+    case("flatten_json_with_projection", flatten, len(resources))
+
+    repository = MemoryRepository()
+
+    def add() -> None:
+        repository.__init__()
+
+        for (generic_resource, resource), source in zip(flattened, resources):
+            repository.add("az_resources", generic_resource)
+            repository.add(f"az_{source['type'].replace('/', '_').replace('.', '_')}", resource)
+
+    case("MemoryRepository.add", add, 2 * len(resources))
+
+    def add_compact() -> None:
+        compact_repository = CompactMemoryRepository()
+
+        for (generic_resource, resource), source in zip(flattened, resources):
+            compact_repository.add("az_resources", generic_resource)
+            compact_repository.add(f"az_{source['type'].replace('/', '_').replace('.', '_')}", resource)
+
+    case("CompactMemoryRepository.add", add_compact, 2 * len(resources))
+
+    rows_count = sum(len(rows) for rows in repository.get_all().values())
+
+    def save(target_class: Callable, **kwargs) -> Callable[[], None]:
+        def run() -> None:
+            with target_class(next(paths), **kwargs) as target:
+                target.save(repository.get_all())
+
+        return run
+
+    case("SQLiteTarget.save", save(SQLiteTarget), rows_count)
+    case("SQLiteTarget.save bulk load", save(SQLiteTarget, bulk_load=True), rows_count)
+    case("DuckDBTarget.save", save(DuckDBTarget), rows_count)
+
+    sqlite_path = str(folder / "tools.db")
+    with SQLiteTarget(Path(sqlite_path), bulk_load=True, full_text_search=True) as target:
+        target.save(repository.get_all())
+
+    duckdb_path = str(folder / "tools.duckdb")
+    with DuckDBTarget(Path(duckdb_path)) as target:
+        target.save(repository.get_all())
+
+    for engine, tools, db_path in (
+        ("sqlite", sqlite_tools, sqlite_path),
+        ("duckdb", duckdb_tools, duckdb_path),
+    ):
+        case(f"{engine} list_tables_names", uncached(tools.list_tables_names, db_path), 1, TOOLS_REPEAT)
+        case(
+            f"{engine} get_table_schema",
+            uncached(tools.get_table_schema, db_path, TABLE_NAME),
+            1,
+            TOOLS_REPEAT,
+        )
+
+        for name, query in QUERIES.items():
+            case(
+                f"{engine} execute_select_query {name}",
+                uncached(tools.execute_select_query, db_path, query),
+                1,
+                TOOLS_REPEAT,
+            )
+
+    case("sqlite search_resources", uncached(sqlite_tools.search_resources, sqlite_path, "team-3"), 1, TOOLS_REPEAT)
+
+    sqlite_connections.close()
+    duckdb_tools.connections.close()
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_record(parameters: Dict) -> Dict | None:
+    """
+    The latest recorded run with the same parameters, None if there is none
+    """
+    if not RESULTS_PATH.is_file():
+        return None
+
+    with open(RESULTS_PATH) as file:
+        records = [json.loads(line) for line in file if line.strip()]
+
+    return next((r for r in reversed(records) if r["parameters"] == parameters), None)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict) -> None:
+    print()
+    print(f"Compared with {baseline['commit']} of {baseline['timestamp']}")
+    print(f"{'case':>40} {'baseline':>10} {'seconds':>10} {'change':>8}")
+
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+
+        change = result["seconds"] / previous["seconds"] - 1
+        print(f"{name:>40} {previous['seconds']:>10.4f} {result['seconds']:>10.4f} {change:>+8.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resources", type=int, default=20_000)
+    parser.add_argument("--subscriptions", type=int, default=4)
+    parser.add_argument("--types", type=int, default=10)
+    parser.add_argument("--type-skew", type=float, default=1.0)
+    parser.add_argument("--nesting-depth", type=int, default=3)
+    parser.add_argument("--array-size", type=int, default=3)
+    parser.add_argument("--tags-cardinality", type=int, default=20)
+    parser.add_argument("--record", action="store_true", help=f"Append the results to {RESULTS_PATH.name}")
+    args = parser.parse_args()
+
+    parameters = {name: value for name, value in vars(args).items() if name != "record"}
+    baseline = latest_record(parameters)
+
+    with tempfile.TemporaryDirectory() as folder:
+        results = run_cases(args, Path(folder))
+
+    if baseline is not None:
+        compare(results, baseline)
+
+    if args.record:
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": f"{platform.system()} {platform.machine()}",
+            "parameters": parameters,
+            "results": results,
+        }
+
+        with open(RESULTS_PATH, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+        print(f"Recorded to {RESULTS_PATH}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,562 @@
+"""
+Synthetic Azure tenant and a local fake of the Resource Graph client, used by benchmarks and tests
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+RESOURCE_TYPES = [
+    "Microsoft.Compute/virtualMachines",
+    "Microsoft.Network/networkInterfaces",
+    "Microsoft.Storage/storageAccounts",
+]
+
+
+WHERE_TYPE_PATTERN = re.compile(r"where type (=~|in~|!in~) \(?([^)]*)\)?$")
+
+PATH_PART_PATTERN = re.compile(r"\w+|\[\d+\]")
+
+
+def _property(resource: Dict, path: str) -> Any:
+    value = resource
+
+    for part in PATH_PART_PATTERN.findall(path):
+        if part.startswith("["):
+            index = int(part[1:-1])
+            value = value[index] if isinstance(value, list) and index < len(value) else None
+        else:
+            value = value.get(part) if isinstance(value, dict) else None
+
+    return value
+
+
+def _apply_clause(rows: List[Dict], clause: str) -> List[Dict]:
+    """
+    Apply the where type and project clauses of KQL queries compiled by extraction profiles
+    """
+    where = WHERE_TYPE_PATTERN.match(clause)
+    if where:
+        operator, values = where.groups()
+        types = {value.strip().strip("'") for value in values.split(",")}
+
+        if operator == "!in~":
+            return [row for row in rows if row["type"].lower() not in types]
+
+        return [row for row in rows if row["type"].lower() in types]
+
+    if clause.startswith("project "):
+        columns = []
+        for column in clause[len("project ") :].split(","):
+            name, _, path = column.partition("=")
+            columns.append((name.strip(), path.strip() or name.strip()))
+
+        return [
+            {name: value for name, path in columns if (value := _property(row, path)) is not None}
+            for row in rows
+        ]
+
+    raise ValueError(f"Unsupported clause {clause}")
+
+
+class FakeQueryResponse:
+    def __init__(self, data: List[Dict], skip_token: str = None) -> None:
+        self.data = data
+        self.skip_token = skip_token
+        self.count = len(data)
+
+
+class FakeHttpResponse:
+    def __init__(self, body: bytes, headers: Dict[str, str], status_code: int = 200) -> None:
+        self._body = body
+        self.headers = headers
+        self.status_code = status_code
+        self.reason = "Too Many Requests" if status_code == 429 else "OK"
+
+    def body(self) -> bytes:
+        return self._body
+
+    def text(self, encoding: str = None) -> str:
+        return self._body.decode()
+
+
+class FakePipelineResponse:
+    """
+    Raw response passed to the cls callback of client operations, like azure-core PipelineResponse
+    """
+
+    def __init__(self, response: FakeQueryResponse, headers: Dict[str, str] = None) -> None:
+        self.http_response = FakeHttpResponse(
+            json.dumps({"data": response.data, "$skipToken": response.skip_token}).encode(),
+            headers or {},
+        )
+
+
+class FakeResourceGraphClient:
+    """
+    Serve resources and resource containers like ResourceGraphClient, with paging
+    and a simulated latency per page, counting the requests in flight
+    """
+
+    def __init__(
+        self,
+        resources: List[Dict],
+        resource_containers: List[Dict],
+        page_size: int = 1000,
+        latency: float = 0.0,
+    ) -> None:
+        self.tables = {
+            "resources": resources,
+            "resourcecontainers": resource_containers,
+        }
+        self.page_size = page_size
+        self.latency = latency
+        self.requests_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def _select(self, query: Dict) -> List[Dict]:
+        table, *clauses = [clause.strip() for clause in query["query"].split("|")]
+        rows = self.tables[table.lower()]
+
+        subscriptions = query.get("subscriptions")
+        if subscriptions:
+            rows = [row for row in rows if row.get("subscriptionId") in subscriptions]
+
+        for clause in clauses:
+            rows = _apply_clause(rows, clause)
+
+        return rows
+
+    def resources(self, query: Dict, cls: Callable = None) -> Any:
+        with self._in_flight_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            headers = self._headers()
+            response = self._response(query)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+
+        if cls is not None:
+            return cls(FakePipelineResponse(response, headers), response, {})
+
+        return response
+
+    def _headers(self) -> Dict[str, str]:
+        """
+        Headers of the next response, raise to fail the request before it is served
+        """
+        return {}
+
+    def _response(self, query: Dict) -> FakeQueryResponse:
+        self.requests_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        rows = self._select(query)
+        skip = int(query.get("options", {}).get("$skipToken") or 0)
+        page = rows[skip : skip + self.page_size]
+        next_skip = skip + self.page_size
+
+        return FakeQueryResponse(
+            data=page,
+            skip_token=str(next_skip) if next_skip < len(rows) else None,
+        )
+
+
+class ThrottlingResourceGraphClient(FakeResourceGraphClient):
+    """
+    Fake client enforcing a quota of requests per window like Resource Graph, responses report
+    the remaining quota in x-ms-user-quota-remaining and x-ms-user-quota-resets-after headers
+    and requests over the quota fail with a 429 status
+    """
+
+    def __init__(self, *args, quota: int = 15, window_seconds: float = 5.0, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.quota = quota
+        self.window_seconds = window_seconds
+        self.throttled_count = 0
+        self._window_start = time.monotonic()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def _headers(self) -> Dict[str, str]:
+        from azure.core.exceptions import HttpResponseError
+
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._window_start + self.window_seconds:
+                self._window_start = now
+                self._used = 0
+
+            resets_after = self._window_start + self.window_seconds - now
+            headers = {
+                "x-ms-user-quota-resets-after": time.strftime("%H:%M:%S", time.gmtime(resets_after))
+                + f"{resets_after % 1:.3f}"[1:],
+            }
+
+            if self._used >= self.quota:
+                self.throttled_count += 1
+                headers["x-ms-user-quota-remaining"] = "0"
+
+                raise HttpResponseError(
+                    message="Too many requests",
+                    response=FakeHttpResponse(b"", headers, status_code=429),
+                )
+
+            self._used += 1
+            headers["x-ms-user-quota-remaining"] = str(self.quota - self._used)
+
+            return headers
+
+
+def generate_tenant(
+    subscriptions_count: int, resources_per_subscription: int
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Generate deterministic resource containers and resources of a tenant
+
+    Returns
+    -------
+    Tuple[List[Dict], List[Dict]]
+        Resource containers (subscriptions and resource groups) and resources
+    """
+    resource_containers = []
+    resources = []
+
+    for s in range(subscriptions_count):
+        subscription_id = f"00000000-0000-0000-0000-{s:012d}"
+        resource_group = f"rg-{s}"
+
+        resource_containers.append(
+            {
+                "id": f"/subscriptions/{subscription_id}",
+                "name": f"subscription-{s}",
+                "type": "microsoft.resources/subscriptions",
+                "subscriptionId": subscription_id,
+                "tags": {},
+            }
+        )
+        resource_containers.append(
+            {
+                "id": f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}",
+                "name": resource_group,
+                "type": "microsoft.resources/subscriptions/resourcegroups",
+                "subscriptionId": subscription_id,
+                "location": "westeurope",
+                "tags": {"env": "prod" if s % 2 else "dev"},
+            }
+        )
+
+        for r in range(resources_per_subscription):
+            resource_type = RESOURCE_TYPES[r % len(RESOURCE_TYPES)]
+            name = f"res-{s}-{r}"
+
+            resources.append(
+                {
+                    "id": f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/{resource_type}/{name}",
+                    "name": name,
+                    "type": resource_type,
+                    "subscriptionId": subscription_id,
+                    "resourceGroup": resource_group,
+                    "location": "westeurope",
+                    "tags": {"env": "prod" if r % 2 else "dev"},
+                    "properties": {"provisioningState": "Succeeded", "index": r},
+                }
+            )
+
+    return resource_containers, resources
+
+
+def virtual_machine(i: int, subscription_id: str = "00000000-0000-0000-0000-000000000000") -> Dict:
+    """
+    Resource Graph payload of a virtual machine with data disks and network interfaces
+    """
+    resource_group = f"rg-{i % 10}"
+    base_id = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers"
+
+    return {
+        "id": f"{base_id}/Microsoft.Compute/virtualMachines/vm-{i}",
+        "name": f"vm-{i}",
+        "type": "microsoft.compute/virtualmachines",
+        "tenantId": "11111111-1111-1111-1111-111111111111",
+        "kind": "",
+        "location": "westeurope",
+        "resourceGroup": resource_group,
+        "subscriptionId": subscription_id,
+        "managedBy": "",
+        "sku": None,
+        "plan": None,
+        "identity": {"type": "SystemAssigned", "principalId": f"principal-{i}"},
+        "zones": [str(i % 3 + 1)],
+        "tags": {"env": "prod" if i % 2 else "dev", "owner": f"team-{i % 7}", "costCenter": str(1000 + i % 13)},
+        "properties": {
+            "vmId": f"vm-id-{i}",
+            "provisioningState": "Succeeded",
+            "hardwareProfile": {"vmSize": "Standard_D4s_v5"},
+            "storageProfile": {
+                "imageReference": {
+                    "publisher": "Canonical",
+                    "offer": "0001-com-ubuntu-server-jammy",
+                    "sku": "22_04-lts-gen2",
+                    "version": "latest",
+                },
+                "osDisk": {
+                    "osType": "Linux",
+                    "name": f"vm-{i}-osdisk",
+                    "createOption": "FromImage",
+                    "caching": "ReadWrite",
+                    "diskSizeGB": 30,
+                    "managedDisk": {
+                        "id": f"{base_id}/Microsoft.Compute/disks/vm-{i}-osdisk",
+                        "storageAccountType": "Premium_LRS",
+                    },
+                    "deleteOption": "Delete",
+                },
+                "dataDisks": [
+                    {
+                        "lun": lun,
+                        "name": f"vm-{i}-data-{lun}",
+                        "createOption": "Attach",
+                        "caching": "None",
+                        "diskSizeGB": 128,
+                        "managedDisk": {
+                            "id": f"{base_id}/Microsoft.Compute/disks/vm-{i}-data-{lun}",
+                            "storageAccountType": "Premium_LRS",
+                        },
+                        "toBeDetached": False,
+                    }
+                    for lun in range(i % 4)
+                ],
+            },
+            "osProfile": {
+                "computerName": f"vm-{i}",
+                "adminUsername": "azureuser",
+                "linuxConfiguration": {
+                    "disablePasswordAuthentication": True,
+                    "ssh": {"publicKeys": [{"path": "/home/azureuser/.ssh/authorized_keys", "keyData": "ssh-rsa AAAA"}]},
+                    "provisionVMAgent": True,
+                    "patchSettings": {"patchMode": "ImageDefault", "assessmentMode": "ImageDefault"},
+                },
+                "secrets": [],
+                "allowExtensionOperations": True,
+            },
+            "networkProfile": {
+                "networkInterfaces": [
+                    {
+                        "id": f"{base_id}/Microsoft.Network/networkInterfaces/nic-{i}-{n}",
+                        "properties": {"primary": n == 0, "deleteOption": "Detach"},
+                    }
+                    for n in range(1 + i % 2)
+                ]
+            },
+            "diagnosticsProfile": {"bootDiagnostics": {"enabled": True}},
+            "extended": {
+                "instanceView": {
+                    "computerName": f"vm-{i}",
+                    "osName": "ubuntu",
+                    "osVersion": "22.04",
+                    "powerState": {"code": "PowerState/running", "level": "Info", "displayStatus": "VM running"},
+                }
+            },
+        },
+    }
+
+
+def network_interface(i: int, subscription_id: str = "00000000-0000-0000-0000-000000000000") -> Dict:
+    """
+    Resource Graph payload of a network interface with IP configurations
+    """
+    resource_group = f"rg-{i % 10}"
+    base_id = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers"
+
+    return {
+        "id": f"{base_id}/Microsoft.Network/networkInterfaces/nic-{i}",
+        "name": f"nic-{i}",
+        "type": "microsoft.network/networkinterfaces",
+        "location": "westeurope",
+        "resourceGroup": resource_group,
+        "subscriptionId": subscription_id,
+        "tags": {"env": "prod" if i % 2 else "dev"},
+        "properties": {
+            "provisioningState": "Succeeded",
+            "resourceGuid": f"guid-{i}",
+            "ipConfigurations": [
+                {
+                    "name": f"ipconfig{c}",
+                    "id": f"{base_id}/Microsoft.Network/networkInterfaces/nic-{i}/ipConfigurations/ipconfig{c}",
+                    "type": "Microsoft.Network/networkInterfaces/ipConfigurations",
+                    "properties": {
+                        "provisioningState": "Succeeded",
+                        "privateIPAddress": f"10.{i % 256}.{c}.{i % 250 + 4}",
+                        "privateIPAllocationMethod": "Dynamic",
+                        "subnet": {"id": f"{base_id}/Microsoft.Network/virtualNetworks/vnet/subnets/default"},
+                        "publicIPAddress": {"id": f"{base_id}/Microsoft.Network/publicIPAddresses/pip-{i}-{c}"},
+                        "primary": c == 0,
+                        "privateIPAddressVersion": "IPv4",
+                    },
+                }
+                for c in range(1 + i % 3)
+            ],
+            "dnsSettings": {"dnsServers": [], "appliedDnsServers": [], "internalDomainNameSuffix": "internal.cloudapp.net"},
+            "macAddress": f"00-0D-3A-{i % 256:02X}-00-01",
+            "enableAcceleratedNetworking": True,
+            "enableIPForwarding": False,
+            "networkSecurityGroup": {"id": f"{base_id}/Microsoft.Network/networkSecurityGroups/nsg-{i % 5}"},
+            "primary": True,
+            "virtualMachine": {"id": f"{base_id}/Microsoft.Compute/virtualMachines/vm-{i}"},
+            "nicType": "Standard",
+        },
+    }
+
+
+def storage_account(i: int, subscription_id: str = "00000000-0000-0000-0000-000000000000") -> Dict:
+    """
+    Resource Graph payload of a storage account with network rules
+    """
+    resource_group = f"rg-{i % 10}"
+    base_id = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers"
+
+    return {
+        "id": f"{base_id}/Microsoft.Storage/storageAccounts/st{i}",
+        "name": f"st{i}",
+        "type": "microsoft.storage/storageaccounts",
+        "kind": "StorageV2",
+        "location": "westeurope",
+        "resourceGroup": resource_group,
+        "subscriptionId": subscription_id,
+        "sku": {"name": "Standard_LRS", "tier": "Standard"},
+        "tags": {"env": "prod" if i % 2 else "dev", "dataClassification": "internal"},
+        "properties": {
+            "provisioningState": "Succeeded",
+            "creationTime": "2024-01-01T00:00:00.0000000Z",
+            "primaryLocation": "westeurope",
+            "statusOfPrimary": "available",
+            "accessTier": "Hot",
+            "allowBlobPublicAccess": i % 5 == 0,
+            "minimumTlsVersion": "TLS1_2",
+            "supportsHttpsTrafficOnly": True,
+            "encryption": {
+                "keySource": "Microsoft.Storage",
+                "services": {
+                    service: {"enabled": True, "keyType": "Account", "lastEnabledTime": "2024-01-01T00:00:00.0000000Z"}
+                    for service in ("blob", "file", "queue", "table")
+                },
+            },
+            "networkAcls": {
+                "bypass": "AzureServices",
+                "defaultAction": "Deny",
+                "virtualNetworkRules": [],
+                "ipRules": [{"value": f"203.0.113.{r}", "action": "Allow"} for r in range(i % 4)],
+            },
+            "primaryEndpoints": {
+                endpoint: f"https://st{i}.{endpoint}.core.windows.net/"
+                for endpoint in ("blob", "dfs", "file", "queue", "table", "web")
+            },
+        },
+    }
+
+
+def realistic_resources(count: int) -> List[Dict]:
+    """
+    Virtual machines, network interfaces and storage accounts in equal parts
+    """
+    factories = [virtual_machine, network_interface, storage_account]
+
+    return [factories[i % len(factories)](i) for i in range(count)]
+
+
+def _synthetic_properties(
+    generator: random.Random, i: int, depth: int, array_size: int
+) -> Dict:
+    """
+    Properties nested depth levels deep, each level holding scalars of every type
+    and a list of up to array_size objects
+    """
+    properties = {
+        "provisioningState": "Succeeded" if generator.random() < 0.95 else "Failed",
+        "index": i,
+        "ratio": round(generator.random(), 3),
+        "enabled": generator.random() < 0.5,
+        "sku": f"sku-{generator.randrange(8)}",
+        "items": [
+            {"name": f"item-{j}", "size": generator.randrange(1024)}
+            for j in range(generator.randint(0, array_size))
+        ],
+    }
+
+    if depth > 1:
+        properties["profile"] = _synthetic_properties(generator, i, depth - 1, array_size)
+
+    return properties
+
+
+def generate_resources(
+    count: int,
+    subscriptions_count: int = 4,
+    types_count: int = 10,
+    type_skew: float = 1.0,
+    nesting_depth: int = 3,
+    array_size: int = 3,
+    tags_cardinality: int = 20,
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Generate deterministic resources of synthetic types, spread over the subscriptions
+    of generate_tenant(subscriptions_count, ...)
+
+    Parameters
+    ----------
+    count : int
+        Count of resources
+    subscriptions_count : int
+        Count of subscriptions the resources are spread over
+    types_count : int
+        Count of resource types
+    type_skew : float
+        Exponent of the Zipf distribution of resources over types, 0 for a uniform mix
+    nesting_depth : int
+        Levels of nested objects under properties
+    array_size : int
+        Maximum count of elements of the lists of each level
+    tags_cardinality : int
+        Count of distinct values of the owner tag
+    seed : int
+        Seed of the generator, the same arguments always give the same resources
+    """
+    generator = random.Random(seed)
+    resource_types = [f"Microsoft.Synthetic/type{t}" for t in range(types_count)]
+    weights = [1 / (t + 1) ** type_skew for t in range(types_count)]
+
+    resources = []
+
+    for i, resource_type in enumerate(generator.choices(resource_types, weights, k=count)):
+        subscription_id = f"00000000-0000-0000-0000-{i % subscriptions_count:012d}"
+        resource_group = f"rg-{i % subscriptions_count}"
+        name = f"res-{i}"
+
+        resources.append(
+            {
+                "id": f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/{resource_type}/{name}",
+                "name": name,
+                "type": resource_type.lower(),
+                "subscriptionId": subscription_id,
+                "resourceGroup": resource_group,
+                "location": generator.choice(["westeurope", "northeurope", "eastus"]),
+                "tags": {
+                    "env": generator.choice(["prod", "dev", "test"]),
+                    "owner": f"team-{generator.randrange(tags_cardinality)}",
+                },
+                "properties": _synthetic_properties(generator, i, nesting_depth, array_size),
+            }
+        )
+
+    return resources
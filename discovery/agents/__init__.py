@@ -1 +1,19 @@
-from .sqlite import get_sqlite_agent
\ No newline at end of file
+"""
+Agents querying the snapshots, smolagents and the database drivers of an agent
+are imported on first access to its factory
+"""
+
+_AGENTS_MODULES = {
+    "get_sqlite_agent": "sqlite",
+    "get_duckdb_agent": "duckdb",
+}
+
+
+def __getattr__(name: str):
+    module_name = _AGENTS_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    return getattr(import_module(f".{module_name}", __name__), name)
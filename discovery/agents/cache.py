@@ -0,0 +1,134 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+from discovery.helpers.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+SQL_TOKEN_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+|[^'\"\s]+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalize a query so trivially different writings share a cache entry: whitespace is
+    collapsed, trailing semicolons are removed and everything but quoted strings and
+    identifiers is lowercased, SQLite keywords and identifiers being case-insensitive
+    """
+    tokens = []
+
+    for token in SQL_TOKEN_PATTERN.findall(query.strip().rstrip(";").strip()):
+        if token[0] in "'\"":
+            tokens.append(token)
+        elif token.isspace():
+            tokens.append(" ")
+        else:
+            tokens.append(token.lower())
+
+    return "".join(tokens)
+
+
+def file_identity(path: str) -> Tuple:
+    """
+    Identity of the file content, a snapshot replaced under the same path gets a new identity
+    """
+    stat = os.stat(path)
+
+    return os.path.realpath(path), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class ResultCache:
+    """
+    Least recently used cache of the results of agent tools, bounded by the size of results
+
+    Snapshots are immutable once written, so results are valid as long as the snapshot file
+    keeps its identity. Exceptions are not cached.
+    """
+
+    max_bytes: int = MAX_CACHE_BYTES
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self, db_path: str, tool: str, query: str, compute: Callable[[], str], *args: Hashable
+    ) -> str:
+        """
+        Result of the tool for the query on the snapshot, computed on cache miss
+
+        Parameters
+        ----------
+        db_path : str
+            The path of the snapshot
+        tool : str
+            The name of the tool, results of different tools are cached separately
+        query : str
+            The SQL query or the name of the table, normalized in the key
+        compute : Callable[[], str]
+            Compute the result
+        args : Hashable
+            Any other argument the result depends on
+        """
+        key = (file_identity(db_path), tool, normalize_sql(query), *args)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+
+        result = compute()
+        self._put(key, result)
+
+        return result
+
+    def _put(self, key: Hashable, result: str) -> None:
+        result_size = sys.getsizeof(result)
+        if result_size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+
+            self._entries[key] = (result, result_size)
+            self.size += result_size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+results_cache = ResultCache()
+"""
+Results of the SQLite agent tools
+"""
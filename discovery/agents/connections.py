@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+from typing import Dict
+from discovery.repository.snapshots import get_read_only_uri
+from discovery.repository.targets.incremental import create_logical_views
+from discovery.helpers.logging import get_logger
+
+logger = get_logger(__name__)
+
+MMAP_SIZE = 1024 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+
+AUTHORIZED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+
+AUTHORIZED_PRAGMAS = {"table_info", "table_xinfo", "index_list", "index_info", "data_version"}
+"""
+Pragmas reading the schema, data_version is read by FTS5 tables
+"""
+
+
+def _authorize_read_only(action: int, arg1: str, arg2: str, db_name: str, trigger: str) -> int:
+    """
+    SQLite authorizer denying any statement which is not a read, including ATTACH and PRAGMA assignments
+    """
+    if action in AUTHORIZED_ACTIONS:
+        return sqlite3.SQLITE_OK
+
+    if action == sqlite3.SQLITE_PRAGMA and arg1.lower() in AUTHORIZED_PRAGMAS:
+        return sqlite3.SQLITE_OK
+
+    if action == sqlite3.SQLITE_UPDATE and arg1 == "sqlite_master" and db_name != "temp":
+        # Checked when a virtual table like FTS5 declares its schema on first use,
+        # the snapshot itself is opened read-only
+        return sqlite3.SQLITE_OK
+
+    return sqlite3.SQLITE_DENY
+
+
+class SQLiteConnectionPool:
+    """
+    Read-only connections to snapshots reused across agent tools calls, one per snapshot path
+
+    Snapshots are opened immutable with memory-mapped I/O, the file is prefetched in the
+    page cache of the OS and the connection only accepts reading queries: no write, not even
+    to temporary tables, no ATTACH and no PRAGMA other than schema descriptions.
+    """
+
+    connections: Dict[str, sqlite3.Connection] = {}
+
+    def __init__(self) -> None:
+        self.connections = {}
+        self._lock = threading.Lock()
+
+    def _warm(self, snapshot_path: str, conn: sqlite3.Connection) -> None:
+        if hasattr(os, "posix_fadvise"):
+            fd = os.open(snapshot_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+    def _open(self, snapshot_path: str) -> sqlite3.Connection:
+        logger.info(f"Open snapshot {snapshot_path}")
+
+        conn = sqlite3.connect(
+            get_read_only_uri(snapshot_path), uri=True, check_same_thread=False
+        )
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+
+        create_logical_views(conn, snapshot_path, read_only=True)
+        self._warm(snapshot_path, conn)
+
+        conn.execute("PRAGMA query_only = ON")
+        conn.set_authorizer(_authorize_read_only)
+
+        return conn
+
+    def get(self, snapshot_path: str) -> sqlite3.Connection:
+        """
+        The connection to the snapshot, opened on first use
+        """
+        key = os.path.realpath(snapshot_path)
+
+        with self._lock:
+            conn = self.connections.get(key)
+            if conn is None:
+                if not os.path.isfile(key):
+                    raise FileNotFoundError(f"Snapshot {snapshot_path} does not exist")
+
+                conn = self.connections[key] = self._open(key)
+
+        return conn
+
+    def close(self) -> None:
+        """
+        Close all connections, next calls to get() open them again
+        """
+        with self._lock:
+            for conn in self.connections.values():
+                conn.close()
+
+            self.connections = {}
+
+
+connections = SQLiteConnectionPool()
+"""
+Connections used by the SQLite agent tools
+"""
@@ -0,0 +1,309 @@
+"""
+Tools of the agent querying DuckDB snapshots, they mirror the SQLite tools
+
+Notes
+-----
+Args section is required for the function to be discovered by the smolagents library
+"""
+
+import json
+import os
+import threading
+import duckdb
+import smolagents
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+from discovery.repository import snapshots
+from discovery.helpers.logging import get_logger
+from .cache import results_cache
+from .results import (
+    QueryInterrupted,
+    decode_cursor_token,
+    format_column,
+    format_results,
+)
+from .sqlite import results_budget
+
+logger = get_logger(__name__)
+
+DUCKDB_SNAPSHOT_SUFFIX = ".duckdb"
+
+FETCH_SIZE = 1000
+
+READ_ONLY_CONFIG = {"enable_external_access": False, "lock_configuration": True}
+"""
+Deny queries access to files and databases other than the snapshot and any change of this configuration
+"""
+
+
+class DuckDBConnectionPool:
+    """
+    Read-only connections to DuckDB snapshots reused across agent tools calls, one per snapshot path
+    """
+
+    connections: Dict[str, duckdb.DuckDBPyConnection] = {}
+
+    def __init__(self) -> None:
+        self.connections = {}
+        self._lock = threading.Lock()
+
+    def get(self, snapshot_path: str) -> duckdb.DuckDBPyConnection:
+        """
+        The connection to the snapshot, opened on first use
+        """
+        key = os.path.realpath(snapshot_path)
+
+        with self._lock:
+            conn = self.connections.get(key)
+            if conn is None:
+                if not os.path.isfile(key):
+                    raise FileNotFoundError(f"Snapshot {snapshot_path} does not exist")
+
+                logger.info(f"Open snapshot {key}")
+                conn = self.connections[key] = duckdb.connect(
+                    key, read_only=True, config=READ_ONLY_CONFIG
+                )
+
+        return conn
+
+    def close(self) -> None:
+        """
+        Close all connections, next calls to get() open them again
+        """
+        with self._lock:
+            for conn in self.connections.values():
+                conn.close()
+
+            self.connections = {}
+
+
+connections = DuckDBConnectionPool()
+"""
+Connections used by the DuckDB agent tools
+"""
+
+
+@contextmanager
+def time_limit(conn: duckdb.DuckDBPyConnection, timeout_seconds: float) -> Iterator[None]:
+    """
+    Interrupt the query of the connection running longer than timeout_seconds
+    """
+    timer = threading.Timer(timeout_seconds, conn.interrupt)
+    timer.start()
+    try:
+        yield
+    except duckdb.InterruptException as e:
+        raise QueryInterrupted(
+            f"The query was interrupted after {timeout_seconds} seconds, make it more selective"
+        ) from e
+    finally:
+        timer.cancel()
+
+
+def _rows(conn: duckdb.DuckDBPyConnection) -> Iterator[Tuple]:
+    try:
+        while rows := conn.fetchmany(FETCH_SIZE):
+            yield from rows
+    except duckdb.InterruptException as e:
+        raise QueryInterrupted("The query was interrupted") from e
+
+
+@smolagents.tool
+def get_latest_snapshot_path(target_path: str, as_of: str | None = None) -> str:
+    """
+    This function returns the latest complete DuckDB snapshot file path of the folder, read from its snapshots manifest
+
+    Args:
+        target_path: The folder path to get the latest data snapshot from.
+        as_of: ISO 8601 date and time to get the latest snapshot created at or before it, None for the latest snapshot
+
+    Parameters
+    ----------
+    target_path : str
+        The folder path to get the latest data snapshot from
+    as_of : str | None
+        ISO 8601 date and time, the latest snapshot created at or before it is returned
+
+    Returns
+    -------
+    str
+        The latest snapshot file path
+    """
+    snapshot_path = snapshots.get_latest_snapshot_path(
+        target_path, as_of, suffix=DUCKDB_SNAPSHOT_SUFFIX
+    )
+
+    if snapshot_path is None:
+        raise FileNotFoundError(f"No DuckDB snapshot in {target_path}" + (f" as of {as_of}" if as_of else ""))
+
+    return str(snapshot_path)
+
+
+@smolagents.tool
+def list_tables_names(db_path: str) -> str:
+    """
+    This function lists all tables in the DuckDB database under db_path.
+
+    Args:
+        db_path: The path to the DuckDB database. Call get_latest_snapshot_path() before to get the latest snapshot file path.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the DuckDB database
+
+    Returns
+    -------
+    str
+        The list of tables names in the DuckDB database
+    """
+    conn = connections.get(db_path).cursor()
+    try:
+        tables = conn.execute("SELECT table_name FROM _catalog_tables ORDER BY table_name").fetchall()
+    finally:
+        conn.close()
+
+    return "\n".join(table[0] for table in tables)
+
+
+def _describe_table(db_path: str, table_name: str) -> str:
+    conn = connections.get(db_path).cursor()
+    try:
+        columns = conn.execute(
+            "SELECT expression, type, examples, null_ratio, distinct_count "
+            "FROM _catalog_columns WHERE table_name = ? ORDER BY ordinal",
+            [table_name],
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return "".join(
+        format_column(expression, column_type, json.loads(examples), null_ratio, distinct_count)
+        for expression, column_type, examples, null_ratio, distinct_count in columns
+    )
+
+
+@smolagents.tool
+def get_table_schema(db_path: str, table_name: str) -> str:
+    """
+    This function returns the schema (columns and types) of the table in the DuckDB database.
+
+    Args:
+        db_path: The path to the DuckDB database with table.
+        table_name: The name of the table. Call list_tables_names() before to get the list of table names which is needed to satisfy query. Call execute_select_query() to get the data from the table. Columns described as json_extract_string(...) expressions must be selected with this expression.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the DuckDB database
+    table_name : str
+        The name of the table
+
+    Returns
+    -------
+    str
+        Description of the columns of the table with their ratio of NULL, count of distinct values and examples
+    """
+    return results_cache.get_or_compute(
+        db_path, "duckdb_get_table_schema", table_name, lambda: _describe_table(db_path, table_name)
+    )
+
+
+def _is_ordered(conn: duckdb.DuckDBPyConnection, query: str) -> bool:
+    """
+    Whether the outermost SELECT of the query orders its rows, the query is parsed by DuckDB
+    so that ORDER BY clauses of window functions and subqueries do not count
+    """
+    tree = json.loads(conn.execute("SELECT json_serialize_sql(?)", [query]).fetchone()[0])
+    if tree.get("error"):
+        return False
+
+    return any(
+        modifier["type"] == "ORDER_MODIFIER" for modifier in tree["statements"][-1]["node"]["modifiers"]
+    )
+
+
+def _select(db_path: str, query: str, offset: int) -> str:
+    conn = connections.get(db_path).cursor()
+
+    try:
+        if any(
+            statement.type != duckdb.StatementType.SELECT
+            for statement in conn.extract_statements(query)
+        ):
+            raise ValueError("Only SELECT queries are allowed")
+
+        query_page = query.strip().rstrip(";")
+
+        # DuckDB runs aggregations and joins in parallel, rows of unordered queries come
+        # in a different order at each execution, so pages are cut from a total order
+        if not _is_ordered(conn, query_page):
+            query_page = f"SELECT * FROM ({query_page}) ORDER BY ALL"
+        elif offset:
+            query_page = f"SELECT * FROM ({query_page})"
+
+        if offset:
+            query_page += f" OFFSET {offset}"
+
+        with time_limit(conn, results_budget.timeout_seconds):
+            conn.execute(query_page)
+            return format_results(
+                [description[0] for description in conn.description],
+                _rows(conn),
+                query,
+                offset,
+                results_budget,
+            )
+    finally:
+        conn.close()
+
+
+@smolagents.tool
+def execute_select_query(db_path: str, query: str, cursor_token: str | None = None) -> str:
+    """
+    This function executes a SQL SELECT query on the DuckDB database under db_path, aggregations over many rows are fast.
+    Results are truncated to a budget of rows and bytes, the total count of rows and a cursor token to get the next rows are then given at the end. Rows of queries without ORDER BY are sorted by all their columns, so that pages of the cursor token neither repeat nor skip rows, add an ORDER BY to choose their order. Queries running too long are interrupted.
+
+    Args:
+        db_path: The path to the DuckDB database
+        query: The SQL SELECT query (compatible with DuckDB), the database is read-only. Call get_table_schema() to get the schema of the table which is needed to satisfy query. Prefer aggregations and selected columns to SELECT *.
+        cursor_token: The cursor token given with truncated results of the same query to get the next rows, None for the first rows
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the DuckDB database
+    query : str
+        The SQL SELECT query
+    cursor_token : str | None
+        The cursor token returned with truncated results of the same query
+
+    Returns
+    -------
+    str
+        The tab-separated result of the SELECT query
+    """
+    offset = decode_cursor_token(query, cursor_token) if cursor_token else 0
+
+    return results_cache.get_or_compute(
+        db_path,
+        "duckdb_execute_select_query",
+        query,
+        lambda: _select(db_path, query, offset),
+        offset,
+        results_budget.max_rows,
+        results_budget.max_bytes,
+    )
+
+
+def get_duckdb_agent(model: smolagents.AzureOpenAIServerModel) -> smolagents.CodeAgent:
+    return smolagents.CodeAgent(
+        tools=[
+            get_latest_snapshot_path,
+            list_tables_names,
+            get_table_schema,
+            execute_select_query,
+        ],
+        model=model,
+        planning_interval=3,
+    )
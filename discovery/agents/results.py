@@ -0,0 +1,191 @@
+import base64
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+MAX_ROWS = 200
+MAX_BYTES = 32 * 1024
+"""
+Default budget of a page of results returned to the agent, in rows and in UTF-8 bytes
+"""
+
+QUERY_TIMEOUT_SECONDS = 30.0
+
+PROGRESS_HANDLER_STEPS = 10_000
+"""
+Count of SQLite virtual machine instructions between two checks of the time limit
+"""
+
+
+class QueryInterrupted(TimeoutError):
+    """
+    The query ran longer than the time limit and was interrupted
+    """
+
+
+class ResultsBudget:
+    """
+    Limits of the results of queries run by the agent tools
+    """
+
+    max_rows: int = MAX_ROWS
+    max_bytes: int = MAX_BYTES
+    timeout_seconds: float = QUERY_TIMEOUT_SECONDS
+
+    def __init__(
+        self,
+        max_rows: int = MAX_ROWS,
+        max_bytes: int = MAX_BYTES,
+        timeout_seconds: float = QUERY_TIMEOUT_SECONDS,
+    ) -> None:
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.timeout_seconds = timeout_seconds
+
+
+def _query_hash(query: str) -> str:
+    return hashlib.blake2b(query.strip().encode(), digest_size=8).hexdigest()
+
+
+def encode_cursor_token(query: str, offset: int) -> str:
+    """
+    Opaque token to fetch the results of the query from the offset row
+    """
+    content = json.dumps({"query": _query_hash(query), "offset": offset})
+
+    return base64.urlsafe_b64encode(content.encode()).decode()
+
+
+def decode_cursor_token(query: str, cursor_token: str) -> int:
+    """
+    Offset row of the cursor token, the token must have been returned for the same query
+    """
+    try:
+        content = json.loads(base64.urlsafe_b64decode(cursor_token.encode()))
+        query_hash, offset = content["query"], int(content["offset"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor token {cursor_token}")
+
+    if query_hash != _query_hash(query):
+        raise ValueError("The cursor token was returned for another query")
+
+    return offset
+
+
+def paginate(query: str, offset: int) -> str:
+    """
+    Wrap a SELECT query to skip its first offset rows
+    """
+    if offset == 0:
+        return query
+
+    return f"SELECT * FROM ({query.strip().rstrip(';')}) LIMIT -1 OFFSET {offset}"
+
+
+@contextmanager
+def time_limit(conn: sqlite3.Connection, timeout_seconds: float) -> Iterator[None]:
+    """
+    Interrupt queries of the connection running longer than timeout_seconds,
+    QueryInterrupted is raised instead of sqlite3.OperationalError
+    """
+    deadline = time.monotonic() + timeout_seconds
+
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_STEPS)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if time.monotonic() > deadline and "interrupted" in str(e):
+            raise QueryInterrupted(
+                f"The query was interrupted after {timeout_seconds} seconds, make it more selective"
+            ) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, PROGRESS_HANDLER_STEPS)
+
+
+def _format_row(row: Tuple) -> str:
+    return "\t".join(map(str, row))
+
+
+def sqlite_rows(cursor: sqlite3.Cursor) -> Iterator[Tuple]:
+    """
+    Rows of the executed query, QueryInterrupted is raised when the time limit interrupts it
+    """
+    try:
+        yield from cursor
+    except sqlite3.OperationalError as e:
+        if "interrupted" in str(e):
+            raise QueryInterrupted("The query was interrupted") from e
+        raise
+
+
+def format_results(
+    columns: List[str], rows: Iterator[Tuple], query: str, offset: int, budget: ResultsBudget
+) -> str:
+    """
+    Tab-separated results of the executed query, streamed from the rows until the
+    rows or bytes budget is spent. Remaining rows are counted, not kept, and the
+    response ends with the total count and a cursor token for the next page.
+    """
+    header = _format_row(columns)
+    lines = [header]
+    size = len(header.encode())
+    rows_count = 0
+
+    for row in rows:
+        line = _format_row(row)
+        line_size = len(line.encode()) + 1
+
+        if rows_count >= budget.max_rows or (rows_count and size + line_size > budget.max_bytes):
+            break
+
+        if size + line_size > budget.max_bytes:
+            line = line.encode()[: max(budget.max_bytes - size - 4, 0)].decode(errors="ignore") + "..."
+
+        lines.append(line)
+        size += line_size
+        rows_count += 1
+    else:
+        return "\n".join(lines)
+
+    remaining_count = 1
+    try:
+        for _ in rows:
+            remaining_count += 1
+        total = f"{offset + rows_count + remaining_count}"
+    except QueryInterrupted:
+        total = f"more than {offset + rows_count + remaining_count}"
+
+    next_token = encode_cursor_token(query, offset + rows_count)
+    lines.append(
+        f"-- Truncated: rows {offset + 1} to {offset + rows_count} of {total} are shown, "
+        f"call again with cursor_token='{next_token}' to get the next rows"
+    )
+
+    return "\n".join(lines)
+
+
+def format_column(
+    column_name: str,
+    column_type: str,
+    examples: list,
+    null_ratio: float = None,
+    distinct_count: int = None,
+) -> str:
+    """
+    Line describing a column in the response of get_table_schema tools
+    """
+    description = f"{column_name} {column_type}"
+
+    if null_ratio is not None:
+        description += f", {null_ratio:.0%} NULL"
+        description += (
+            f", {distinct_count} distinct values"
+            if distinct_count is not None
+            else ", many distinct values"
+        )
+
+    return description + ", values examples: " + ", ".join(map(str, examples)) + "\n"
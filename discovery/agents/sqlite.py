@@ -6,35 +6,77 @@ Args section is required for the function to be discovered by the smolagents lib
 It is better to return from tool only information related to results, smolagents add other precisions by itself.
 """
 
-import os
+import json
+import sqlite3
 import smolagents
 from typing import List
+from discovery.repository import snapshots
+from discovery.repository.targets.incremental import (
+    CHANGES_TABLE_NAME,
+    INCREMENTAL_SNAPSHOT,
+    read_snapshot_info,
+)
+from discovery.repository.targets.sqlite import SEARCH_TABLE_NAME
+from .cache import results_cache
+from .connections import connections
+from .results import (
+    ResultsBudget,
+    decode_cursor_token,
+    format_column,
+    format_results,
+    paginate,
+    sqlite_rows,
+    time_limit,
+)
+
+SEARCH_LIMIT = 50
+
+results_budget = ResultsBudget()
+"""
+Limits of the results returned by execute_select_query
+"""
+
+
+def _has_table(cursor: sqlite3.Cursor, table_name: str) -> bool:
+    """
+    The table or a temporary view of this name exists
+    """
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = ? "
+        "UNION ALL SELECT name FROM sqlite_temp_master WHERE name = ?;",
+        (table_name, table_name),
+    )
+
+    return cursor.fetchone() is not None
 
 
 @smolagents.tool
-def get_latest_snapshot_path(target_path: str) -> str:
+def get_latest_snapshot_path(target_path: str, as_of: str | None = None) -> str:
     """
-    This function lists all *.db files and returns the latest snapshot file path
+    This function returns the latest complete snapshot file path of the folder, read from its snapshots manifest
 
     Args:
         target_path: The folder path to get the latest data snapshot from.
+        as_of: ISO 8601 date and time to get the latest snapshot created at or before it, None for the latest snapshot
 
     Parameters
     ----------
     target_path : str
         The folder path to get the latest data snapshot from
+    as_of : str | None
+        ISO 8601 date and time, the latest snapshot created at or before it is returned
 
     Returns
     -------
     str
         The latest snapshot file path
     """
-    files = os.listdir(target_path)
-    snapshot_files = [f for f in files if f.endswith(".db")]
-    latest_snapshot = max(snapshot_files, key=os.path.getctime)
-    snaphot_path = os.path.join(target_path, latest_snapshot)
+    snapshot_path = snapshots.get_latest_snapshot_path(target_path, as_of)
+
+    if snapshot_path is None:
+        raise FileNotFoundError(f"No snapshot in {target_path}" + (f" as of {as_of}" if as_of else ""))
 
-    return snaphot_path
+    return str(snapshot_path)
 
 
 @smolagents.tool
@@ -55,17 +97,68 @@ def list_tables_names(db_path: str) -> str:
     List[str]
         The list of table names in the SQLite database
     """
-    import sqlite3
+    cursor = connections.get(db_path).cursor()
+
+    if _has_table(cursor, "_catalog_tables"):
+        cursor.execute("SELECT table_name FROM _catalog_tables ORDER BY table_name;")
+    else:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND substr(name, 1, 1) != '_' "
+            "UNION SELECT name FROM sqlite_temp_master WHERE type='view' AND substr(name, 1, 1) != '_';"
+        )
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = cursor.fetchall()
-    conn.close()
+    cursor.close()
 
     return "\n".join([table[0] for table in tables])
 
 
+def _describe_table(db_path: str, table_name: str) -> str:
+    cursor = connections.get(db_path).cursor()
+
+    if _has_table(cursor, "_catalog_columns"):
+        cursor.execute(
+            "SELECT expression, type, examples, null_ratio, distinct_count "
+            "FROM _catalog_columns WHERE table_name = ? ORDER BY ordinal;",
+            (table_name,),
+        )
+        response = "".join(
+            format_column(expression, column_type, json.loads(examples), null_ratio, distinct_count)
+            for expression, column_type, examples, null_ratio, distinct_count in cursor.fetchall()
+        )
+        cursor.close()
+
+        return response
+
+    cursor.execute(f"PRAGMA table_info({table_name});")
+    schema = [col[1:3] for col in cursor.fetchall() if col[1] != "_spilled"]
+
+    if _has_table(cursor, "_spilled_columns"):
+        cursor.execute(
+            "SELECT column_name, type FROM _spilled_columns WHERE table_name = ?;",
+            (table_name,),
+        )
+        schema += [
+            (f"json_extract(_spilled, '$.{column_name}')", column_type)
+            for column_name, column_type in cursor.fetchall()
+        ]
+
+    response = ""
+
+    for column_name, column_type in schema:
+        cursor.execute(f"SELECT DISTINCT {column_name} FROM {table_name} LIMIT 10;")
+        distinct_values = cursor.fetchall()
+        response += format_column(
+            column_name,
+            column_type,
+            [v[0] for v in distinct_values if v[0] is not None],
+        )
+
+    cursor.close()
+
+    return response
+
+
 @smolagents.tool
 def get_table_schema(db_path: str, table_name: str) -> str:
     """
@@ -73,7 +166,7 @@ def get_table_schema(db_path: str, table_name: str) -> str:
 
     Args:
         db_path: The path to the SQLite database with table.
-        table_name: The name of the table. Call list_tables_names() before to get the list of table names which is needed to satisfy query. Call execute_select_query() to get the data from the table.
+        table_name: The name of the table. Call list_tables_names() before to get the list of table names which is needed to satisfy query. Call execute_select_query() to get the data from the table. Columns described as json_extract(...) expressions must be selected with this expression.
 
     Parameters
     ----------
@@ -85,39 +178,43 @@ def get_table_schema(db_path: str, table_name: str) -> str:
     Returns
     -------
     str
-        Description of the schema of the table
+        Description of the schema of the table, columns spilled from too wide tables
+        are described by the json_extract expression returning them.
+        Snapshots with a catalog also give the ratio of NULL and the count of distinct values.
     """
-    import sqlite3
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table_name});")
-    schema = cursor.fetchall()
-
-    response = ""
+    return results_cache.get_or_compute(
+        db_path, "get_table_schema", table_name, lambda: _describe_table(db_path, table_name)
+    )
 
-    for col in schema:
-        cursor.execute(f"SELECT DISTINCT {col[1]} FROM {table_name} LIMIT 10;")
-        distinct_values = cursor.fetchall()
-        response += (
-            (f"{col[1]} {col[2]}, values examples: ")
-            + (", ".join([str(v[0]) for v in distinct_values if v[0] is not None]))
-            + "\n"
-        )
 
-    conn.close()
+def _select(db_path: str, query: str, offset: int) -> str:
+    conn = connections.get(db_path)
 
-    return response
+    with time_limit(conn, results_budget.timeout_seconds):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(paginate(query, offset))
+            return format_results(
+                [description[0] for description in cursor.description],
+                sqlite_rows(cursor),
+                query,
+                offset,
+                results_budget,
+            )
+        finally:
+            cursor.close()
 
 
 @smolagents.tool
-def execute_select_query(db_path: str, query: str) -> str:
+def execute_select_query(db_path: str, query: str, cursor_token: str | None = None) -> str:
     """
     This function executes a SQL SELECT query on the SQLite database under db_path.
+    Results are truncated to a budget of rows and bytes, the total count of rows and a cursor token to get the next rows are then given at the end. Queries running too long are interrupted.
 
     Args:
         db_path: The path to the SQLite database
-        query: The SQL SELECT query (compatible with SQLite3). Call get_table_schema() to get the schema of the table which is needed to satisfy query.
+        query: The SQL SELECT query (compatible with SQLite3), the database is read-only. Call get_table_schema() to get the schema of the table which is needed to satisfy query. Prefer aggregations and selected columns to SELECT *.
+        cursor_token: The cursor token given with truncated results of the same query to get the next rows, None for the first rows
 
     Parameters
     ----------
@@ -125,27 +222,93 @@ def execute_select_query(db_path: str, query: str) -> str:
         The path to the SQLite database
     query : str
         The SQL SELECT query. Call get_table_schema() to get the schema of the table which is needed to satisfy query.
+    cursor_token : str | None
+        The cursor token returned with truncated results of the same query
 
     Returns
     -------
-    List[Dict]
-        The result of the SELECT query
+    str
+        The tab-separated result of the SELECT query
     """
-    import sqlite3
+    offset = decode_cursor_token(query, cursor_token) if cursor_token else 0
+
+    return results_cache.get_or_compute(
+        db_path,
+        "execute_select_query",
+        query,
+        lambda: _select(db_path, query, offset),
+        offset,
+        results_budget.max_rows,
+        results_budget.max_bytes,
+    )
 
-    conn = sqlite3.connect(db_path)
+
+def _search_query(text: str) -> str:
+    """
+    FTS5 query matching all terms of the text, each term is quoted as a phrase
+    so punctuation like in prod-westeu is not parsed as FTS5 syntax
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+def _search(db_path: str, text: str) -> str:
+    conn = connections.get(db_path)
     cursor = conn.cursor()
-    cursor.execute(query)
-    columns = [description[0] for description in cursor.description]
-    result = cursor.fetchall()
-    conn.close()
 
-    response = []
-    response.append("\t".join(columns))
-    for row in result:
-        response.append("\t".join(map(str, row)))
+    try:
+        if not _has_table(cursor, SEARCH_TABLE_NAME):
+            return "Full-text search is not available for this snapshot, use execute_select_query() instead"
+
+        selects = [f"SELECT id, table_name, rank FROM main.{SEARCH_TABLE_NAME}(?)"]
+        parameters = [_search_query(text)]
+
+        if read_snapshot_info(conn).get("kind") == INCREMENTAL_SNAPSHOT and conn.execute(
+            "SELECT 1 FROM base.sqlite_master WHERE name = ?", (SEARCH_TABLE_NAME,)
+        ).fetchone():
+            selects.append(
+                f"SELECT id, table_name, rank FROM base.{SEARCH_TABLE_NAME}(?) "
+                f"WHERE id NOT IN (SELECT id FROM main.{CHANGES_TABLE_NAME})"
+            )
+            parameters.append(parameters[0])
+
+        with time_limit(conn, results_budget.timeout_seconds):
+            cursor.execute(
+                f"SELECT id, group_concat(table_name, ', ') FROM ({' UNION ALL '.join(selects)}) "
+                f"GROUP BY id ORDER BY min(rank) LIMIT {SEARCH_LIMIT}",
+                parameters,
+            )
+            matches = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    return "\n".join(["id\ttables"] + [f"{resource_id}\t{tables}" for resource_id, tables in matches])
+
 
-    return "\n".join(response)
+@smolagents.tool
+def search_resources(db_path: str, text: str) -> str:
+    """
+    This function searches resources by words of their name, type, tags and property values with a full-text index.
+    Use it to find resources mentioning a name or an identifier without knowing in which table or column it is.
+
+    Args:
+        db_path: The path to the SQLite database. Call get_latest_snapshot_path() before to get the latest snapshot file path.
+        text: The words to search, resources matching all words are returned, for example: prod-westeu
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the SQLite database
+    text : str
+        The words to search
+
+    Returns
+    -------
+    str
+        The ids of the best matching resources with the tables they are stored in, tab-separated
+    """
+    return results_cache.get_or_compute(
+        db_path, "search_resources", text, lambda: _search(db_path, text)
+    )
 
 
 def get_sqlite_agent(model: smolagents.AzureOpenAIServerModel) -> smolagents.CodeAgent:
@@ -155,6 +318,7 @@ def get_sqlite_agent(model: smolagents.AzureOpenAIServerModel) -> smolagents.Cod
             list_tables_names,
             get_table_schema,
             execute_select_query,
+            search_resources,
         ],
         model=model,
         additional_authorized_imports=["sqlite3"],
@@ -1,9 +1,22 @@
 import click
+import cProfile
+import json
+import time
 from datetime import datetime
 from pathlib import Path
-from discovery.settings import get_settings
+from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
 
-settings = get_settings()
+logger = get_logger(__name__)
+
+
+def default_target_path() -> str:
+    """
+    The target folder path of the settings, resolved only when --target-path is not given
+    """
+    from discovery.settings import get_extract_settings
+
+    return get_extract_settings().extract_target_folder_path
 
 
 @click.group()
@@ -14,32 +27,283 @@ def cli():
 @cli.command()
 @click.option(
     "--target-path",
-    default=settings.extract_target_folder_path,
+    default=default_target_path,
     help="The folder path to save the data snapshot",
 )
-def extract(target_path: str):
+@click.option(
+    "--stream/--no-stream",
+    default=False,
+    help="Write resources to the snapshot in batches instead of keeping them all in memory",
+)
+@click.option(
+    "--batch-size",
+    default=1000,
+    type=click.IntRange(min=1),
+    help="The count of resources of one type written at once to the snapshot",
+)
+@click.option(
+    "--concurrency",
+    default=1,
+    type=click.IntRange(min=1),
+    help="The count of Resource Graph queries running at once, above 1 resources are queried by subscription",
+)
+@click.option(
+    "--subscriptions-per-query",
+    default=1,
+    type=click.IntRange(min=1, max=1000),
+    help="The count of subscriptions a single Resource Graph query is scoped to when concurrency is above 1",
+)
+@click.option(
+    "--transform-workers",
+    default=0,
+    type=click.IntRange(min=0),
+    help="The count of processes flattening resources and inferring table schemas, 0 to flatten them in the querying thread",
+)
+@click.option(
+    "--bulk-load/--no-bulk-load",
+    default=False,
+    help="Write the snapshot in a single transaction tuned for a write-once file",
+)
+@click.option(
+    "--max-columns",
+    default=1000,
+    type=click.IntRange(min=2, max=1999),
+    help="The maximum count of columns of a table, other columns are stored in a JSON column",
+)
+@click.option(
+    "--incremental/--no-incremental",
+    default=False,
+    help="Write only resources changed since the latest full snapshot",
+)
+@click.option(
+    "--full-text-search/--no-full-text-search",
+    default=False,
+    help="Index names, types, tags and values of resources for full-text search by the agent",
+)
+@click.option(
+    "--engine",
+    default="sqlite",
+    type=click.Choice(["sqlite", "duckdb"]),
+    help="The database of the snapshot, DuckDB is a columnar store faster for aggregations",
+)
+@click.option(
+    "--storage",
+    default="flattened",
+    type=click.Choice(["flattened", "json"]),
+    help="Store resources flattened in columns or as JSON documents with generated columns for frequent properties",
+)
+@click.option(
+    "--lists",
+    default="columns",
+    type=click.Choice(["columns", "tables"]),
+    help="Flatten elements of lists to columns suffixed with their index or store them in child tables joined on parent_id",
+)
+@click.option(
+    "--resume/--no-resume",
+    default=False,
+    help="Resume the latest interrupted streaming extraction from its last checkpoint, with the same options",
+)
+@click.option(
+    "--profile/--no-profile",
+    default=False,
+    help="Dump a cProfile of the extraction next to the snapshot, only the main thread is profiled",
+)
+def extract(
+    target_path: str,
+    profile: bool,
+    engine: str,
+    storage: str,
+    lists: str,
+    resume: bool,
+    stream: bool,
+    batch_size: int,
+    bulk_load: bool,
+    max_columns: int,
+    incremental: bool,
+    full_text_search: bool,
+    concurrency: int,
+    subscriptions_per_query: int,
+    transform_workers: int,
+):
     """
     Extract data from all various sources and save it to a target
     """
 
     click.echo("Extracting data from Azure Resource Graph")
 
+    if engine == "duckdb" and (incremental or bulk_load or full_text_search):
+        click.echo("Error: --incremental, --bulk-load and --full-text-search are only supported by SQLite")
+        raise click.Abort()
+
+    if storage == "json" and (engine == "duckdb" or incremental):
+        click.echo("Error: --storage json is not supported with --engine duckdb nor --incremental")
+        raise click.Abort()
+
+    if storage == "json" and transform_workers:
+        click.echo("Error: --transform-workers is only supported with --storage flattened")
+        raise click.Abort()
+
+    if storage == "json" and lists == "tables":
+        click.echo("Error: --lists tables is only supported with --storage flattened")
+        raise click.Abort()
+
+    resumable = (
+        stream and engine == "sqlite" and storage == "flattened" and not (incremental or bulk_load)
+    )
+
+    if resume and not resumable:
+        click.echo(
+            "Error: --resume is only supported with --stream to SQLite with flattened storage, "
+            "without --incremental nor --bulk-load"
+        )
+        raise click.Abort()
+
     try:
         from azure.identity import DefaultAzureCredential
+        from discovery.settings import get_extract_settings
         from discovery.sources.azure_arm import AzureARM
-        from discovery.repository import MemoryRepository
+        from discovery.repository import CompactMemoryRepository, StreamingRepository
+        from discovery.repository.targets import (
+            IncrementalSQLiteTarget,
+            JSONSQLiteTarget,
+            SQLiteTarget,
+        )
+        from discovery.repository.targets.incremental import resolve_base_snapshot
+        from discovery.repository.snapshots import (
+            SNAPSHOT_COMPLETE,
+            SNAPSHOT_PARTIAL,
+            SnapshotsManifest,
+            get_latest_snapshot_path,
+            parse_time,
+        )
+
+        manifest = SnapshotsManifest(target_path)
+
+        if resume:
+            entry = manifest.resolve_resumable(suffix=".db")
+            if entry is None:
+                raise ValueError(
+                    f"No interrupted resumable extraction to resume in {target_path}, "
+                    "the latest snapshot is complete or was not extracted with --stream"
+                )
+
+            db_path = Path(target_path) / entry["file_name"]
+            created_at = parse_time(entry["created_at"])
+            click.echo(f"Resuming extraction to {db_path}")
+        else:
+            created_at = datetime.now()
+            timestamp = created_at.strftime("%Y%m%d%H%M%S")
+            db_path = Path(
+                Path(target_path) / f"extract_{timestamp}.{'duckdb' if engine == 'duckdb' else 'db'}"
+            )
+
+        def get_target() -> SQLiteTarget:
+            if engine == "duckdb":
+                from discovery.repository.targets import DuckDBTarget
+
+                return DuckDBTarget(db_path, max_columns=max_columns)
+
+            if incremental:
+                base_path = resolve_base_snapshot(get_latest_snapshot_path(target_path))
+
+                return IncrementalSQLiteTarget(
+                    db_path,
+                    base_path=base_path,
+                    bulk_load=bulk_load,
+                    max_columns=max_columns,
+                    full_text_search=full_text_search,
+                )
 
+            target_class = JSONSQLiteTarget if storage == "json" else SQLiteTarget
+
+            return target_class(
+                db_path,
+                bulk_load=bulk_load,
+                max_columns=max_columns,
+                full_text_search=full_text_search,
+                resumable=resumable,
+                resume=resume,
+            )
+
+        def record_snapshot(target: SQLiteTarget = None) -> None:
+            if target is None:
+                manifest.record(db_path, SNAPSHOT_PARTIAL, created_at, resumable=resumable)
+            else:
+                manifest.record(
+                    db_path,
+                    SNAPSHOT_COMPLETE,
+                    created_at,
+                    {
+                        table_name: table.rows_count
+                        for table_name, table in target.schema.tables.items()
+                    },
+                )
+
+        settings = get_extract_settings()
         credential = DefaultAzureCredential()
-        repository = MemoryRepository()
-        azure_arm = AzureARM(credential, repository)
-        azure_arm.extract_all_resources()
 
-        from discovery.repository.targets import SQLiteTarget
+        metrics.reset()
+        start = time.perf_counter()
+
+        if profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        if stream:
+            with get_target() as target:
+                record_snapshot()
+                repository = StreamingRepository(target, batch_size=batch_size)
+                azure_arm = AzureARM(
+                    credential,
+                    repository,
+                    flatten=storage == "flattened",
+                    child_tables=lists == "tables",
+                    profile=settings.extract_profile,
+                    transform_workers=transform_workers,
+                )
+                azure_arm.extract_all_resources(concurrency, subscriptions_per_query)
+                repository.save_to(target)
+        else:
+            repository = CompactMemoryRepository(batch_size=batch_size)
+            azure_arm = AzureARM(
+                credential,
+                repository,
+                flatten=storage == "flattened",
+                child_tables=lists == "tables",
+                profile=settings.extract_profile,
+                transform_workers=transform_workers,
+            )
+            azure_arm.extract_all_resources(concurrency, subscriptions_per_query)
 
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        db_path = Path(Path(target_path) / f"extract_{timestamp}.db")
-        target = SQLiteTarget(db_path)
-        repository.save_to(target)
+            with get_target() as target:
+                record_snapshot()
+                repository.save_to(target)
+
+        record_snapshot(target)
+
+        if profile:
+            profiler.disable()
+            profiler.dump_stats(f"{db_path}.prof")
+            click.echo(f"Profile written to {db_path}.prof")
+
+        report = {
+            "snapshot": db_path.name,
+            "wall_seconds": round(time.perf_counter() - start, 6),
+            **metrics.report(
+                {
+                    table_name: {
+                        "rows": table.rows_count,
+                        "columns": len(table.columns),
+                        "spilled_columns": len(table.columns) - table.real_columns_count,
+                    }
+                    for table_name, table in target.schema.tables.items()
+                }
+            ),
+        }
+        with open(f"{db_path}.metrics.json", "w") as file:
+            json.dump(report, file, indent=1)
+
+        click.echo(f"Metrics written to {db_path}.metrics.json")
     except Exception as e:
         click.echo(f"Error: {e}")
         raise click.Abort()
@@ -48,16 +312,56 @@ def extract(target_path: str):
 @cli.command()
 @click.option(
     "--target-path",
-    default=settings.extract_target_folder_path,
+    default=default_target_path,
     help="The folder path to get the latest data snapshot from",
 )
 @click.option("--query", help="The user task to run on AI agents")
-def run(target_path: str, query: str):
+@click.option(
+    "--max-rows",
+    default=200,
+    type=click.IntRange(min=1),
+    help="Maximum count of rows of a query result returned to the agent at once",
+)
+@click.option(
+    "--max-bytes",
+    default=32 * 1024,
+    type=click.IntRange(min=1024),
+    help="Maximum size in bytes of a query result returned to the agent at once",
+)
+@click.option(
+    "--query-timeout",
+    default=30.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Queries of the agent running longer than this count of seconds are interrupted",
+)
+@click.option(
+    "--engine",
+    default="sqlite",
+    type=click.Choice(["sqlite", "duckdb"]),
+    help="The database of the snapshots to query",
+)
+@click.option(
+    "--as-of",
+    default=None,
+    help="ISO 8601 date and time, query the latest snapshot created at or before it instead of the latest one",
+)
+def run(
+    target_path: str,
+    query: str,
+    max_rows: int,
+    max_bytes: int,
+    query_timeout: float,
+    engine: str,
+    as_of: str,
+):
     def get_azure_openai_model():
         """
         TODO: Provide possibility to switch between different models with command line arguments
         """
         from smolagents import AzureOpenAIServerModel
+        from discovery.settings import get_agent_settings
+
+        settings = get_agent_settings()
 
         return AzureOpenAIServerModel(
             model_id=settings.azure_openai_deployment_name,
@@ -66,11 +370,49 @@ def run(target_path: str, query: str):
             api_version=settings.azure_openai_api_version
         )
 
-    from discovery.agents import get_sqlite_agent
+    from discovery.agents.connections import connections
+    from discovery.agents.cache import results_cache
+    from discovery.agents.sqlite import results_budget
+
+    results_budget.max_rows = max_rows
+    results_budget.max_bytes = max_bytes
+    results_budget.timeout_seconds = query_timeout
+
+    # duckdb is only loaded for the duckdb engine
+    if engine == "duckdb":
+        from discovery.agents.duckdb import get_duckdb_agent
+
+        agent = get_duckdb_agent(model = get_azure_openai_model())
+    else:
+        from discovery.agents.sqlite import get_sqlite_agent
+
+        agent = get_sqlite_agent(model = get_azure_openai_model())
+
+    additional_args = {"target_path": target_path}
+
+    if as_of is not None:
+        from discovery.repository.snapshots import get_latest_snapshot_path
+
+        db_path = get_latest_snapshot_path(
+            target_path, as_of, suffix=".duckdb" if engine == "duckdb" else ".db"
+        )
+        if db_path is None:
+            click.echo(f"Error: no snapshot in {target_path} as of {as_of}")
+            raise click.Abort()
+
+        additional_args["db_path"] = str(db_path)
+        query += "\nUse the snapshot under db_path, do not look for the latest snapshot."
+
+    try:
+        agent.run(query, additional_args=additional_args)
+    finally:
+        logger.info(f"Agent tools results cache: {results_cache.stats}")
+        connections.close()
 
-    agent = get_sqlite_agent(model = get_azure_openai_model())
+        if engine == "duckdb":
+            from discovery.agents.duckdb import connections as duckdb_connections
 
-    agent.run(query, additional_args={"target_path": target_path})
+            duckdb_connections.close()
 
 
 if __name__ == "__main__":
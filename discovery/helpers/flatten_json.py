@@ -1,17 +1,224 @@
-def flatten_json(input_json_object: dict | list) -> dict:
-    out = {}
+import sys
+from typing import Any, Dict, List, Tuple
+
+MISSING = object()
+
+KeyPathCache = Dict[str | None, Dict[str | int, str]]
+
+ChildRows = Dict[str, List[dict]]
+"""
+Rows of the elements of the lists of an object keyed by the key path of their list,
+nested lists key paths are prefixed with the key path of their parent list
+"""
+
+ID_KEY = "id"
+PARENT_ID_KEY = "parent_id"
+ORDINAL_KEY = "ordinal"
+ELEMENT_KEY = "value"
+"""
+Key of a scalar element in its child row and prefix of the keys of an object element,
+so they never collide with the id, parent_id and ordinal keys
+"""
+
+
+def _children_key_paths(cache: KeyPathCache, parent_key_path: str | None) -> Dict[str | int, str]:
+    children_key_paths = cache.get(parent_key_path)
+    if children_key_paths is None:
+        children_key_paths = cache[parent_key_path] = {}
+
+    return children_key_paths
+
+
+def _key_path(
+    children_key_paths: Dict[str | int, str], parent_key_path: str | None, key: str | int
+) -> str:
+    key_path = children_key_paths.get(key)
+    if key_path is None:
+        key_path = str(key) if parent_key_path is None else f"{parent_key_path}_{key}"
+        key_path = children_key_paths[key] = sys.intern(key_path)
+
+    return key_path
 
-    def flatten(json_element, parent_json_key=''):
-        if type(json_element) is dict:
-            for json_element_key in json_element:
-                flatten(json_element[json_element_key], parent_json_key + json_element_key + '_')
-        elif type(json_element) is list:
-            i = 0
-            for json_list_element in json_element:
-                flatten(json_list_element, parent_json_key + str(i) + '_')
-                i += 1
+
+def _flatten_into(
+    out: dict,
+    json_element: Any,
+    cache: KeyPathCache,
+    parent_key_path: str | None = None,
+    projection: Dict[str, Any] = None,
+    projected_out: dict = None,
+    lists: List[Tuple[str, list]] = None,
+) -> None:
+    """
+    Flatten json_element into out without recursion, a stack keeps the iterator over
+    the items of each dict or list being walked
+
+    Leaves under a top-level key of projection are written to projected_out as well.
+    When lists is given, nested lists are appended to it with their key path instead of being walked.
+    """
+    element_type = type(json_element)
+    if element_type is dict:
+        items = iter(json_element.items())
+    elif element_type is list:
+        items = enumerate(json_element)
+    else:
+        out["" if parent_key_path is None else parent_key_path] = json_element
+        return
+
+    stack = [
+        (items, parent_key_path, _children_key_paths(cache, parent_key_path), False)
+    ]
+
+    while stack:
+        items, parent_key_path, children_key_paths, projected = stack[-1]
+
+        for key, value in items:
+            key_path = children_key_paths.get(key)
+            if key_path is None:
+                key_path = _key_path(children_key_paths, parent_key_path, key)
+
+            value_type = type(value)
+
+            if value_type is list and lists is not None:
+                lists.append((key_path, value))
+                continue
+
+            if value_type is dict or value_type is list:
+                stack.append(
+                    (
+                        iter(value.items()) if value_type is dict else enumerate(value),
+                        key_path,
+                        cache.get(key_path) or _children_key_paths(cache, key_path),
+                        projected
+                        or (projection is not None and len(stack) == 1 and key in projection),
+                    )
+                )
+                break
+
+            out[key_path] = value
+            if projected:
+                projected_out[key_path] = value
         else:
-            out[parent_json_key[:-1]] = json_element
+            stack.pop()
+
+
+def flatten_json(input_json_object: dict | list, cache: KeyPathCache = None) -> dict:
+    """
+    Flatten nested dictionaries and lists to a single level dictionary,
+    keys of nested elements are joined with underscores and list elements are keyed by index
+
+    Parameters
+    ----------
+    input_json_object : dict | list
+        The object to flatten
+    cache : KeyPathCache
+        Flattened keys by parent key path, reuse it across objects of the same shape
+        to avoid rebuilding the key strings
+
+    Returns
+    -------
+    dict
+        The flattened object
+    """
+    out = {}
+    _flatten_into(out, input_json_object, {} if cache is None else cache)
+
+    return out
+
+
+def _add_child_rows(
+    child_rows: ChildRows,
+    lists: List[Tuple[str, list]],
+    parent_id: str,
+    cache: KeyPathCache,
+) -> None:
+    """
+    Add the elements of lists and of the lists nested in them to child_rows, elements
+    are walked from a stack of pending lists instead of recursively
+    """
+    pending = [(lists, parent_id, None)]
+
+    while pending:
+        lists, parent_id, parent_table_key_path = pending.pop()
+
+        for key_path, values in lists:
+            table_key_path = (
+                key_path
+                if parent_table_key_path is None
+                else sys.intern(f"{parent_table_key_path}_{key_path}")
+            )
+            rows = child_rows.setdefault(table_key_path, [])
+
+            for ordinal, value in enumerate(values):
+                row_id = f"{parent_id}/{key_path}/{ordinal}"
+                row = {ID_KEY: row_id, PARENT_ID_KEY: parent_id, ORDINAL_KEY: ordinal}
+                rows.append(row)
+
+                value_type = type(value)
+
+                if value_type is dict:
+                    nested_lists = []
+                    _flatten_into(row, value, cache, ELEMENT_KEY, lists=nested_lists)
+                elif value_type is list:
+                    nested_lists = [(ELEMENT_KEY, value)]
+                else:
+                    row[ELEMENT_KEY] = value
+                    continue
+
+                if nested_lists:
+                    pending.append((nested_lists, row_id, table_key_path))
+
+
+def flatten_json_with_projection(
+    input_json_object: dict,
+    projection: Dict[str, Any],
+    cache: KeyPathCache = None,
+    child_rows: ChildRows = None,
+) -> Tuple[dict, dict]:
+    """
+    Flatten a dictionary and, in the same pass, the projection of some of its top-level keys
+
+    Parameters
+    ----------
+    input_json_object : dict
+        The object to flatten
+    projection : Dict[str, Any]
+        Top-level keys to project with their default value when the key is missing,
+        MISSING as default makes the key required
+    cache : KeyPathCache
+        Flattened keys by parent key path, reuse it across objects of the same shape
+    child_rows : ChildRows
+        When given, lists are not flattened with the index of their elements, each element
+        is added as a row to child_rows instead, with an id made of the id of its parent,
+        the key path of the list and its ordinal, the id of its parent and its ordinal
+
+    Returns
+    -------
+    Tuple[dict, dict]
+        The flattened projection and the flattened object
+    """
+    cache = {} if cache is None else cache
+    root_key_paths = _children_key_paths(cache, None)
+    projected_out = {}
+
+    for key, default in projection.items():
+        value = input_json_object.get(key, default)
+
+        if value is MISSING:
+            raise KeyError(key)
+
+        if key not in input_json_object:
+            _flatten_into(
+                projected_out, value, cache, _key_path(root_key_paths, None, key)
+            )
+        elif type(value) is not dict and type(value) is not list:
+            projected_out[_key_path(root_key_paths, None, key)] = value
+
+    out = {}
+    lists = None if child_rows is None else []
+    _flatten_into(out, input_json_object, cache, None, projection, projected_out, lists)
+
+    if lists:
+        _add_child_rows(child_rows, lists, input_json_object[ID_KEY], cache)
 
-    flatten(input_json_object)
-    return out
\ No newline at end of file
+    return projected_out, out
@@ -0,0 +1,134 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_bytes() -> int | None:
+    """
+    Peak resident memory of the process, None where the platform does not report it
+    """
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class PhaseMetrics:
+    """
+    Time spent in a phase over all its calls, self times exclude the nested phases
+    """
+
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    self_wall_seconds: float = 0.0
+    self_cpu_seconds: float = 0.0
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.self_wall_seconds = 0.0
+        self.self_cpu_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "self_wall_seconds": round(self.self_wall_seconds, 6),
+            "self_cpu_seconds": round(self.self_cpu_seconds, 6),
+        }
+
+
+class ExtractionMetrics:
+    """
+    Wall and CPU time of the phases of an extraction and counters like pages fetched or
+    payload bytes, gathered from any thread. The CPU time of a phase is the time of its thread.
+
+    Phases are timed per call, not per resource, so the instrumentation stays negligible
+    """
+
+    phases: Dict[str, PhaseMetrics] = {}
+    counters: Dict[str, int] = {}
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.phases = {}
+            self.counters = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time the block as the phase, time of phases nested in the block is excluded from its self time
+        """
+        stack: List[List[float]] = self._local.__dict__.setdefault("stack", [])
+        # wall and CPU times of the nested phases
+        frame = [0.0, 0.0]
+        stack.append(frame)
+
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            stack.pop()
+
+            if stack:
+                stack[-1][0] += wall
+                stack[-1][1] += cpu
+
+            with self._lock:
+                phase = self.phases.get(name)
+                if phase is None:
+                    phase = self.phases[name] = PhaseMetrics()
+
+                phase.calls += 1
+                phase.wall_seconds += wall
+                phase.cpu_seconds += cpu
+                phase.self_wall_seconds += wall - frame[0]
+                phase.self_cpu_seconds += cpu - frame[1]
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self, tables: Dict[str, Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Machine-readable report of the phases, the counters, the tables and the peak memory
+
+        Parameters
+        ----------
+        tables : Dict[str, Dict[str, int]]
+            Rows and columns counts by table
+        """
+        with self._lock:
+            return {
+                "phases": {name: phase.to_dict() for name, phase in self.phases.items()},
+                "counters": dict(self.counters),
+                "tables": tables or {},
+                "peak_memory_bytes": peak_memory_bytes(),
+            }
+
+
+metrics = ExtractionMetrics()
+"""
+Metrics of the running extraction
+"""
@@ -1,2 +1,5 @@
+from .checkpoint import Checkpoint
 from .repository import Repository
-from .memory import MemoryRepository
\ No newline at end of file
+from .memory import MemoryRepository
+from .compact import CompactMemoryRepository
+from .streaming import StreamingRepository
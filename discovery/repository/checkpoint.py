@@ -0,0 +1,34 @@
+class Checkpoint:
+    """
+    Progress of the extraction of a partition of the resources, the rows of its pages read
+    so far are persisted along with the checkpoint so the extraction resumes from skip_token
+    """
+
+    partition: str = None
+    skip_token: str | None = None
+    rows_count: int = 0
+    done: bool = False
+
+    def __init__(
+        self,
+        partition: str,
+        skip_token: str | None = None,
+        rows_count: int = 0,
+        done: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        partition : str
+            The query and the subscriptions it is scoped to
+        skip_token : str | None
+            The skip token of the next page, None when done or not started
+        rows_count : int
+            The count of resources of the partition persisted
+        done : bool
+            All pages of the partition are persisted
+        """
+        self.partition = partition
+        self.skip_token = skip_token
+        self.rows_count = rows_count
+        self.done = done
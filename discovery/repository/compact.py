@@ -0,0 +1,162 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+from .repository import Repository
+from .targets.target import Target
+from .config import SYSTEM_UNIQUE_ID_KEY
+from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class CompactTable:
+    """
+    Resources of one type stored as tuples of values sharing the tuple of their keys
+
+    Resources of a type mostly have the same keys, each distinct tuple of keys is a shape
+    stored once with its keys interned, and a resource is only the tuple of its values
+    and the index of its shape. Resources are indexed by their unique identifier.
+    """
+
+    shapes: List[Tuple[str, ...]] = []
+    shapes_indexes: Dict[Tuple[str, ...], int] = {}
+    rows: List[tuple] = []
+    rows_shapes: array = None
+    ids: Dict[Any, int] = {}
+
+    def __init__(self) -> None:
+        self.shapes = []
+        self.shapes_indexes = {}
+        self.rows = []
+        self.rows_shapes = array("I")
+        self.ids = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _shape_index(self, keys: Tuple[str, ...]) -> int:
+        shape_index = self.shapes_indexes.get(keys)
+        if shape_index is None:
+            shape = tuple(sys.intern(key) for key in keys)
+            shape_index = self.shapes_indexes[shape] = len(self.shapes)
+            self.shapes.append(shape)
+
+        return shape_index
+
+    def add(self, resource: Dict) -> bool:
+        """
+        Add the resource, a resource with the same identifier is replaced
+
+        Returns
+        -------
+        bool
+            False if the resource replaced a resource with the same identifier
+        """
+        shape_index = self._shape_index(tuple(resource))
+        values = tuple(resource.values())
+        unique_id = resource[SYSTEM_UNIQUE_ID_KEY]
+
+        position = self.ids.get(unique_id)
+        if position is not None:
+            self.rows[position] = values
+            self.rows_shapes[position] = shape_index
+            return False
+
+        self.ids[unique_id] = len(self.rows)
+        self.rows.append(values)
+        self.rows_shapes.append(shape_index)
+        return True
+
+    def get(self, position: int) -> Dict:
+        return dict(zip(self.shapes[self.rows_shapes[position]], self.rows[position]))
+
+    def batches(self, batch_size: int) -> Iterator[List[Dict]]:
+        """
+        Resources rebuilt as dictionaries batch by batch
+        """
+        for start in range(0, len(self.rows), batch_size):
+            yield [self.get(position) for position in range(start, min(start + batch_size, len(self.rows)))]
+
+
+class CompactMemoryRepository(Repository):
+    """
+    Keep all resources in memory in CompactTable, a fraction of the memory of dictionaries
+
+    Resources with the same unique identifier are de-duplicated, the last one added is kept,
+    so a resource returned twice by Resource Graph pages does not violate the primary key of
+    its table. Resources are rebuilt as dictionaries only when read or saved, by batches.
+    """
+
+    batch_size: int = 1000
+    tables: Dict[str, CompactTable] = {}
+    duplicates_count: int = 0
+
+    def __init__(self, batch_size: int = 1000) -> None:
+        """
+        Parameters
+        ----------
+        batch_size : int
+            The count of resources of one type rebuilt and written to the target at once
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than 0")
+
+        self.batch_size = batch_size
+        self.tables = {}
+        self.duplicates_count = 0
+
+    def add(self, type: str, resource: dict, unique_id_key = SYSTEM_UNIQUE_ID_KEY) -> None:
+        """
+        Add a resource to the repository, replacing the resource of the type with the same identifier
+
+        Parameters
+        ----------
+        type : str
+            The type of the resource lowercased with underscores
+        resource : dict
+            The resource to add to the repository flattened to a dictionary
+        unique_id_key : str
+            The key of the unique identifier in the resource, default is "id" <- .config.SYSTEM_UNIQUE_ID_KEY
+        """
+        table = self.tables.get(type)
+        if table is None:
+            table = self.tables[type] = CompactTable()
+
+        resource[SYSTEM_UNIQUE_ID_KEY] = resource[unique_id_key]
+
+        if not table.add(resource):
+            logger.debug(f"Replace duplicate resource {resource[SYSTEM_UNIQUE_ID_KEY]} of {type}")
+            self.duplicates_count += 1
+
+    def get_all(self) -> Dict[str, List[Dict]]:
+        """
+        All resources rebuilt as dictionaries, prefer save_to which rebuilds them by batches
+        """
+        return {type: self.get_all_by_type(type) for type in self.tables}
+
+    def get_all_by_type(self, type: str) -> List[Dict]:
+        table = self.tables.get(type)
+        if table is None:
+            return []
+
+        return [table.get(position) for position in range(len(table))]
+
+    def get_count_by_type(self, type: str) -> int:
+        table = self.tables.get(type)
+
+        return 0 if table is None else len(table)
+
+    def save_to(self, target: Target) -> None:
+        """
+        Write the resources to the target batch by batch and finalize it
+        """
+        if self.duplicates_count:
+            logger.info(f"{self.duplicates_count} duplicate resources were replaced")
+
+        for type, table in self.tables.items():
+            for batch in table.batches(self.batch_size):
+                target.write(type, batch)
+
+        with metrics.phase("finalize"):
+            target.finalize()
@@ -12,6 +12,7 @@ class MemoryRepository(Repository):
     resources: Dict[str, List[Dict]] = {}
 
     def __init__(self) -> None:
+        self.resources_count = {}
         self.resources = {}
 
     def add(self, type: str, resource: dict, unique_id_key = SYSTEM_UNIQUE_ID_KEY) -> None:
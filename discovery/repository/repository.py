@@ -1,4 +1,6 @@
 from typing import List, Any, Dict
+from .checkpoint import Checkpoint
+from .targets.schema import TableSchema
 from .targets.target import Target
 
 
@@ -6,6 +8,14 @@ class Repository:
     def add(self, type: str, resource: dict) -> None:
         raise NotImplementedError("add() Method not implemented")
 
+    def add_batch(self, type: str, resources: List[Dict], inferred: TableSchema = None) -> None:
+        """
+        Add resources of a type along with the schema already inferred over them,
+        repositories which do not forward schemas to their target ignore it
+        """
+        for resource in resources:
+            self.add(type, resource)
+
     def get_all(self) -> Dict[str, List[Dict]]:
         raise NotImplementedError("get_all() Method not implemented")
 
@@ -14,3 +24,15 @@ class Repository:
 
     def save_to(self, target: Target) -> None:
         raise NotImplementedError("save_to() Method not implemented")
+
+    def checkpoint(self, checkpoint: Checkpoint) -> None:
+        """
+        Persist the resources added so far with the progress of their partition,
+        repositories which cannot resume an extraction ignore it
+        """
+
+    def get_checkpoints(self) -> Dict[str, Checkpoint]:
+        """
+        Checkpoints of the extraction being resumed by partition
+        """
+        return {}
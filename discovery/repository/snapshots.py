@@ -0,0 +1,226 @@
+import bisect
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+from urllib.parse import quote
+from discovery.helpers.logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE_NAME = "snapshots.json"
+MANIFEST_LOCK_FILE_NAME = f".{MANIFEST_FILE_NAME}.lock"
+
+SNAPSHOT_COMPLETE = "complete"
+SNAPSHOT_PARTIAL = "partial"
+
+
+def parse_time(value: str | datetime) -> datetime:
+    """
+    Timezone aware datetime from an ISO 8601 string, local time is assumed without timezone
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+
+    return value.astimezone() if value.tzinfo is None else value
+
+
+class SnapshotsManifest:
+    """
+    Index of the snapshots of a target folder, ordered by creation time
+
+    Each entry holds the snapshot file name relative to the folder, its creation time,
+    its status, partial while the extraction runs or if it failed, complete once the
+    snapshot is finalized, the rows count of each table, and whether a partial snapshot
+    was written by a resumable extraction. The manifest is replaced
+    atomically, readers never see a partially written file. Writers, like extractions
+    run concurrently to the same folder, update it one at a time under an exclusive lock
+    of a lock file next to it, so no writer overwrites the entry recorded by another.
+    """
+
+    path: Path = None
+
+    def __init__(self, target_path: str | Path) -> None:
+        self.path = Path(target_path) / MANIFEST_FILE_NAME
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def read(self) -> List[Dict]:
+        """
+        Entries of the manifest, empty if there is no manifest
+        """
+        if not self.exists():
+            return []
+
+        with open(self.path) as file:
+            return json.load(file)["snapshots"]
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Hold the exclusive lock of the manifest, only where fcntl is available
+        """
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.path.parent / MANIFEST_LOCK_FILE_NAME, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, entries: List[Dict]) -> None:
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{MANIFEST_FILE_NAME}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump({"snapshots": entries}, file, indent=1)
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def record(
+        self,
+        snapshot_path: str | Path,
+        status: str,
+        created_at: datetime,
+        tables_rows_counts: Dict[str, int] = None,
+        resumable: bool = False,
+    ) -> None:
+        """
+        Add the snapshot to the manifest or update its entry
+
+        Parameters
+        ----------
+        snapshot_path : str | Path
+            The snapshot, in the folder of the manifest
+        status : str
+            SNAPSHOT_PARTIAL or SNAPSHOT_COMPLETE
+        created_at : datetime
+            The time of the extraction
+        tables_rows_counts : Dict[str, int]
+            The count of rows by table
+        resumable : bool
+            The snapshot is written by a resumable extraction, which can continue from its
+            last checkpoint if it is interrupted
+        """
+        file_name = Path(snapshot_path).name
+        entry = {
+            "file_name": file_name,
+            "created_at": parse_time(created_at).isoformat(),
+            "status": status,
+            "tables_rows_counts": tables_rows_counts or {},
+            "resumable": resumable,
+        }
+
+        with self._locked():
+            entries = [e for e in self.read() if e["file_name"] != file_name]
+            entries.append(entry)
+            entries.sort(key=lambda e: parse_time(e["created_at"]))
+
+            self._write(entries)
+
+    def resolve(
+        self,
+        as_of: str | datetime = None,
+        status: str = SNAPSHOT_COMPLETE,
+        suffix: str = None,
+    ) -> Path | None:
+        """
+        The latest snapshot with the status created at or before as_of, None if there is none
+
+        Parameters
+        ----------
+        as_of : str | datetime
+            ISO 8601 time, the latest snapshot overall if None
+        status : str
+            Only snapshots with this status are returned, any status if None
+        suffix : str
+            Only snapshots with this file extension are returned, like .db or .duckdb
+        """
+        entries = self.read()
+        created_at = [parse_time(e["created_at"]) for e in entries]
+        end = len(entries) if as_of is None else bisect.bisect_right(created_at, parse_time(as_of))
+
+        for entry in reversed(entries[:end]):
+            if (status is None or entry["status"] == status) and (
+                suffix is None or entry["file_name"].endswith(suffix)
+            ):
+                return self.path.parent / entry["file_name"]
+
+        return None
+
+
+    def resolve_resumable(self, suffix: str = ".db") -> Dict | None:
+        """
+        Entry of the latest snapshot with the suffix if it is a partial snapshot of a resumable
+        extraction, None otherwise: a snapshot of an extraction which could not be resumed,
+        or older than a complete snapshot, is never resumed
+
+        Parameters
+        ----------
+        suffix : str
+            Only snapshots with this file extension are considered, like .db
+        """
+        entries = [e for e in self.read() if e["file_name"].endswith(suffix)]
+
+        if not entries or entries[-1]["status"] != SNAPSHOT_PARTIAL:
+            return None
+
+        return entries[-1] if entries[-1].get("resumable", False) else None
+
+
+def get_latest_snapshot_path(
+    target_path: str | Path, as_of: str | datetime = None, suffix: str = ".db"
+) -> Path | None:
+    """
+    The latest complete snapshot of the folder with the suffix, created at or before
+    as_of if given, None if there is none
+
+    The snapshots manifest is read, folders written before the manifest existed are scanned
+    for the most recently modified snapshot.
+    """
+    manifest = SnapshotsManifest(target_path)
+    if manifest.exists():
+        return manifest.resolve(as_of, suffix=suffix)
+
+    logger.info(f"No snapshots manifest in {target_path}, scan the folder")
+
+    snapshots_mtimes = {
+        path: os.path.getmtime(path)
+        for path in Path(target_path).glob(f"*{suffix}")
+    }
+
+    if as_of is not None:
+        as_of_timestamp = parse_time(as_of).timestamp()
+        snapshots_mtimes = {
+            path: mtime for path, mtime in snapshots_mtimes.items() if mtime <= as_of_timestamp
+        }
+
+    if not snapshots_mtimes:
+        return None
+
+    return max(snapshots_mtimes, key=snapshots_mtimes.get)
+
+
+def get_read_only_uri(snapshot_path: str | Path) -> str:
+    """
+    SQLite URI opening the snapshot read-only without locking, snapshots are never modified once written
+    """
+    return f"file:{quote(str(Path(snapshot_path).resolve()))}?mode=ro&immutable=1"
@@ -0,0 +1,160 @@
+from typing import List, Dict
+from .checkpoint import Checkpoint
+from .repository import Repository
+from .targets.schema import TableSchema
+from .targets.target import Target
+from .config import SYSTEM_UNIQUE_ID_KEY
+from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class StreamingRepository(Repository):
+    """
+    Forward resources to a target in bounded batches instead of keeping them all in memory
+    """
+
+    target: Target = None
+    batch_size: int = 1000
+    resources_count: Dict[str, int] = {}
+    resources: Dict[str, List[Dict]] = {}
+    schemas: Dict[str, TableSchema | None] = {}
+
+    def __init__(self, target: Target, batch_size: int = 1000) -> None:
+        """
+        Parameters
+        ----------
+        target : Target
+            The target receiving the batches of resources
+        batch_size : int
+            The maximum count of resources of one type kept in memory before being written to the target
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than 0")
+
+        self.target = target
+        self.batch_size = batch_size
+        self.resources_count = {}
+        self.resources = {}
+        self.schemas = {}
+
+    def add(self, type: str, resource: dict, unique_id_key = SYSTEM_UNIQUE_ID_KEY) -> None:
+        """
+        Add a resource to the repository, the pending batch of the type is written to
+        the target once it reaches batch_size
+
+        Parameters
+        ----------
+        type : str
+            The type of the resource lowercased with underscores
+        resource : dict
+            The resource to add to the repository flattened to a dictionary
+        unique_id_key : str
+            The key of the unique identifier in the resource, default is "id" <- .config.SYSTEM_UNIQUE_ID_KEY
+        """
+
+        if type not in self.resources:
+            self.resources[type] = []
+            self.resources_count[type] = 0
+
+        resource[SYSTEM_UNIQUE_ID_KEY] = resource[unique_id_key]
+        self.resources[type].append(resource)
+        self.resources_count[type] += 1
+        # the pending batch is no longer entirely inferred
+        self.schemas[type] = None
+
+        if len(self.resources[type]) >= self.batch_size:
+            self._flush_type(type)
+
+    def add_batch(self, type: str, resources: List[Dict], inferred: TableSchema = None) -> None:
+        """
+        Add resources of a type with the schema inferred over them, the schemas of the pending
+        batch are merged and forwarded to the target so it does not infer it again. The pending
+        batch is written once it reaches batch_size, it may hold more than batch_size resources
+
+        Parameters
+        ----------
+        type : str
+            The type of the resources lowercased with underscores
+        resources : List[Dict]
+            The resources flattened to dictionaries with their "id" key
+        inferred : TableSchema
+            The schema inferred over the resources without spilled columns, owned by the repository,
+            the target infers the schema if None
+        """
+        if not resources:
+            return
+
+        pending = self.resources.setdefault(type, [])
+
+        if inferred is None:
+            self.schemas[type] = None
+        elif not pending:
+            self.schemas[type] = inferred
+        elif self.schemas.get(type) is not None:
+            self.schemas[type].merge(inferred)
+
+        pending.extend(resources)
+        self.resources_count[type] = self.resources_count.get(type, 0) + len(resources)
+
+        if len(pending) >= self.batch_size:
+            self._flush_type(type)
+
+    def _flush_type(self, type: str) -> None:
+        pending = self.resources[type]
+        if not pending:
+            return
+
+        logger.debug(f"Write {len(pending)} resources of {type} to target")
+
+        self.target.write(type, pending, self.schemas.pop(type, None))
+        self.resources[type] = []
+
+    def flush(self) -> None:
+        """
+        Write all pending resources to the target
+        """
+        for type in self.resources:
+            self._flush_type(type)
+
+    def checkpoint(self, checkpoint: Checkpoint) -> None:
+        """
+        Write all pending resources and save the checkpoint with them when the target is resumable
+        """
+        if not self.target.resumable:
+            return
+
+        self.flush()
+        self.target.checkpoint(checkpoint)
+
+    def get_checkpoints(self) -> Dict[str, Checkpoint]:
+        return self.target.get_checkpoints()
+
+    def get_all(self) -> Dict[str, List[Dict]]:
+        """
+        Resources not yet written to the target
+        """
+        return self.resources
+
+    def get_all_by_type(self, type: str) -> List[Dict]:
+        """
+        Resources of the type not yet written to the target
+        """
+        return self.resources.get(type, [])
+
+    def get_count_by_type(self, type: str) -> int:
+        return self.resources_count.get(type, 0)
+
+    def save_to(self, target: Target) -> None:
+        """
+        Write pending resources and finalize the target, resources were already streamed
+        so only the target given to the constructor is accepted
+        """
+        if target is not self.target:
+            raise ValueError("StreamingRepository can only be saved to its own target")
+
+        self.flush()
+
+        with metrics.phase("finalize"):
+            target.finalize()
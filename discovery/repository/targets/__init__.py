@@ -1,2 +1,15 @@
 from .target import Target
-from .sqlite import SQLiteTarget
\ No newline at end of file
+from .database import DatabaseTarget
+from .sqlite import SQLiteTarget
+from .incremental import IncrementalSQLiteTarget
+from .json_columns import JSONSQLiteTarget
+
+
+def __getattr__(name: str):
+    # duckdb is imported only when its target is used
+    if name == "DuckDBTarget":
+        from .duckdb import DuckDBTarget
+
+        return DuckDBTarget
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
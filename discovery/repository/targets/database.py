@@ -0,0 +1,392 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from .target import Target
+from .schema import MAX_COLUMNS, Column, SchemaInference, TableSchema
+from ..config import SYSTEM_UNIQUE_ID_KEY
+from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
+
+logger = get_logger(__name__)
+
+SPILLED_COLUMN_NAME = "_spilled"
+"""
+JSON column of tables too wide for the database, holding values of spilled columns by column name
+"""
+
+SPILLED_COLUMNS_TABLE_NAME = "_spilled_columns"
+
+CATALOG_TABLES_TABLE_NAME = "_catalog_tables"
+CATALOG_COLUMNS_TABLE_NAME = "_catalog_columns"
+
+TAGS_TABLE_NAME = "az_resource_tags"
+TAGS_SOURCE_TABLE_NAME = "az_resources"
+TAGS_KEY_PREFIX = "tags_"
+"""
+Tags of the resources of TAGS_SOURCE_TABLE_NAME, flattened to tags_<name> keys,
+are also written as (id, key, value) rows to TAGS_TABLE_NAME
+"""
+
+
+class DatabaseTarget(Target):
+    """
+    Target writing tables to a database, the base of SQLiteTarget and DuckDBTarget
+
+    Holds the connection and the schema inferred over the batches written to each table with
+    its statistics, and builds the statements shared by both databases: tables evolving with
+    the batches, spilled columns, the tags table and the catalog. Each database defines
+    how its columns are declared and may override how rows are loaded.
+    """
+
+    path: Path = None
+    conn: Any = None
+    cursor: Any = None
+    schema: SchemaInference = None
+
+    def __init__(self, path: Path, conn: Any, cursor: Any, max_columns: int = MAX_COLUMNS) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            The path of the database
+        conn : Any
+            The connection to the database
+        cursor : Any
+            The cursor executing the statements of the target
+        max_columns : int
+            Maximum count of real columns of a table, other columns are stored in the JSON
+            column _spilled and listed in the _spilled_columns table
+        """
+        self.path = path
+        self.conn = conn
+        self.cursor = cursor
+        self.schema = SchemaInference(max_columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.conn.close()
+
+    def _create_table(self, table_name: str, columns: List[str]) -> None:
+        logger.info("Create table")
+
+        logger.debug(f"Table name: {table_name}")
+
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name} (\n{',\n'.join(columns)}\n)"
+        )
+
+    def _add_columns(self, table_name: str, columns: List[str]) -> None:
+        logger.info("Add columns to table")
+
+        logger.debug(f"Table name: {table_name}, new columns: {len(columns)}")
+
+        for column in columns:
+            self.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column}")
+
+    def _evolve_table(
+        self,
+        table_name: str,
+        is_new_table: bool,
+        new_columns: List[Column],
+        add_spilled_column: bool,
+    ) -> None:
+        """
+        Create the table on the first batch, then add columns discovered in later batches
+        """
+        new_columns = [column for column in new_columns if not column.spilled]
+        definitions = [self._column_definition(column, is_new_table) for column in new_columns]
+
+        if add_spilled_column:
+            definitions.append(f"{SPILLED_COLUMN_NAME} TEXT")
+
+        if is_new_table:
+            self._create_table(table_name, definitions)
+        elif definitions:
+            self._add_columns(table_name, definitions)
+
+    def _column_definition(self, column: Column, is_new_table: bool) -> str:
+        """
+        Definition of a column created with its table or added to an existing table
+        """
+        return column.definition(True)
+
+    def _spilled_expression(self, column: Column) -> str:
+        """
+        Expression selecting a spilled column from the JSON column
+        """
+        return f"json_extract({SPILLED_COLUMN_NAME}, '$.{column.name}')"
+
+    def _rows(
+        self,
+        resources: List[Dict],
+        real_columns: List[Column],
+        spilled_columns: List[Column],
+    ) -> Iterator[tuple]:
+        """
+        Values of the resources in the order of the columns, values of spilled columns
+        are serialized in a single JSON object
+        """
+        if all(len(column.keys) == 1 for column in real_columns):
+            keys = [column.keys[0] for column in real_columns]
+            get_values = lambda resource: tuple(map(resource.get, keys))
+        else:
+            get_values = lambda resource: tuple(
+                column.value(resource) for column in real_columns
+            )
+
+        if not spilled_columns:
+            return (get_values(resource) for resource in resources)
+
+        return (
+            get_values(resource) + (self._spilled_value(resource, spilled_columns),)
+            for resource in resources
+        )
+
+    def _spilled_value(self, resource: Dict, spilled_columns: List[Column]) -> str | None:
+        spilled = {}
+
+        for column in spilled_columns:
+            value = column.value(resource)
+            if value is not None:
+                spilled[column.name] = value
+
+        return json.dumps(spilled, default=str) if spilled else None
+
+    def _save_spilled_columns(self) -> None:
+        """
+        List spilled columns of all tables in the _spilled_columns table
+        """
+        spilled_columns = [
+            (table.table_name, column.name, column.type or "TEXT")
+            for table in self.schema.tables.values()
+            for column in table.columns.values()
+            if column.spilled
+        ]
+
+        if not spilled_columns:
+            return
+
+        self._create_table(
+            SPILLED_COLUMNS_TABLE_NAME,
+            ["table_name TEXT", "column_name TEXT", "type TEXT"],
+        )
+        self.cursor.execute(f"DELETE FROM {SPILLED_COLUMNS_TABLE_NAME}")
+        self.cursor.executemany(
+            f"INSERT INTO {SPILLED_COLUMNS_TABLE_NAME} VALUES (?, ?, ?)",
+            spilled_columns,
+        )
+
+    def _update_schema(
+        self, table_name: str, resources: List[Dict], inferred: TableSchema = None
+    ) -> List[Column]:
+        """
+        Infer the schema over the batch, or merge the schema inferred over it, and evolve the table accordingly
+
+        Returns
+        -------
+        List[Column]
+            The columns used by the batch
+        """
+        is_new_table = table_name not in self.schema.tables
+        table = self.schema.table(table_name)
+        was_spilled = table.spilled
+
+        columns, new_columns = (
+            table.update(resources) if inferred is None else table.merge(inferred)
+        )
+        self._evolve_table(
+            table_name, is_new_table, new_columns, table.spilled and not was_spilled
+        )
+
+        if table_name == TAGS_SOURCE_TABLE_NAME:
+            self._update_tags_schema(resources, columns)
+
+        return columns
+
+    def _tags(self, resources: List[Dict], columns: List[Column]) -> List[Dict]:
+        tags_keys = [
+            (key, key[len(TAGS_KEY_PREFIX) :])
+            for column in columns
+            for key in column.keys
+            if key.startswith(TAGS_KEY_PREFIX)
+        ]
+
+        return [
+            {"id": resource[SYSTEM_UNIQUE_ID_KEY], "key": tag_key, "value": value}
+            for resource in resources
+            for key, tag_key in tags_keys
+            if (value := resource.get(key)) is not None
+        ]
+
+    def _tags_columns(self) -> List[str]:
+        """
+        Column definitions of the tags table
+        """
+        return ["id TEXT NOT NULL", "key TEXT NOT NULL", "value TEXT", "PRIMARY KEY (id, key)"]
+
+    def _update_tags_schema(self, resources: List[Dict], columns: List[Column]) -> None:
+        """
+        Gather the statistics of the tags table for the catalog, the table is created
+        with the tags of the first batch
+        """
+        tags = self._tags(resources, columns)
+        if not tags:
+            return
+
+        if TAGS_TABLE_NAME not in self.schema.tables:
+            self._create_table(TAGS_TABLE_NAME, self._tags_columns())
+
+        self.schema.table(TAGS_TABLE_NAME).update(tags)
+
+    def _insert_tags(self, resources: List[Dict], columns: List[Column]) -> None:
+        tags = self._tags(resources, columns)
+        if not tags:
+            return
+
+        self._load(
+            TAGS_TABLE_NAME,
+            ["id", "key", "value"],
+            ((tag["id"], tag["key"], tag["value"]) for tag in tags),
+        )
+
+    def _load(self, table_name: str, column_names: List[str], rows: Iterator[tuple]) -> None:
+        """
+        Insert rows holding the values of the columns in order
+        """
+        placeholders = ", ".join("?" * len(column_names))
+
+        self.cursor.executemany(
+            f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders})",
+            rows,
+        )
+
+    def _insert(
+        self, table_name: str, resources: List[Dict], columns: List[Column]
+    ) -> None:
+        if not resources:
+            return
+
+        real_columns = [column for column in columns if not column.spilled]
+        spilled_columns = [column for column in columns if column.spilled]
+
+        column_names = [column.name for column in real_columns]
+        if spilled_columns:
+            column_names.append(SPILLED_COLUMN_NAME)
+
+        self._load(
+            table_name, column_names, self._rows(resources, real_columns, spilled_columns)
+        )
+
+        if table_name == TAGS_SOURCE_TABLE_NAME:
+            self._insert_tags(resources, columns)
+
+        logger.debug(f"Inserted {len(resources)} resources into {table_name}")
+
+    def write(self, table_name: str, resources: List[Dict], inferred: TableSchema = None) -> None:
+        """
+        Append a batch of resources to a table, creating or altering the table as needed
+
+        Parameters
+        ----------
+        table_name : str
+            The type of the resource which is transformed to a table name
+        resources : List[Dict]
+            The batch of resources represented as flattened dictionaries where keys are columns
+        inferred : TableSchema
+            The schema already inferred over the batch, merged instead of inferring it again
+        """
+        if not resources:
+            return
+
+        with metrics.phase("schema_inference"):
+            columns = self._update_schema(table_name, resources, inferred)
+
+        with metrics.phase("insert"):
+            self._insert(table_name, resources, columns)
+
+    def _save_catalog(self) -> None:
+        """
+        Describe tables and columns in the _catalog_tables and _catalog_columns tables
+        from statistics gathered while loading
+        """
+        logger.info("Save catalog")
+
+        self._create_table(
+            CATALOG_TABLES_TABLE_NAME,
+            ["table_name TEXT NOT NULL PRIMARY KEY", "rows_count INTEGER", "columns_count INTEGER"],
+        )
+        self._create_table(
+            CATALOG_COLUMNS_TABLE_NAME,
+            [
+                "table_name TEXT NOT NULL",
+                "ordinal INTEGER NOT NULL",
+                "column_name TEXT",
+                "expression TEXT",
+                "type TEXT",
+                "null_ratio REAL",
+                "distinct_count INTEGER",
+                "examples TEXT",
+                "PRIMARY KEY (table_name, ordinal)",
+            ],
+        )
+        self.cursor.execute(f"DELETE FROM {CATALOG_TABLES_TABLE_NAME}")
+        self.cursor.execute(f"DELETE FROM {CATALOG_COLUMNS_TABLE_NAME}")
+
+        for table in self.schema.tables.values():
+            self.cursor.execute(
+                f"INSERT INTO {CATALOG_TABLES_TABLE_NAME} VALUES (?, ?, ?)",
+                (table.table_name, table.rows_count, len(table.columns)),
+            )
+            self.cursor.executemany(
+                f"INSERT INTO {CATALOG_COLUMNS_TABLE_NAME} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        table.table_name,
+                        ordinal,
+                        column.name,
+                        self._spilled_expression(column)
+                        if column.spilled
+                        else column.name,
+                        column.type or "TEXT",
+                        1 - column.values_count / table.rows_count if table.rows_count else 1,
+                        column.distinct_count,
+                        json.dumps(
+                            [int(v) if type(v) is bool else v for v in column.examples],
+                            default=str,
+                        ),
+                    )
+                    for ordinal, column in enumerate(table.columns.values())
+                ),
+            )
+
+    def finalize(self) -> None:
+        """
+        List spilled columns, save the catalog and commit pending changes of the snapshot
+        """
+        with metrics.phase("save_catalog"):
+            self._save_spilled_columns()
+            self._save_catalog()
+
+        self.conn.commit()
+
+    def save(self, data: Dict[str, List[Dict]]) -> None:
+        """
+        Save the data to the database
+
+        Parameters
+        ----------
+        data : Dict[str, List[Dict]]
+            The data to save to the database
+            key is the type of the resource which is transformed to a table name
+            value is a list of resources which are transformed to rows
+            resource is represented as a flattened dictionary where keys are columns
+        """
+        logger.info(f"Saving data to {self.path}")
+
+        for table_name, resources in data.items():
+            self.write(table_name, resources)
+
+        with metrics.phase("finalize"):
+            self.finalize()
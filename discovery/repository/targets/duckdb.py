@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List
+import duckdb
+from .schema import MAX_COLUMNS, SQLITE_TYPES_RANKS, Column, TableSchema
+from .database import SPILLED_COLUMN_NAME, DatabaseTarget
+from discovery.helpers.logging import get_logger
+
+logger = get_logger(__name__)
+
+DUCKDB_TYPES_BY_SQLITE_TYPE = {
+    None: "VARCHAR",
+    "INTEGER": "BIGINT",
+    "REAL": "DOUBLE",
+    "TEXT": "VARCHAR",
+}
+
+
+class DuckDBTarget(DatabaseTarget):
+    """
+    Save the data snapshot to a DuckDB database, a columnar store for analytical queries
+
+    Tables, spilled columns, the catalog and the tags table are the same as with SQLiteTarget.
+    Batches are staged as newline-delimited JSON and loaded with read_json, which is
+    much faster than inserting rows one by one. Columns are widened with ALTER TABLE
+    when a later batch holds values of a higher ranked type, as DuckDB columns are
+    strictly typed. No secondary index is created, scans use row groups min-max indexes.
+    Snapshots are written at once, without checkpoints nor full-text index.
+    """
+
+    declared_types: Dict[tuple, str] = {}
+
+    def __init__(self, path: Path, max_columns: int = MAX_COLUMNS) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            The path of the DuckDB database to create
+        max_columns : int
+            Maximum count of real columns of a table, other columns are stored in the JSON
+            column _spilled and listed in the _spilled_columns table
+        """
+        if path.exists():
+            logger.debug(f"DuckDB database {path} exists")
+            raise ValueError(
+                f"DuckDB database {path} exists, use a different path to avoid side effects"
+            )
+
+        conn = duckdb.connect(str(path))
+        super().__init__(path, conn, conn, max_columns)
+        self.declared_types = {}
+
+    def _column_definition(self, column: Column, is_new_table: bool) -> str:
+        """
+        Column definition without primary key, DuckDB would maintain an index while loading
+        """
+        definition = f"{column.name} {DUCKDB_TYPES_BY_SQLITE_TYPE[column.type]}"
+
+        return definition + " NOT NULL" if column.primary_key else definition
+
+    def _tags_columns(self) -> List[str]:
+        """
+        Tags table without primary key, DuckDB would maintain an index while loading
+        """
+        return ["id VARCHAR NOT NULL", "key VARCHAR NOT NULL", "value VARCHAR"]
+
+    def _spilled_expression(self, column: Column) -> str:
+        return f"json_extract_string({SPILLED_COLUMN_NAME}, '$.{column.name}')"
+
+    def _update_schema(
+        self, table_name: str, resources: List[Dict], inferred: TableSchema = None
+    ) -> List[Column]:
+        columns = super()._update_schema(table_name, resources, inferred)
+
+        for column in columns:
+            if column.spilled:
+                continue
+
+            key = (table_name, column.name)
+            declared_type = self.declared_types.get(key)
+
+            if declared_type is None:
+                self.declared_types[key] = column.type or "TEXT"
+            elif SQLITE_TYPES_RANKS[column.type] > SQLITE_TYPES_RANKS[declared_type]:
+                logger.debug(f"Widen column {column.name} of {table_name} to {column.type}")
+
+                self.cursor.execute(
+                    f"ALTER TABLE {table_name} ALTER COLUMN {column.name} "
+                    f"TYPE {DUCKDB_TYPES_BY_SQLITE_TYPE[column.type]}"
+                )
+                self.declared_types[key] = column.type
+
+        return columns
+
+    def _load(self, table_name: str, column_names: List[str], rows: Iterator[tuple]) -> None:
+        """
+        Stage the rows as newline-delimited JSON and load them with read_json
+        """
+        table_types = {
+            name: type
+            for name, type in self.cursor.execute(
+                "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?",
+                [table_name],
+            ).fetchall()
+        }
+        columns = ", ".join(f"'{name}': '{table_types[name]}'" for name in column_names)
+
+        fd, staging_path = tempfile.mkstemp(suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as file:
+                for row in rows:
+                    file.write(json.dumps(dict(zip(column_names, row)), default=str))
+                    file.write("\n")
+
+            self.cursor.execute(
+                f"INSERT INTO {table_name} BY NAME SELECT * FROM read_json(?, "
+                f"format = 'newline_delimited', columns = {{{columns}}})",
+                [staging_path],
+            )
+        finally:
+            os.unlink(staging_path)
+
+    def finalize(self) -> None:
+        """
+        List spilled columns, save the catalog and checkpoint the database file
+        """
+        super().finalize()
+        self.cursor.execute("CHECKPOINT")
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Set
+from .schema import TableSchema
+from .database import TAGS_SOURCE_TABLE_NAME, TAGS_TABLE_NAME
+from .sqlite import SQLiteTarget
+from ..config import SYSTEM_UNIQUE_ID_KEY
+from ..snapshots import get_read_only_uri
+from discovery.helpers.logging import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_TABLE_NAME = "_snapshot"
+CHANGES_TABLE_NAME = "_changes"
+HASHES_TABLE_NAME = "_resources_hashes"
+
+FULL_SNAPSHOT = "full"
+INCREMENTAL_SNAPSHOT = "incremental"
+
+REBASE_RATIO = 0.5
+"""
+Default ratio of changed resources of the latest incremental snapshot over its base
+above which the next snapshot is a full one
+"""
+
+
+def hash_resource(resource: Dict) -> str:
+    """
+    Hash of the content of a flattened resource, independent of the order of its keys
+    """
+    content = json.dumps(resource, sort_keys=True, default=str)
+
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def read_snapshot_info(conn: sqlite3.Connection, schema: str = "main") -> Dict[str, str]:
+    """
+    Key values of the _snapshot table, empty for snapshots written without IncrementalSQLiteTarget
+    """
+    table = conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type='table' AND name = ?",
+        (SNAPSHOT_TABLE_NAME,),
+    ).fetchone()
+
+    if not table:
+        return {}
+
+    return dict(conn.execute(f"SELECT key, value FROM {schema}.{SNAPSHOT_TABLE_NAME}"))
+
+
+def resolve_base_snapshot(
+    latest_snapshot_path: Path | None, rebase_ratio: float = REBASE_RATIO
+) -> Path | None:
+    """
+    Full snapshot the next incremental snapshot is computed against
+
+    Parameters
+    ----------
+    latest_snapshot_path : Path | None
+        The latest snapshot, full or incremental
+    rebase_ratio : float
+        Above this ratio of changed resources in the latest incremental snapshot,
+        no base is returned so the next snapshot is a full one
+
+    Returns
+    -------
+    Path | None
+        The full snapshot to use as base, None when the next snapshot must be a full one
+    """
+    if latest_snapshot_path is None:
+        return None
+
+    with closing(sqlite3.connect(get_read_only_uri(latest_snapshot_path), uri=True)) as conn:
+        info = read_snapshot_info(conn)
+
+    if info.get("kind") == FULL_SNAPSHOT:
+        return latest_snapshot_path
+
+    if info.get("kind") != INCREMENTAL_SNAPSHOT:
+        logger.info(f"Snapshot {latest_snapshot_path} has no resources hashes")
+        return None
+
+    if int(info["changes_count"]) > rebase_ratio * int(info["base_resources_count"]):
+        logger.info("Too many changes since the base snapshot, write a full snapshot")
+        return None
+
+    return latest_snapshot_path.parent / info["base"]
+
+
+class IncrementalSQLiteTarget(SQLiteTarget):
+    """
+    Save to the SQLite database only resources inserted or updated since a base snapshot
+
+    Resources are compared by the hash of their content. Besides changed rows, the snapshot
+    holds in _changes the ids of inserted, updated and deleted resources by table and in
+    _snapshot the name of its base. Without a base, a full snapshot is written with the
+    hashes of all resources in _resources_hashes, so it can be used as a base later.
+    Use create_logical_views() to query an incremental snapshot as a full one.
+    """
+
+    base_path: Path = None
+    base_hashes: Dict[str, Dict[str, str]] = {}
+    seen_ids: Dict[str, Set[str]] = {}
+    changes_count: int = 0
+
+    def __init__(self, path: Path, base_path: Path = None, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            The path of the SQLite database to create
+        base_path : Path
+            The full snapshot to compare resources with, see resolve_base_snapshot(),
+            a full snapshot is written if None
+        kwargs
+            SQLiteTarget options
+        """
+        super().__init__(path, **kwargs)
+
+        self.base_path = base_path
+        self.base_hashes = self._read_base_hashes() if base_path else {}
+        self.seen_ids = {}
+        self.changes_count = 0
+
+        self._create_table(
+            CHANGES_TABLE_NAME, ["table_name TEXT", "id TEXT", "change TEXT"]
+        )
+        self._create_table(
+            HASHES_TABLE_NAME, ["table_name TEXT", "id TEXT", "hash TEXT"]
+        )
+
+    def _read_base_hashes(self) -> Dict[str, Dict[str, str]]:
+        logger.info(f"Read resources hashes of base snapshot {self.base_path}")
+
+        base_hashes = {}
+
+        with closing(sqlite3.connect(get_read_only_uri(self.base_path), uri=True)) as conn:
+            for table_name, resource_id, resource_hash in conn.execute(
+                f"SELECT table_name, id, hash FROM {HASHES_TABLE_NAME}"
+            ):
+                base_hashes.setdefault(table_name, {})[resource_id] = resource_hash
+
+        return base_hashes
+
+    def write(self, table_name: str, resources: List[Dict], inferred: TableSchema = None) -> None:
+        """
+        Append the resources of the batch which changed since the base snapshot,
+        the schema and the catalog are inferred over all resources of the logical snapshot
+        """
+        base_hashes = self.base_hashes.get(table_name, {})
+        seen_ids = self.seen_ids.setdefault(table_name, set())
+        changed_resources = []
+        changes = []
+        hashes = []
+
+        for resource in resources:
+            resource_id = resource[SYSTEM_UNIQUE_ID_KEY]
+            resource_hash = hash_resource(resource)
+            base_hash = base_hashes.get(resource_id)
+            seen_ids.add(resource_id)
+
+            if self.base_path is None:
+                hashes.append((table_name, resource_id, resource_hash))
+            elif base_hash != resource_hash:
+                changes.append(
+                    (table_name, resource_id, "updated" if base_hash else "inserted")
+                )
+
+            if base_hash != resource_hash:
+                changed_resources.append(resource)
+
+        self.cursor.executemany(
+            f"INSERT INTO {CHANGES_TABLE_NAME} VALUES (?, ?, ?)", changes
+        )
+        self.cursor.executemany(
+            f"INSERT INTO {HASHES_TABLE_NAME} VALUES (?, ?, ?)", hashes
+        )
+        self.changes_count += len(changes)
+
+        logger.debug(
+            f"{len(changed_resources)} of {len(resources)} resources of {table_name} changed"
+        )
+
+        if resources:
+            columns = self._update_schema(table_name, resources, inferred)
+            self._insert(table_name, changed_resources, columns)
+
+    def _write_deletions(self) -> None:
+        for table_name, base_hashes in self.base_hashes.items():
+            seen_ids = self.seen_ids.get(table_name, set())
+            deletions = [
+                (table_name, resource_id, "deleted")
+                for resource_id in base_hashes
+                if resource_id not in seen_ids
+            ]
+
+            self.cursor.executemany(
+                f"INSERT INTO {CHANGES_TABLE_NAME} VALUES (?, ?, ?)", deletions
+            )
+            self.changes_count += len(deletions)
+
+    def _write_snapshot_info(self) -> None:
+        if self.base_path is None:
+            info = {"kind": FULL_SNAPSHOT}
+        else:
+            info = {
+                "kind": INCREMENTAL_SNAPSHOT,
+                "base": self.base_path.name,
+                "base_resources_count": str(
+                    sum(len(hashes) for hashes in self.base_hashes.values())
+                ),
+                "changes_count": str(self.changes_count),
+            }
+
+        self._create_table(SNAPSHOT_TABLE_NAME, ["key TEXT PRIMARY KEY", "value TEXT"])
+        self.cursor.executemany(
+            f"INSERT OR REPLACE INTO {SNAPSHOT_TABLE_NAME} VALUES (?, ?)", info.items()
+        )
+
+    def finalize(self) -> None:
+        """
+        Record resources deleted since the base snapshot and the snapshot kind
+        """
+        if self.base_path is not None:
+            self._write_deletions()
+
+        self.cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{CHANGES_TABLE_NAME}_id ON {CHANGES_TABLE_NAME} (table_name, id)"
+        )
+        self._write_snapshot_info()
+
+        super().finalize()
+
+
+def _tables_columns(conn: sqlite3.Connection, schema: str) -> Dict[str, List[str]]:
+    tables = conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type='table' AND substr(name, 1, 1) != '_'"
+    ).fetchall()
+
+    return {
+        table_name: [
+            column[1]
+            for column in conn.execute(f"PRAGMA {schema}.table_info({table_name})")
+        ]
+        for (table_name,) in tables
+    }
+
+
+def create_logical_views(
+    conn: sqlite3.Connection, snapshot_path: str, read_only: bool = False
+) -> None:
+    """
+    For an incremental snapshot, attach its base snapshot and create temporary views,
+    named after the tables, merging changed rows with unchanged rows of the base.
+    Temporary views take precedence over tables of the same name in queries.
+    Rows of the tags table are replaced along with the resources of its source table.
+    Nothing is done for full snapshots.
+
+    With read_only, the base is attached read-only and immutable, the connection must accept URIs.
+    """
+    info = read_snapshot_info(conn)
+    if info.get("kind") != INCREMENTAL_SNAPSHOT:
+        return
+
+    base_path = Path(snapshot_path).parent / info["base"]
+    conn.execute(
+        "ATTACH DATABASE ? AS base",
+        (get_read_only_uri(base_path) if read_only else str(base_path),),
+    )
+
+    main_tables = _tables_columns(conn, "main")
+    base_tables = _tables_columns(conn, "base")
+
+    for table_name in base_tables.keys() | main_tables.keys():
+        changes_table_name = (
+            TAGS_SOURCE_TABLE_NAME if table_name == TAGS_TABLE_NAME else table_name
+        )
+        main_columns = main_tables.get(table_name, [])
+        base_columns = base_tables.get(table_name, [])
+        columns = base_columns + [c for c in main_columns if c not in base_columns]
+
+        def select_columns(schema_columns: List[str]) -> str:
+            return ", ".join(
+                column if column in schema_columns else f"NULL AS {column}"
+                for column in columns
+            )
+
+        selects = []
+        if main_columns:
+            selects.append(f"SELECT {select_columns(main_columns)} FROM main.{table_name}")
+        if base_columns:
+            selects.append(
+                f"SELECT {select_columns(base_columns)} FROM base.{table_name} "
+                f"WHERE {SYSTEM_UNIQUE_ID_KEY} NOT IN "
+                f"(SELECT id FROM main.{CHANGES_TABLE_NAME} WHERE table_name = '{changes_table_name}')"
+            )
+
+        conn.execute(f"CREATE TEMP VIEW {table_name} AS {' UNION ALL '.join(selects)}")
+
+    spilled_columns_selects = [
+        f"SELECT * FROM {schema}._spilled_columns"
+        for schema in ("main", "base")
+        if conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE name = '_spilled_columns'"
+        ).fetchone()
+    ]
+
+    if spilled_columns_selects:
+        conn.execute(
+            f"CREATE TEMP VIEW _spilled_columns AS {' UNION '.join(spilled_columns_selects)}"
+        )
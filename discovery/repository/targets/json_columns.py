@@ -0,0 +1,258 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from .schema import Column, TableSchema, normalize_column_name
+from .database import TAGS_KEY_PREFIX, TAGS_SOURCE_TABLE_NAME
+from .sqlite import SQLiteTarget
+from ..config import SYSTEM_UNIQUE_ID_KEY
+from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
+
+logger = get_logger(__name__)
+
+JSON_COLUMN_NAME = "_json"
+
+JSONB_SUPPORTED = sqlite3.sqlite_version_info >= (3, 45, 0)
+"""
+SQLite stores JSON in its binary format JSONB from version 3.45
+"""
+
+JSON_PATHS_DEPTH = 2
+"""
+Depth of the scalar paths of resources described in the catalog, deeper properties
+and arrays are only reachable with json_extract on the JSON column
+"""
+
+GENERATED_COLUMNS_RATIO = 0.5
+"""
+Paths set in at least this ratio of the resources of a table become generated columns
+"""
+
+MAX_GENERATED_COLUMNS = 64
+
+
+class JSONSQLiteTarget(SQLiteTarget):
+    """
+    Save resources to the SQLite database as their original JSON document instead of flattened
+
+    Each table holds the id and the JSON document of its resources, in JSONB where supported.
+    Resources are written unflattened, only their scalar paths up to JSON_PATHS_DEPTH are
+    walked to gather the statistics of the catalog. Once loaded, the paths set in most resources
+    are materialized as virtual generated columns, named as flattened columns and indexed like
+    them, other paths are described in the catalog by their json_extract expression.
+
+    Paths whose flattened names would be the same column, like ("a", "b") and ("a_b",),
+    are given distinct names so each stays reachable. Paths with a key holding a double quote
+    cannot be written as a SQLite JSON path, they are only kept in the JSON document.
+    """
+
+    keys: Dict[Tuple, str | None] = {}
+    keys_paths: Dict[str, Tuple] = {}
+    columns_paths: Dict[str, Tuple] = {}
+    json_paths: Dict[Tuple, str] = {}
+    json_tables: List[str] = []
+
+    def __init__(self, path: Path, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            The path of the SQLite database to create
+        kwargs
+            SQLiteTarget options
+        """
+        super().__init__(path, **kwargs)
+
+        self.keys = {}
+        self.keys_paths = {}
+        self.columns_paths = {}
+        self.json_paths = {}
+        self.json_tables = []
+
+    def _json_key(self, path: Tuple) -> str | None:
+        """
+        Flattened key of the path as flatten_json would name it, suffixed with a counter when
+        the column of this name is already the column of another path, None if the path cannot
+        be written as a JSON path. The JSON path is memoized in json_paths
+        """
+        if path in self.keys:
+            return self.keys[path]
+
+        labels = [str(k) for k in path]
+
+        if any('"' in label for label in labels):
+            logger.debug(f"Skip path {path}, a key with a double quote cannot be written as a JSON path")
+            self.keys[path] = None
+            return None
+
+        key = "_".join(labels)
+        column_name = normalize_column_name(key)
+        suffix = 1
+
+        while column_name in self.columns_paths:
+            suffix += 1
+            column_name = normalize_column_name(f"{key}_{suffix}")
+
+        if suffix > 1:
+            logger.warning(
+                f"Path {path} is stored in column {column_name}, {normalize_column_name(key)} "
+                f"is the column of path {self.columns_paths[normalize_column_name(key)]}"
+            )
+            key = f"{key}_{suffix}"
+
+        self.keys[path] = key
+        self.keys_paths[key] = path
+        self.columns_paths[column_name] = path
+        # Labels are compared to keys as escaped in the JSON text
+        self.json_paths[path] = "$" + "".join(
+            '."' + label.replace("\\", "\\\\") + '"' for label in labels
+        ).replace("'", "''")
+
+        return key
+
+    def _collect_paths(
+        self, out: Dict[str, Any], json_object: Dict, parent_path: Tuple, depth: int
+    ) -> None:
+        for key, value in json_object.items():
+            value_type = type(value)
+
+            if value_type is dict:
+                if depth > 1:
+                    self._collect_paths(out, value, parent_path + (key,), depth - 1)
+            elif value_type is not list:
+                json_key = self._json_key(parent_path + (key,))
+                if json_key is not None:
+                    out[json_key] = value
+
+    def _paths(self, resource: Dict) -> Dict[str, Any]:
+        """
+        Scalar values of the resource up to JSON_PATHS_DEPTH keyed like flattened keys
+        """
+        out = {}
+        self._collect_paths(out, resource, (), JSON_PATHS_DEPTH)
+
+        return out
+
+    def write(self, table_name: str, resources: List[Dict], inferred: TableSchema = None) -> None:
+        """
+        Append a batch of resources to a table as JSON documents
+
+        Parameters
+        ----------
+        table_name : str
+            The type of the resource which is transformed to a table name
+        resources : List[Dict]
+            The batch of resources represented as unflattened dictionaries
+        inferred : TableSchema
+            Ignored, the paths of unflattened resources are always collected here
+        """
+        if not resources:
+            return
+
+        with metrics.phase("schema_inference"):
+            paths = [self._paths(resource) for resource in resources]
+
+            if table_name not in self.schema.tables:
+                self.json_tables.append(table_name)
+                self._create_table(
+                    table_name,
+                    [
+                        f"{SYSTEM_UNIQUE_ID_KEY} TEXT NOT NULL"
+                        + ("" if self.bulk_load else " PRIMARY KEY"),
+                        f"{JSON_COLUMN_NAME} {'BLOB' if JSONB_SUPPORTED else 'TEXT'}",
+                    ],
+                )
+
+                if self.bulk_load:
+                    self.deferred_indexes.append(
+                        f"CREATE UNIQUE INDEX IF NOT EXISTS pk_{table_name} ON {table_name} ({SYSTEM_UNIQUE_ID_KEY})"
+                    )
+
+            columns, _ = self.schema.table(table_name).update(paths)
+
+        with metrics.phase("insert"):
+            self.cursor.executemany(
+                f"INSERT INTO {table_name} ({SYSTEM_UNIQUE_ID_KEY}, {JSON_COLUMN_NAME}) "
+                f"VALUES (?, {'jsonb(?)' if JSONB_SUPPORTED else '?'})",
+                (
+                    (
+                        resource[SYSTEM_UNIQUE_ID_KEY],
+                        json.dumps(resource, separators=(",", ":"), default=str),
+                    )
+                    for resource in resources
+                ),
+            )
+
+            if table_name == TAGS_SOURCE_TABLE_NAME:
+                self._update_tags_schema(paths, columns)
+                self._insert_tags(paths, columns)
+
+            if self.full_text_search:
+                self._index_text(table_name, paths)
+
+            if not self.bulk_load:
+                self.conn.commit()
+
+    def _tags(self, resources: List[Dict], columns: List[Column]) -> List[Dict]:
+        """
+        Tags named by their key in the tags object, their flattened key may be suffixed
+        """
+        tags_prefix = TAGS_KEY_PREFIX.rstrip("_")
+        tags_keys = [
+            (key, str(path[1]))
+            for column in columns
+            for key in column.keys
+            if len(path := self.keys_paths[key]) == 2 and path[0] == tags_prefix
+        ]
+
+        return [
+            {"id": resource[SYSTEM_UNIQUE_ID_KEY], "key": tag_key, "value": value}
+            for resource in resources
+            for key, tag_key in tags_keys
+            if (value := resource.get(key)) is not None
+        ]
+
+    def _spilled_expression(self, column: Column) -> str:
+        return f"json_extract({JSON_COLUMN_NAME}, '{self.json_paths[self.keys_paths[column.keys[0]]]}')"
+
+    def _add_generated_columns(self) -> None:
+        """
+        Materialize the paths set in most resources of each table as virtual generated columns,
+        other paths are marked as spilled so the catalog describes them by their expression
+        """
+        logger.info("Add generated columns")
+
+        for table_name in self.json_tables:
+            table = self.schema.tables[table_name]
+            generated_columns = sorted(
+                (
+                    column
+                    for column in table.columns.values()
+                    if not column.primary_key
+                    and column.values_count >= GENERATED_COLUMNS_RATIO * table.rows_count
+                ),
+                key=lambda column: -column.values_count,
+            )[:MAX_GENERATED_COLUMNS]
+
+            for column in table.columns.values():
+                column.spilled = not column.primary_key and column not in generated_columns
+
+            for column in generated_columns:
+                self.cursor.execute(
+                    f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column.type or 'TEXT'} "
+                    f"GENERATED ALWAYS AS ({self._spilled_expression(column)}) VIRTUAL"
+                )
+
+    def _save_spilled_columns(self) -> None:
+        """
+        Nothing to list, paths which are not generated columns are described in the catalog
+        """
+
+    def finalize(self) -> None:
+        """
+        Add generated columns before indexes are created and the catalog is saved
+        """
+        self._add_generated_columns()
+
+        super().finalize()
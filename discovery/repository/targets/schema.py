@@ -0,0 +1,356 @@
+import re
+from typing import Dict, List, Tuple
+from ..config import SYSTEM_UNIQUE_ID_KEY
+from discovery.helpers.logging import get_logger
+
+logger = get_logger(__name__)
+
+NON_ALPHANUMERIC_PATTERN = re.compile(r"\W")
+
+ARRAY_INDEX_PATTERN = re.compile(r"(^|_)\d+(_|$)")
+
+MAX_COLUMNS = 1000
+"""
+Default maximum count of real columns of a table, SQLite default limit is 2000
+"""
+
+DISTINCT_VALUES_LIMIT = 100
+"""
+Count of distinct values of a column tracked before only reporting that there are more
+"""
+
+EXAMPLES_COUNT = 10
+
+SQLITE_TYPES_BY_PYTHON_TYPE = {
+    type(None): None,
+    bool: "INTEGER",
+    int: "INTEGER",
+    float: "REAL",
+}
+
+SQLITE_TYPES_RANKS = {None: 0, "INTEGER": 1, "REAL": 2, "TEXT": 3}
+
+
+def normalize_column_name(column_name: str) -> str:
+    """
+    Lowercase and replace any non-alphanumeric characters with underscores
+    """
+    return NON_ALPHANUMERIC_PATTERN.sub("_", column_name.lower())
+
+
+class Column:
+    """
+    Column of a table and the keys of the flattened resources stored in it
+    """
+
+    name: str = None
+    keys: List[str] = []
+    type: str = None
+    primary_key: bool = False
+    spilled: bool = False
+    values_count: int = 0
+    distinct_values: Dict | None = {}
+    examples: List = []
+
+    def __init__(self, name: str, key: str) -> None:
+        self.name = name
+        self.keys = [key]
+        self.type = None
+        self.primary_key = key == SYSTEM_UNIQUE_ID_KEY
+        self.spilled = False
+        self.values_count = 0
+        self.distinct_values = {}
+        self.examples = []
+
+    def add_distinct_value(self, value) -> None:
+        """
+        Track a new distinct value, once more than DISTINCT_VALUES_LIMIT values are
+        tracked only the first EXAMPLES_COUNT ones are kept as examples
+        """
+        self.distinct_values[value] = None
+
+        if len(self.examples) < EXAMPLES_COUNT:
+            self.examples.append(value)
+
+        if len(self.distinct_values) > DISTINCT_VALUES_LIMIT:
+            self.distinct_values = None
+
+    @property
+    def distinct_count(self) -> int | None:
+        """
+        Count of distinct not NULL values, None when there are more than DISTINCT_VALUES_LIMIT
+        """
+        return None if self.distinct_values is None else len(self.distinct_values)
+
+    @property
+    def array_indexed(self) -> bool:
+        """
+        The column comes from an element of a list flattened with its index
+        """
+        return ARRAY_INDEX_PATTERN.search(self.keys[0]) is not None
+
+    def definition(self, with_primary_key: bool = True) -> str:
+        """
+        Column definition for CREATE TABLE and ALTER TABLE statements, TEXT when only NULL values were seen
+        """
+        definition = f"{self.name} {self.type or 'TEXT'}"
+
+        if self.primary_key:
+            definition += " NOT NULL"
+
+            if with_primary_key:
+                definition += " PRIMARY KEY"
+
+        return definition
+
+    def value(self, resource: Dict):
+        """
+        Value of the column in the resource, the first not NULL one when several keys map to the column
+        """
+        for key in self.keys:
+            value = resource.get(key)
+            if value is not None:
+                return value
+
+        return None
+
+
+class TableSchema:
+    """
+    Columns of a table inferred over the batches of resources written to it
+
+    Once the table would have more than max_columns columns, new columns are spilled:
+    they are not real columns of the table but stored together in a JSON column.
+    Array-indexed and rarely populated columns are spilled first.
+    """
+
+    table_name: str = None
+    columns: Dict[str, Column] = {}
+    keys_columns: Dict[str, Column] = {}
+    max_columns: int = MAX_COLUMNS
+    real_columns_count: int = 0
+    rows_count: int = 0
+
+    def __init__(
+        self, table_name: str, column_names: Dict[str, str], max_columns: int = MAX_COLUMNS
+    ) -> None:
+        self.table_name = table_name
+        self.columns = {}
+        self.keys_columns = {}
+        self.max_columns = max_columns
+        self.real_columns_count = 0
+        self.rows_count = 0
+        self._column_names = column_names
+
+    def _add_key(self, key: str) -> Tuple[Column, bool]:
+        name = self._column_names.get(key)
+        if name is None:
+            name = self._column_names[key] = normalize_column_name(key)
+
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = Column(name, key)
+            is_new = True
+        else:
+            logger.warning(
+                f"Keys {column.keys} and {key} of {self.table_name} are stored in the same column {name}"
+            )
+            column.keys.append(key)
+            is_new = False
+
+        self.keys_columns[key] = column
+
+        return column, is_new
+
+    def restore_key(self, key: str, spilled: bool) -> Column:
+        """
+        Add the column of a key written by a previous run, before its rows are read back
+        to restore the statistics of the table
+        """
+        column, is_new = self._add_key(key)
+
+        if is_new:
+            column.spilled = spilled and not column.primary_key
+            self.real_columns_count += not column.spilled
+
+        return column
+
+    def update(self, resources: List[Dict]) -> Tuple[List[Column], List[Column]]:
+        """
+        Infer the columns, their types and statistics over a batch of resources in a single pass
+
+        Returns
+        -------
+        Tuple[List[Column], List[Column]]
+            The columns used by the batch in table order and the columns which are new to the table
+        """
+        keys_columns = self.keys_columns
+        batch_columns = {}
+        new_columns = []
+
+        for resource in resources:
+            for key, value in resource.items():
+                column = keys_columns.get(key)
+
+                if column is None:
+                    column, is_new = self._add_key(key)
+                    if is_new:
+                        new_columns.append(column)
+
+                batch_columns[column.name] = column
+
+                if value is None:
+                    continue
+
+                column.values_count += 1
+
+                distinct_values = column.distinct_values
+                if distinct_values is not None and value not in distinct_values:
+                    column.add_distinct_value(value)
+
+                value_type = SQLITE_TYPES_BY_PYTHON_TYPE.get(type(value), "TEXT")
+                if value_type != column.type and (
+                    SQLITE_TYPES_RANKS[value_type] > SQLITE_TYPES_RANKS[column.type]
+                ):
+                    column.type = value_type
+
+        self.rows_count += len(resources)
+        self._spill(new_columns)
+
+        return [
+            column for name, column in self.columns.items() if name in batch_columns
+        ], new_columns
+
+    def merge(self, other: "TableSchema") -> Tuple[List[Column], List[Column]]:
+        """
+        Merge the schema inferred over a batch of resources elsewhere, like in a worker process,
+        as if the batch was passed to update. Examples are the same as with update while
+        there are at most DISTINCT_VALUES_LIMIT distinct values, the first ones otherwise
+
+        Returns
+        -------
+        Tuple[List[Column], List[Column]]
+            The columns used by the batch in table order and the columns which are new to the table
+        """
+        batch_columns = {}
+        new_columns = []
+
+        for other_column in other.columns.values():
+            column = None
+
+            for key in other_column.keys:
+                key_column = self.keys_columns.get(key)
+
+                if key_column is None:
+                    key_column, is_new = self._add_key(key)
+                    if is_new:
+                        new_columns.append(key_column)
+
+                column = column or key_column
+
+            batch_columns[column.name] = column
+            column.values_count += other_column.values_count
+
+            if column.distinct_values is not None:
+                if other_column.distinct_values is None:
+                    examples = [
+                        value
+                        for value in other_column.examples
+                        if value not in column.distinct_values
+                    ]
+                    column.examples.extend(examples[: EXAMPLES_COUNT - len(column.examples)])
+                    column.distinct_values = None
+                else:
+                    for value in other_column.distinct_values:
+                        if column.distinct_values is None:
+                            break
+
+                        if value not in column.distinct_values:
+                            column.add_distinct_value(value)
+
+            if SQLITE_TYPES_RANKS[other_column.type] > SQLITE_TYPES_RANKS[column.type]:
+                column.type = other_column.type
+
+        self.rows_count += other.rows_count
+        self._spill(new_columns)
+
+        return [
+            column for name, column in self.columns.items() if name in batch_columns
+        ], new_columns
+
+    @property
+    def spilled(self) -> bool:
+        return self.real_columns_count < len(self.columns)
+
+    def _spill(self, new_columns: List[Column]) -> None:
+        """
+        Mark new columns which do not fit in the table as spilled, one column is
+        kept available for the JSON column of spilled values
+        """
+        previously_spilled = self.real_columns_count < len(self.columns) - len(new_columns)
+
+        if (
+            not previously_spilled
+            and self.real_columns_count + len(new_columns) <= self.max_columns
+        ):
+            self.real_columns_count += len(new_columns)
+            return
+
+        available = max(self.max_columns - 1 - self.real_columns_count, 0)
+        candidates = sorted(
+            new_columns,
+            key=lambda column: (
+                not column.primary_key,
+                column.array_indexed,
+                -column.values_count,
+            ),
+        )
+
+        for column in candidates[available:]:
+            if not column.primary_key:
+                column.spilled = True
+
+        self.real_columns_count += sum(not column.spilled for column in new_columns)
+
+        logger.info(
+            f"Table {self.table_name} is too wide, {len(self.columns) - self.real_columns_count} columns are spilled"
+        )
+
+
+class SchemaInference:
+    """
+    Infer the schemas of tables over batches of flattened resources,
+    normalized column names are memoized across all tables
+    """
+
+    tables: Dict[str, TableSchema] = {}
+    column_names: Dict[str, str] = {}
+    max_columns: int = MAX_COLUMNS
+
+    def __init__(self, max_columns: int = MAX_COLUMNS) -> None:
+        self.tables = {}
+        self.column_names = {}
+        self.max_columns = max_columns
+
+    def table(self, table_name: str) -> TableSchema:
+        table = self.tables.get(table_name)
+        if table is None:
+            table = self.tables[table_name] = TableSchema(
+                table_name, self.column_names, self.max_columns
+            )
+
+        return table
+
+    def update(
+        self, table_name: str, resources: List[Dict]
+    ) -> Tuple[List[Column], List[Column]]:
+        """
+        Infer the columns of the table over a batch of resources, see TableSchema.update
+        """
+        return self.table(table_name).update(resources)
+
+    def merge(self, table: TableSchema) -> Tuple[List[Column], List[Column]]:
+        """
+        Merge the schema of a table inferred elsewhere, see TableSchema.merge
+        """
+        return self.table(table.table_name).merge(table)
@@ -1,156 +1,379 @@
 import os
+import json
 import sqlite3
 from pathlib import Path
-from typing import List, Any, Dict
-from .target import Target
+from typing import List, Dict
+from .database import SPILLED_COLUMN_NAME, TAGS_KEY_PREFIX, TAGS_TABLE_NAME, DatabaseTarget
+from .schema import MAX_COLUMNS, Column
+from ..checkpoint import Checkpoint
 from ..config import SYSTEM_UNIQUE_ID_KEY
 from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
 
 logger = get_logger(__name__)
 
-
-class Columns:
-    columns_with_types_list: List[str] = []
-    columns_names_list: List[tuple] = []
-
-    def __init__(
-        self, columns_with_types_list: List[str], columns_names_list: List[tuple]
-    ):
-        self.columns_with_types_list = columns_with_types_list
-        self.columns_names_list = columns_names_list
-
-
-class SQLiteTarget(Target):
+INDEXED_COLUMNS = ["type", "location", "subscriptionid", "resourcegroup", "parent_id"]
+"""
+Columns agents usually filter or join on, indexed in every table where they are real columns,
+parent_id links the rows of child tables to the resources holding their lists
+"""
+
+CHECKPOINTS_TABLE_NAME = "_checkpoints"
+CHECKPOINTS_KEYS_TABLE_NAME = "_checkpoints_keys"
+"""
+Checkpoints of the extraction and keys of the columns of each table, in the order they were
+added, kept in a resumable snapshot until it is finalized
+"""
+
+RESTORE_BATCH_SIZE = 10000
+
+SEARCH_TABLE_NAME = "_search"
+"""
+FTS5 table indexing the name, type, tags and values of each resource with its id and table
+"""
+
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA page_size = 65536",
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+
+
+class SQLiteTarget(DatabaseTarget):
     """
     Save the data snapshot to a SQLite database
     """
 
-    path: Path = None
     conn: sqlite3.Connection = None
     cursor: sqlite3.Cursor = None
+    bulk_load: bool = False
+    full_text_search: bool = False
+    deferred_indexes: List[str] = []
+    checkpointed_keys_counts: Dict[str, int] = {}
 
-    def __init__(self, path: Path) -> None:
-        if path.exists():
+    def __init__(
+        self,
+        path: Path,
+        bulk_load: bool = False,
+        max_columns: int = MAX_COLUMNS,
+        full_text_search: bool = False,
+        resumable: bool = False,
+        resume: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            The path of the SQLite database to create
+        bulk_load : bool
+            Tune the database for a write-once file: the whole snapshot is written in a single
+            transaction without journal nor fsync, and the primary key index is built after
+            the data is loaded. An interrupted bulk load leaves an unusable file.
+        max_columns : int
+            Maximum count of real columns of a table, other columns are stored in the JSON
+            column _spilled and listed in the _spilled_columns table
+        full_text_search : bool
+            Index the name, type, tags and values of resources in the _search FTS5 table
+        resumable : bool
+            Commit written batches only with checkpoints, so an interrupted extraction
+            can be resumed from its last checkpoint
+        resume : bool
+            Open the existing snapshot at path written by an interrupted resumable extraction,
+            its schema and statistics are restored from the rows committed with the last checkpoint
+        """
+        if resume and not path.exists():
+            raise ValueError(f"SQLite database {path} does not exist, there is nothing to resume")
+
+        if path.exists() and not resume:
             logger.debug(f"SQLite database {path} exists")
             raise ValueError(
                 f"SQLite database {path} exists, use a different path to avoid side effects"
             )
 
-        self.path = path
-        self.conn = sqlite3.connect(self.path)
-        self.cursor = self.conn.cursor()
+        if bulk_load and (resumable or resume):
+            raise ValueError("A bulk load is written in a single transaction and cannot be resumed")
 
-    def __enter__(self):
-        return self
+        # Batches of concurrent queries are written from their threads one at a time
+        conn = sqlite3.connect(path, check_same_thread=False)
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.conn.close()
+        if resume and not conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (CHECKPOINTS_TABLE_NAME,),
+        ).fetchone():
+            conn.close()
+            raise ValueError(
+                f"SQLite database {path} has no checkpoints, it was not written by a resumable "
+                "extraction and cannot be resumed"
+            )
+
+        super().__init__(path, conn, conn.cursor(), max_columns)
+        self.bulk_load = bulk_load
+        self.full_text_search = full_text_search
+        self.resumable = resumable or resume
+        self.deferred_indexes = []
+        self.checkpointed_keys_counts = {}
+
+        if self.bulk_load:
+            for pragma in BULK_LOAD_PRAGMAS:
+                self.cursor.execute(pragma)
+
+        if self.full_text_search:
+            self.cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE_NAME} USING fts5("
+                "id UNINDEXED, table_name UNINDEXED, name, type, tags, content)"
+            )
 
-    def _create_table(self, table_name: str, columns: List[str]) -> None:
-        logger.info("Create table")
+        if self.resumable:
+            self._create_table(
+                CHECKPOINTS_TABLE_NAME,
+                [
+                    "partition TEXT NOT NULL PRIMARY KEY",
+                    "skip_token TEXT",
+                    "rows_count INTEGER",
+                    "done INTEGER",
+                ],
+            )
+            self._create_table(
+                CHECKPOINTS_KEYS_TABLE_NAME,
+                ["table_name TEXT NOT NULL", "key TEXT NOT NULL", "spilled INTEGER"],
+            )
 
-        logger.debug(f"Table name: {table_name}")
+        if resume:
+            self._restore_schema()
 
-        self.cursor.execute(
-            f"CREATE TABLE IF NOT EXISTS {table_name} (\n{',\n'.join(columns)}\n)"
-        )
+        if self.resumable:
+            self._begin()
 
-    def _normalize_column_name(self, column_name: str) -> str:
+    def _evolve_table(
+        self,
+        table_name: str,
+        is_new_table: bool,
+        new_columns: List[Column],
+        add_spilled_column: bool,
+    ) -> None:
         """
-        Replace any non-alphanumeric characters with underscores
+        SQLite columns are dynamically typed, so a value of a different type than the
+        column type declared by a previous batch is stored as is. A bulk load creates
+        tables without primary key, replaced by a unique index created once data is loaded
         """
-        column_name = column_name.lower()
-
-        return "".join(char if char.isalnum() else "_" for char in column_name)
+        if is_new_table and self.bulk_load:
+            self._defer_primary_key(
+                table_name, [column for column in new_columns if not column.spilled]
+            )
 
-    def _define_columns_with_types(
-        self, columns_with_types_dict: Dict, resource: Dict
-    ) -> Dict:
-        for key, value in resource.items():
-            column_name_type = self._normalize_column_name(key)
+        super()._evolve_table(table_name, is_new_table, new_columns, add_spilled_column)
 
-            column = columns_with_types_dict.get(column_name_type, {})
+    def _column_definition(self, column: Column, is_new_table: bool) -> str:
+        return column.definition(not (is_new_table and self.bulk_load))
 
-            column["key"] = key
-            column["name"] = column_name_type
+    def _defer_primary_key(self, table_name: str, columns: List[Column]) -> None:
+        """
+        Replace the primary key constraint by a unique index created once data is loaded
+        """
+        for column in columns:
+            if column.primary_key:
+                self.deferred_indexes.append(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS pk_{table_name} ON {table_name} ({column.name})"
+                )
 
-            if column.get("type") is None and isinstance(value, int):
-                column["type"] = "INTEGER"
-            elif column.get("type") is None and isinstance(value, float):
-                column["type"] = " REAL"
-            elif column.get("type") is None:
-                column["type"] = "TEXT"
-            elif (
-                column["type"] != "TEXT"
-                and not isinstance(value, int)
-                and not isinstance(value, float)
-            ):
-                column["type"] = "TEXT"
+    def _create_deferred_indexes(self) -> None:
+        logger.info("Create deferred indexes")
 
-            if key == SYSTEM_UNIQUE_ID_KEY:
-                column["type"] += " NOT NULL PRIMARY KEY"
+        for index in self.deferred_indexes:
+            self.cursor.execute(index)
 
-            columns_with_types_dict[column_name_type] = column
+        self.deferred_indexes = []
 
-        return columns_with_types_dict
+    def _insert(
+        self, table_name: str, resources: List[Dict], columns: List[Column]
+    ) -> None:
+        """
+        Insert the batch, index its text and commit it unless the snapshot is bulk loaded
+        or committed with checkpoints
+        """
+        super()._insert(table_name, resources, columns)
 
-    def _discover_columns_over_list(self, resources: List[Dict]) -> Columns:
-        logger.info("Define columns over list of resources")
+        if self.full_text_search:
+            self._index_text(table_name, resources)
 
-        columns_with_types_dict = {}
-        columns_names_set = set()
+        if not self.bulk_load and not self.resumable:
+            self.conn.commit()
 
-        for resource in resources:
-            columns_with_types_dict = self._define_columns_with_types(
-                columns_with_types_dict, resource
-            )
+    def _index_text(self, table_name: str, resources: List[Dict]) -> None:
+        """
+        Index the text of the resources, values other than the id, name, type and tags
+        are concatenated in the content column
+        """
 
-            columns_names_set.update(
-                [tuple([self._normalize_column_name(k), k]) for k in resource.keys()]
+        def search_row(resource: Dict) -> tuple:
+            tags = []
+            content = []
+
+            for key, value in resource.items():
+                if value is None or key in (SYSTEM_UNIQUE_ID_KEY, "name", "type"):
+                    continue
+
+                if key.startswith(TAGS_KEY_PREFIX):
+                    tags.append(f"{key[len(TAGS_KEY_PREFIX):]} {value}")
+                else:
+                    content.append(str(value))
+
+            return (
+                resource[SYSTEM_UNIQUE_ID_KEY],
+                table_name,
+                resource.get("name"),
+                resource.get("type"),
+                " ".join(tags),
+                " ".join(content),
             )
 
-        return Columns(
-            columns_with_types_list=[
-                f"{v['name']} {v['type']}" for v in columns_with_types_dict.values()
-            ],
-            columns_names_list=list(columns_names_set),
+        self.cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE_NAME} VALUES (?, ?, ?, ?, ?, ?)",
+            map(search_row, resources),
         )
 
-    def save(self, data: Dict[str, List[Dict]]) -> None:
+    def _create_indexes(self) -> None:
+        """
+        Index INDEXED_COLUMNS once data is loaded, columns with a single value are skipped
+        as the index would not be selective, and tags by key and value
         """
-        Save the data to the SQLite database
+        logger.info("Create indexes")
+
+        for table in self.schema.tables.values():
+            for column_name in INDEXED_COLUMNS:
+                column = table.columns.get(column_name)
+                if column is None or column.spilled or column.distinct_count == 1:
+                    continue
+
+                self.cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table.table_name}_{column_name} "
+                    f"ON {table.table_name} ({column_name})"
+                )
+
+        if TAGS_TABLE_NAME in self.schema.tables:
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{TAGS_TABLE_NAME}_key_value "
+                f"ON {TAGS_TABLE_NAME} (key, value)"
+            )
 
-        Parameters
-        ----------
-        data : Dict[str, List[Dict]]
-            The data to save to the SQLite database
-            key is the type of the resource which is transformed to a table name
-            value is a list of resources which are transformed to rows
-            resource is represented as a flattened dictionary where keys are columns
+    def _begin(self) -> None:
         """
-        logger.info("Saving data to SQLite database")
+        Commit and open a transaction explicitly, tables created or altered by the next batches
+        are then rolled back with them if the extraction is interrupted before a checkpoint
+        """
+        self.conn.commit()
+        self.cursor.execute("BEGIN")
 
-        tables = data.keys()
+    def checkpoint(self, checkpoint: Checkpoint) -> None:
+        """
+        Commit the batches written since the previous checkpoint together with the checkpoint
+        and the keys of the columns added since then
+        """
+        with metrics.phase("checkpoint"):
+            self._checkpoint(checkpoint)
 
-        for table_name in tables:
-            resources = data[table_name]
-            if not resources:
+    def _checkpoint(self, checkpoint: Checkpoint) -> None:
+        for table in self.schema.tables.values():
+            checkpointed_keys_count = self.checkpointed_keys_counts.get(table.table_name, 0)
+            if checkpointed_keys_count == len(table.keys_columns):
                 continue
 
-            columns = self._discover_columns_over_list(resources)
-            self._create_table(table_name, columns.columns_with_types_list)
+            self.cursor.executemany(
+                f"INSERT INTO {CHECKPOINTS_KEYS_TABLE_NAME} VALUES (?, ?, ?)",
+                (
+                    (table.table_name, key, column.spilled)
+                    for key, column in list(table.keys_columns.items())[checkpointed_keys_count:]
+                ),
+            )
+            self.checkpointed_keys_counts[table.table_name] = len(table.keys_columns)
 
-            columns_for_insert = ", ".join(col[0] for col in columns.columns_names_list)
-            placeholders = ", ".join("?" * len(columns.columns_names_list))
-            values = [
-                tuple(resource.get(col[1]) for col in columns.columns_names_list)
-                for resource in resources
-            ]
+        self.cursor.execute(
+            f"INSERT OR REPLACE INTO {CHECKPOINTS_TABLE_NAME} VALUES (?, ?, ?, ?)",
+            (checkpoint.partition, checkpoint.skip_token, checkpoint.rows_count, checkpoint.done),
+        )
+        self._begin()
 
-            self.cursor.executemany(
-                f"INSERT INTO {table_name} ({columns_for_insert}) VALUES ({placeholders})",
-                values,
+        logger.debug(f"Checkpoint {checkpoint.partition} after {checkpoint.rows_count} resources")
+
+    def get_checkpoints(self) -> Dict[str, Checkpoint]:
+        if not self.resumable:
+            return {}
+
+        return {
+            partition: Checkpoint(partition, skip_token, rows_count, bool(done))
+            for partition, skip_token, rows_count, done in self.cursor.execute(
+                f"SELECT partition, skip_token, rows_count, done FROM {CHECKPOINTS_TABLE_NAME}"
+            ).fetchall()
+        }
+
+    def _restore_schema(self) -> None:
+        """
+        Add the columns of the keys saved with checkpoints in their order, then read the
+        committed rows back to restore the statistics of the tables
+        """
+        logger.info("Restore schema of the snapshot to resume")
+
+        for table_name, key, spilled in self.cursor.execute(
+            f"SELECT table_name, key, spilled FROM {CHECKPOINTS_KEYS_TABLE_NAME} ORDER BY rowid"
+        ).fetchall():
+            self.schema.table(table_name).restore_key(key, bool(spilled))
+            self.checkpointed_keys_counts[table_name] = (
+                self.checkpointed_keys_counts.get(table_name, 0) + 1
+            )
+
+        for table in self.schema.tables.values():
+            real_columns = [column for column in table.columns.values() if not column.spilled]
+            spilled_keys = {
+                column.name: column.keys[0]
+                for column in table.columns.values()
+                if column.spilled
+            }
+            column_names = [column.name for column in real_columns]
+            if spilled_keys:
+                column_names.append(SPILLED_COLUMN_NAME)
+
+            rows = self.conn.execute(f"SELECT {', '.join(column_names)} FROM {table.table_name}")
+
+            while batch := rows.fetchmany(RESTORE_BATCH_SIZE):
+                resources = []
+
+                for row in batch:
+                    resource = {
+                        column.keys[0]: value
+                        for column, value in zip(real_columns, row)
+                        if value is not None
+                    }
+
+                    if spilled_keys and row[-1] is not None:
+                        for name, value in json.loads(row[-1]).items():
+                            resource[spilled_keys[name]] = value
+
+                    resources.append(resource)
+
+                table.update(resources)
+
+            logger.debug(f"Restored {table.rows_count} rows of {table.table_name}")
+
+    def finalize(self) -> None:
+        """
+        Create indexes deferred by the bulk load and indexes of filtered columns, merge the
+        full-text index, then list spilled columns, save the catalog and commit pending
+        changes of the snapshot
+        """
+        if self.resumable:
+            self.cursor.execute(f"DROP TABLE IF EXISTS {CHECKPOINTS_TABLE_NAME}")
+            self.cursor.execute(f"DROP TABLE IF EXISTS {CHECKPOINTS_KEYS_TABLE_NAME}")
+
+        with metrics.phase("create_indexes"):
+            self._create_deferred_indexes()
+            self._create_indexes()
+
+        if self.full_text_search:
+            self.cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE_NAME} ({SEARCH_TABLE_NAME}) VALUES ('optimize')"
             )
-            self.cursor.connection.commit()
 
-            logger.debug(f"Inserted {len(resources)} resources into {table_name}")
+        super().finalize()
@@ -1,7 +1,11 @@
 from typing import List, Any, Dict
+from ..checkpoint import Checkpoint
+from .schema import TableSchema
 
 
 class Target:
+    resumable: bool = False
+
     def save(self, data: Dict[str, List[Dict]]) -> None:
         """
         Save the data to the target
@@ -15,3 +19,38 @@ class Target:
             resource is represented as a flattened dictionary where keys are columns
         """
         raise NotImplementedError("save() method not implemented")
+
+    def write(self, table_name: str, resources: List[Dict], inferred: TableSchema = None) -> None:
+        """
+        Append a batch of resources to a table of the target, the table schema evolves
+        with new keys found in the batch
+
+        Parameters
+        ----------
+        table_name : str
+            The type of the resource which is transformed to a table name
+        resources : List[Dict]
+            The batch of resources represented as flattened dictionaries where keys are columns
+        inferred : TableSchema
+            The schema already inferred over the batch, targets may merge it instead of inferring it again
+        """
+        raise NotImplementedError("write() method not implemented")
+
+    def finalize(self) -> None:
+        """
+        Complete the snapshot once all batches were written
+        """
+        raise NotImplementedError("finalize() method not implemented")
+
+    def checkpoint(self, checkpoint: Checkpoint) -> None:
+        """
+        Make the batches written so far durable along with the checkpoint, only called on resumable targets
+        """
+        raise NotImplementedError("checkpoint() method not implemented")
+
+    def get_checkpoints(self) -> Dict[str, Checkpoint]:
+        """
+        Checkpoints saved in the target by partition
+        """
+        return {}
+
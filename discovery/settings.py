@@ -1,15 +1,52 @@
+from functools import lru_cache
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from discovery.sources.profile import ExtractionProfile
 
-class DiscoverySettings(BaseSettings):
-    model_config = SettingsConfigDict(env_prefix='discovery_', case_sensitive=False, env_file=".env")
+SETTINGS_CONFIG = SettingsConfigDict(env_prefix='discovery_', case_sensitive=False, env_file=".env", extra="ignore")
+
+
+class ExtractSettings(BaseSettings):
+    """
+    Settings of the extract command
+    """
+
+    model_config = SETTINGS_CONFIG
 
     extract_target_folder_path: str = Field('.')
+    extract_profile: ExtractionProfile = Field(default_factory=ExtractionProfile)
+
+
+class AgentSettings(BaseSettings):
+    """
+    Settings of the run command, the Azure OpenAI deployment of the agent model
+    """
+
+    model_config = SETTINGS_CONFIG
 
     azure_openai_deployment_name: str = Field()
     azure_openai_endpoint: str = Field()
     azure_openai_key: str = Field()
     azure_openai_api_version: str = Field()
 
+
+class DiscoverySettings(ExtractSettings, AgentSettings):
+    """
+    All settings, commands validate only their section with get_extract_settings or get_agent_settings
+    """
+
+    model_config = SETTINGS_CONFIG
+
+
+@lru_cache(maxsize=None)
+def get_extract_settings() -> ExtractSettings:
+    return ExtractSettings()
+
+
+@lru_cache(maxsize=None)
+def get_agent_settings() -> AgentSettings:
+    return AgentSettings()
+
+
 def get_settings() -> DiscoverySettings:
-    return DiscoverySettings()
\ No newline at end of file
+    return DiscoverySettings()
@@ -1,11 +1,38 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
 from azure.mgmt.resourcegraph import ResourceGraphClient
-from discovery.repository import Repository
-from discovery.helpers.flatten_json import flatten_json
+from discovery.repository import Checkpoint, Repository
+from discovery.sources.profile import ExtractionProfile
+from discovery.sources.scheduler import RequestScheduler, SchedulerRetryPolicy
+from discovery.sources.transform import (
+    GENERIC_RESOURCE_PROJECTION,
+    TransformedPage,
+    TransformPool,
+    child_table_name,
+)
+from discovery.helpers.flatten_json import (
+    MISSING,
+    ChildRows,
+    KeyPathCache,
+    flatten_json_with_projection,
+)
 from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
 
 logger = get_logger(__name__)
 
 
+def _response_with_payload_size(pipeline_response, deserialized, headers) -> Tuple:
+    """
+    Resource Graph response with the size of its body, and the headers of the response
+    holding the quota of the user, passed as cls to the client
+    """
+    http_response = pipeline_response.http_response
+
+    return (deserialized, len(http_response.body())), http_response.headers
+
+
 class AzureARM:
     """
     Extracts all resources from Azure Resource Graph and stores them in the repository
@@ -14,13 +41,71 @@ class AzureARM:
     azure_credential: "TokenCredential" = None
     azure_resource_graph_client: ResourceGraphClient = None
     repository: Repository = None
+    subscriptions_ids: List[str] = []
+    key_paths_caches: Dict[str, KeyPathCache] = {}
+    flatten: bool = True
+    child_tables: bool = False
+    child_tables_names: Dict[str, str] = {}
+    checkpoints: Dict[str, Checkpoint] = {}
+    queries: List[str] = ["Resources"]
+    transform_workers: int = 0
+    scheduler: RequestScheduler = None
 
-    def __init__(self, credential: "TokenCredential", repository: Repository) -> None:
+    def __init__(
+        self,
+        credential: "TokenCredential",
+        repository: Repository,
+        client: ResourceGraphClient = None,
+        flatten: bool = True,
+        child_tables: bool = False,
+        profile: ExtractionProfile = None,
+        transform_workers: int = 0,
+        scheduler: RequestScheduler = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        credential : TokenCredential
+            Azure credential used to create the Resource Graph client
+        repository : Repository
+            The repository to store extracted resources to
+        client : ResourceGraphClient
+            Resource Graph client to use instead of creating one from the credential
+        flatten : bool
+            Flatten resources before adding them to the repository, unflattened resources
+            are stored by JSONSQLiteTarget as JSON documents
+        child_tables : bool
+            Add the elements of lists of flattened resources to child tables named after the
+            table of the resource and the key path of the list, with their parent_id and ordinal,
+            instead of flattening them to columns suffixed with their index
+        profile : ExtractionProfile
+            Resource types and properties to extract, all of them if None
+        transform_workers : int
+            Count of worker processes flattening resources and inferring the schemas of their
+            tables while the next page is queried, with 0 resources are flattened by the thread
+            querying them. Only resources are transformed by workers, resource containers are not
+        scheduler : RequestScheduler
+            Scheduler pacing the Resource Graph requests by the quota of the user, its maximum
+            concurrency is the concurrency of the extraction. The client created from the
+            credential does not retry throttled requests itself, they are left to the scheduler
+        """
         self.azure_credential = credential
         self.repository = repository
-        self.azure_resource_graph_client = ResourceGraphClient(
-            credential=self.azure_credential
+        self.azure_resource_graph_client = client or ResourceGraphClient(
+            credential=self.azure_credential, retry_policy=SchedulerRetryPolicy()
         )
+        self.subscriptions_ids = []
+        self.key_paths_caches = {}
+        self.flatten = flatten
+        self.child_tables = child_tables
+        self.child_tables_names = {}
+        self.checkpoints = {}
+        self.queries = (profile or ExtractionProfile()).queries()
+        self.transform_workers = transform_workers if flatten else 0
+        self.scheduler = scheduler or RequestScheduler()
+        self._transform_pool = None
+        self._repository_lock = threading.Lock()
+        self._failed = False
 
     def _normalize_resource_type(self, resource_type: str) -> str:
         """
@@ -40,43 +125,217 @@ class AzureARM:
         """
         return resource_type.lower().replace("/", "_").replace(".", "_")
 
-    def _get_generic_resource(self, resource: dict) -> dict:
+    def _add_resources_to_repository(self, resources: list) -> None:
+        """
+        Add resources to the repository
+        """
+        logger.info("Adding resources to repository")
+        logger.debug(f"Resources Count: {len(resources)}")
+
+        metrics.count("resources", len(resources))
+
+        if not self.flatten:
+            with metrics.phase("repository_add"):
+                self._add_raw_resources_to_repository(resources)
+            return
+
+        with metrics.phase("flatten"):
+            flattened_resources = []
+
+            for resource in resources:
+                normalized_resource_type = self._normalize_resource_type(resource["type"])
+                key_paths_cache = self.key_paths_caches.setdefault(
+                    normalized_resource_type, {}
+                )
+                child_rows = {} if self.child_tables else None
+                flattened_generic_resource, flattened_resource = (
+                    flatten_json_with_projection(
+                        resource, GENERIC_RESOURCE_PROJECTION, key_paths_cache, child_rows
+                    )
+                )
+                flattened_resources.append(
+                    (normalized_resource_type, flattened_generic_resource, flattened_resource, child_rows)
+                )
+
+        with metrics.phase("repository_add"):
+            for (
+                normalized_resource_type,
+                flattened_generic_resource,
+                flattened_resource,
+                child_rows,
+            ) in flattened_resources:
+                self.repository.add("az_resources", flattened_generic_resource)
+                self.repository.add(f"az_{normalized_resource_type}", flattened_resource)
+
+                if child_rows:
+                    self._add_child_rows_to_repository(f"az_{normalized_resource_type}", child_rows)
+
+    def _add_child_rows_to_repository(self, table_name: str, child_rows: ChildRows) -> None:
+        """
+        Add the rows of the elements of lists to the child tables of the table of their resource
+        """
+        for key_path, rows in child_rows.items():
+            child_table_key = f"{table_name}_{key_path}"
+            rows_table_name = self.child_tables_names.get(child_table_key)
+            if rows_table_name is None:
+                rows_table_name = self.child_tables_names[child_table_key] = (
+                    child_table_name(table_name, key_path)
+                )
+
+            for row in rows:
+                self.repository.add(rows_table_name, row)
+
+    def _add_transformed_resources_to_repository(self, page: TransformedPage) -> None:
+        """
+        Add the resources of a page transformed by the workers, with the schemas inferred over them
+        """
+        logger.info("Adding transformed resources to repository")
+        logger.debug(f"Resources Count: {page.resources_count}")
+
+        metrics.count("resources", page.resources_count)
+
+        with metrics.phase("transform_wait"):
+            tables = page.result()
+
+        with metrics.phase("repository_add"):
+            for table in tables:
+                self.repository.add_batch(table.table_name, table.resources(), table.schema)
+
+    def _transform_pages(
+        self, pages: Iterator[Tuple[list, str | None]]
+    ) -> Iterator[Tuple[TransformedPage, str | None, int]]:
         """
-        Get a generic resource with properties from Azure Resource Graph
+        Submit each page to the workers as soon as it is fetched and yield the previous one,
+        so that the next page is queried while a page is transformed
+        """
+        pending = None
+
+        for resources, skip_token in pages:
+            page = self._transform_pool.submit(resources, self._normalize_resource_type)
+
+            if pending is not None:
+                yield pending
+
+            pending = (page, skip_token, len(resources))
+
+        if pending is not None:
+            yield pending
+
+    def _add_raw_resources_to_repository(self, resources: list) -> None:
+        for resource in resources:
+            generic_resource = {}
+
+            for key, default in GENERIC_RESOURCE_PROJECTION.items():
+                value = resource.get(key, default)
+                if value is MISSING:
+                    raise KeyError(key)
+
+                generic_resource[key] = value
+
+            self.repository.add("az_resources", generic_resource)
+            self.repository.add(
+                f"az_{self._normalize_resource_type(resource['type'])}", resource
+            )
+
+    def _query_pages(
+        self, query: str, subscriptions: List[str] = None, skip_token: str = None
+    ) -> Iterator[Tuple[list, str | None]]:
+        """
+        Run a Resource Graph query and yield resources page by page following skip tokens,
+        with the skip token of the next page
 
         Parameters
         ----------
-        resource : dict
-            Azure Resource Graph resource
+        query : str
+            KQL query, example: "Resources"
+        subscriptions : List[str]
+            Subscriptions ids to scope the query to, all accessible subscriptions if None
+        skip_token : str
+            Skip token of the page to start from, the first page if None
+        """
+        request = {"query": query}
+        if subscriptions:
+            request["subscriptions"] = subscriptions
 
-        Returns
-        -------
-        dict
-            Generic resource with common to all Azure resources properties
+        while True:
+            response = self._query(
+                {**request, "options": {"$skipToken": skip_token}} if skip_token else request
+            )
+            yield response.data, response.skip_token
+
+            skip_token = response.skip_token
+            if not skip_token:
+                break
+
+    def _query(self, request: Dict) -> "QueryResponse":
+        """
+        Request a page of results through the scheduler and count it with its payload size
         """
-        return {
-            "id": resource["id"],
-            "name": resource["name"],
-            "type": resource["type"],
-            "location": resource.get("location", ""),
-            "tags": resource.get("tags", {})
-        }
+        with metrics.phase("resource_graph_query"):
+            response, payload_bytes = self.scheduler.run(
+                lambda: self.azure_resource_graph_client.resources(
+                    query=request, cls=_response_with_payload_size
+                )
+            )
 
-    def _add_resources_to_repository(self, resources: list) -> None:
+        metrics.count("pages")
+        metrics.count("payload_bytes", payload_bytes)
+
+        return response
+
+    def _add_partition_resources(self, query: str, subscriptions: List[str] = None) -> None:
         """
-        Add resources to the repository
+        Add the resources of the query page by page, a checkpoint is saved to the repository
+        after each page and the query resumes from the checkpoint of a previous run
+
+        Parameters
+        ----------
+        query : str
+            KQL query, example: "Resources"
+        subscriptions : List[str]
+            Subscriptions ids to scope the query to, all accessible subscriptions if None
         """
-        logger.info("Adding resources to repository")
-        logger.debug(f"Resources Count: {len(resources)}")
+        partition = f"{query}:{','.join(subscriptions)}" if subscriptions else query
+        checkpoint = self.checkpoints.get(partition) or Checkpoint(partition)
 
-        for resource in resources:
-            normalized_resource_type = self._normalize_resource_type(resource["type"])
-            generic_resource = self._get_generic_resource(resource)
-            flattened_generic_resource = flatten_json(generic_resource)
-            flattened_resource = flatten_json(resource)
+        if checkpoint.done:
+            logger.info(f"Skip {partition}, its {checkpoint.rows_count} resources were already extracted")
+            return
+
+        if checkpoint.skip_token:
+            logger.info(f"Resume {partition} after {checkpoint.rows_count} resources")
 
-            self.repository.add("az_resources", flattened_generic_resource)
-            self.repository.add(f"az_{normalized_resource_type}", flattened_resource)
+        pages = self._query_pages(query, subscriptions, checkpoint.skip_token)
+
+        if self._transform_pool is None:
+            pages = ((resources, skip_token, len(resources)) for resources, skip_token in pages)
+        else:
+            pages = self._transform_pages(pages)
+
+        for page, skip_token, resources_count in pages:
+            with self._repository_lock:
+                # Resources of a page which failed are pending in the repository, no other
+                # query may checkpoint them
+                if self._failed:
+                    logger.info(f"Stop {partition} after a failure of another query")
+                    return
+
+                try:
+                    if self._transform_pool is None:
+                        self._add_resources_to_repository(page)
+                    else:
+                        self._add_transformed_resources_to_repository(page)
+
+                    checkpoint = Checkpoint(
+                        partition,
+                        skip_token,
+                        checkpoint.rows_count + resources_count,
+                        done=not skip_token,
+                    )
+                    self.repository.checkpoint(checkpoint)
+                except BaseException:
+                    self._failed = True
+                    raise
 
     def _add_all_resource_containers(self) -> None:
         """
@@ -86,20 +345,30 @@ class AzureARM:
             "Getting from Az Resource Graph API all resource containers (management groups, subscriptions, resource group) to repository"
         )
 
-        query = {"query": "ResourceContainers"}
-
-        resource_containers_response = self.azure_resource_graph_client.resources(
-            query=query
-        )
+        self.subscriptions_ids = []
+        checkpoint = self.checkpoints.get("ResourceContainers")
+        rows_count = 0
 
-        self._add_resources_to_repository(resource_containers_response.data)
+        if checkpoint is not None:
+            logger.info("Resource containers were already extracted, query them again for subscriptions ids only")
 
-        while resource_containers_response.skip_token:
-            resource_containers_response = self.azure_resource_graph_client.resources(
-                query={**query, "$skipToken": resource_containers_response.skip_token}
+        for resource_containers, _ in self._query_pages("ResourceContainers"):
+            self.subscriptions_ids.extend(
+                container["subscriptionId"]
+                for container in resource_containers
+                if container["type"].lower() == "microsoft.resources/subscriptions"
             )
 
-            self._add_resources_to_repository(resource_containers_response.data)
+            if checkpoint is None:
+                self._add_resources_to_repository(resource_containers)
+                rows_count += len(resource_containers)
+
+        self.subscriptions_ids.sort()
+
+        if checkpoint is None:
+            self.repository.checkpoint(
+                Checkpoint("ResourceContainers", rows_count=rows_count, done=True)
+            )
 
     def _add_all_resources(self) -> None:
         """
@@ -107,25 +376,84 @@ class AzureARM:
         """
         logger.info("Getting from Az Resource Graph API all resources to repository")
 
-        query = {"query": "Resources"}
+        for query in self.queries:
+            self._add_partition_resources(query)
 
-        resources_response = self.azure_resource_graph_client.resources(query=query)
+    def _add_subscriptions_resources(self, subscriptions: List[str]) -> None:
+        """
+        Get all resources of the subscriptions, pages are added to the repository one at a time
+        """
+        logger.debug(f"Getting resources of subscriptions: {subscriptions}")
 
-        self._add_resources_to_repository(resources_response.data)
+        for query in self.queries:
+            self._add_partition_resources(query, subscriptions)
 
-        while resources_response.skip_token:
-            resources_response = self.azure_resource_graph_client.resources(
-                query={**query, "$skipToken": resources_response.skip_token}
-            )
+    def _add_all_resources_by_subscription(
+        self, concurrency: int, subscriptions_per_query: int
+    ) -> None:
+        """
+        Get all resources with one paginated query per batch of subscriptions, queries run concurrently
 
-            self._add_resources_to_repository(resources_response.data)
+        Parameters
+        ----------
+        concurrency : int
+            Maximum count of queries running at the same time
+        subscriptions_per_query : int
+            Count of subscriptions a single query is scoped to
+        """
+        logger.info(
+            "Getting from Az Resource Graph API all resources by subscription to repository"
+        )
+
+        subscriptions_batches = [
+            self.subscriptions_ids[i : i + subscriptions_per_query]
+            for i in range(0, len(self.subscriptions_ids), subscriptions_per_query)
+        ]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self._add_subscriptions_resources, subscriptions)
+                for subscriptions in subscriptions_batches
+            ]
 
-    def extract_all_resources(self) -> None:
+            for future in futures:
+                future.result()
+
+    def extract_all_resources(
+        self, concurrency: int = 1, subscriptions_per_query: int = 1
+    ) -> None:
         """
         Extract all resources from Azure Resource Graph and store them in the repository
+
+        Parameters
+        ----------
+        concurrency : int
+            With 1, all resources are read with a single query,
+            otherwise with one query per batch of subscriptions running concurrently
+        subscriptions_per_query : int
+            Count of subscriptions a single query is scoped to when concurrency is greater than 1,
+            an extraction is resumed with the same concurrency and subscriptions per query
         """
 
         logger.info("Extracting all resources from Azure Resource Graph")
 
+        self.checkpoints = self.repository.get_checkpoints()
+        self.scheduler.reset(concurrency)
+        self._failed = False
+
         self._add_all_resource_containers()
-        self._add_all_resources()
+
+        if self.transform_workers:
+            self._transform_pool = TransformPool(self.transform_workers, self.child_tables)
+
+        try:
+            if concurrency > 1:
+                self._add_all_resources_by_subscription(concurrency, subscriptions_per_query)
+            else:
+                self._add_all_resources()
+        finally:
+            if self._transform_pool is not None:
+                self._transform_pool.close()
+                self._transform_pool = None
+
+            logger.info(f"Resource Graph requests: {self.scheduler.stats.to_dict()}")
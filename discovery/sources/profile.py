@@ -0,0 +1,123 @@
+import re
+from typing import Dict, List
+from pydantic import BaseModel, Field, field_validator
+
+RESOURCE_TYPE_PATTERN = re.compile(r"^[\w.\-/]+$")
+
+PROPERTY_PATH_PATTERN = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*|\[\d+\])*$")
+"""
+Dotted path of a property with array indexes, like properties.ipConfigurations[0].name
+"""
+
+PROJECTED_COLUMNS = ["id", "name", "type", "location", "tags", "subscriptionId", "resourceGroup"]
+"""
+Columns of resources always projected, they hold the generic properties stored in az_resources
+"""
+
+
+def _quote(resource_type: str) -> str:
+    return f"'{resource_type.lower()}'"
+
+
+def property_alias(path: str) -> str:
+    """
+    Name of the projected property, the key flatten_json gives to the property
+    in the unprojected resource, like properties_ipConfigurations_0_name
+    """
+    return re.sub(r"\[(\d+)\]", r"_\1", path).replace(".", "_")
+
+
+class ExtractionProfile(BaseModel):
+    """
+    Resource types and properties to extract, compiled into the Resource Graph queries
+    so that unneeded resources and properties are filtered out by the service
+
+    Profiles are set in the DISCOVERY_EXTRACT_PROFILE environment variable as JSON, like
+    {"exclude_types": ["microsoft.insights/components"],
+     "properties": {"microsoft.compute/virtualmachines": ["properties.hardwareProfile.vmSize"]}}
+    """
+
+    include_types: List[str] = Field(default_factory=list)
+    """
+    Resource types to extract, all types if empty
+    """
+
+    exclude_types: List[str] = Field(default_factory=list)
+    """
+    Resource types not to extract, even if included
+    """
+
+    properties: Dict[str, List[str]] = Field(default_factory=dict)
+    """
+    Property paths to extract by resource type along with PROJECTED_COLUMNS,
+    all properties of types without paths are extracted
+    """
+
+    @field_validator("include_types", "exclude_types")
+    @classmethod
+    def _validate_types(cls, resource_types: List[str]) -> List[str]:
+        for resource_type in resource_types:
+            if not RESOURCE_TYPE_PATTERN.match(resource_type):
+                raise ValueError(f"Invalid resource type {resource_type!r}")
+
+        return [resource_type.lower() for resource_type in resource_types]
+
+    @field_validator("properties")
+    @classmethod
+    def _validate_properties(cls, properties: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        for resource_type, paths in properties.items():
+            if not RESOURCE_TYPE_PATTERN.match(resource_type):
+                raise ValueError(f"Invalid resource type {resource_type!r}")
+
+            for path in paths:
+                if not PROPERTY_PATH_PATTERN.match(path):
+                    raise ValueError(f"Invalid property path {path!r} of {resource_type}")
+
+        return {
+            resource_type.lower(): paths for resource_type, paths in properties.items() if paths
+        }
+
+    def _extracted(self, resource_type: str) -> bool:
+        return resource_type not in self.exclude_types and (
+            not self.include_types or resource_type in self.include_types
+        )
+
+    def queries(self, table: str = "Resources") -> List[str]:
+        """
+        Resource Graph queries extracting the resources of the profile from the table,
+        one query per type with projected properties and one query for other types
+
+        Returns
+        -------
+        List[str]
+            KQL queries, the bare table when the profile is empty
+        """
+        queries = []
+        projected_types = [t for t in self.properties if self._extracted(t)]
+
+        for resource_type in projected_types:
+            columns = PROJECTED_COLUMNS + [
+                f"{property_alias(path)} = {path}"
+                for path in self.properties[resource_type]
+                if property_alias(path) not in PROJECTED_COLUMNS
+            ]
+            queries.append(
+                f"{table} | where type =~ {_quote(resource_type)} | project {', '.join(columns)}"
+            )
+
+        filters = []
+
+        if self.include_types:
+            included_types = [t for t in self.include_types if self._extracted(t) and t not in projected_types]
+            if not included_types:
+                return queries
+
+            filters.append(f"type in~ ({', '.join(map(_quote, included_types))})")
+        else:
+            excluded_types = self.exclude_types + projected_types
+            if excluded_types:
+                filters.append(f"type !in~ ({', '.join(map(_quote, excluded_types))})")
+
+        queries.append(" | ".join([table] + [f"where {f}" for f in filters]))
+
+        return queries
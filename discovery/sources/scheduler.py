@@ -0,0 +1,307 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.policies import RetryPolicy
+from discovery.helpers.logging import get_logger
+from discovery.helpers.metrics import metrics
+
+logger = get_logger(__name__)
+
+QUOTA_REMAINING_HEADER = "x-ms-user-quota-remaining"
+QUOTA_RESETS_AFTER_HEADER = "x-ms-user-quota-resets-after"
+RETRY_AFTER_HEADER = "retry-after"
+
+THROTTLED_STATUS_CODE = 429
+
+
+def _header(headers: Dict[str, str], name: str) -> str | None:
+    """
+    Value of a header by its lowercase name, azure-core headers are case-insensitive but not plain dictionaries
+    """
+    value = headers.get(name)
+    if value is not None:
+        return value
+
+    return next((v for k, v in headers.items() if k.lower() == name), None)
+
+
+def parse_duration(value: str | None) -> float | None:
+    """
+    Seconds of a hh:mm:ss duration, like x-ms-user-quota-resets-after, or of a count of
+    seconds, like Retry-After, None if the value is missing or invalid
+    """
+    if value is None:
+        return None
+
+    try:
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+
+    return seconds if seconds >= 0 else None
+
+
+class SchedulerRetryPolicy(RetryPolicy):
+    """
+    Retry policy of the Resource Graph client leaving throttled requests to RequestScheduler,
+    the default policy of azure-core retries them before the scheduler sees the 429 status
+    and its quota headers. Other errors, like transient 5xx or connection errors, are still
+    retried by azure-core.
+    """
+
+    def is_retry(self, settings: Dict[str, Any], response: Any) -> bool:
+        if response.http_response.status_code == THROTTLED_STATUS_CODE:
+            return False
+
+        return super().is_retry(settings, response)
+
+
+class SchedulerStats:
+    """
+    Requests sent by the scheduler and the time spent waiting before sending them
+    """
+
+    requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    wait_seconds: float = 0.0
+    concurrency: int = 1
+
+    def __init__(self, concurrency: int = 1) -> None:
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+        self.concurrency = concurrency
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "concurrency": self.concurrency,
+        }
+
+
+class RequestScheduler:
+    """
+    Pace the requests of Resource Graph queries, from any thread, by the quota of the user
+
+    Resource Graph reports in the headers of each response the count of requests left to the
+    user and when that quota resets. Once the remaining quota is low, requests are spread evenly
+    over the time left until the reset, and none is sent while it is exhausted. The count of
+    requests in flight is halved when a request is throttled and grows back by one after as
+    many successful requests, up to max_concurrency.
+
+    Throttled requests are sent again as is, so a query continues from the same skip token,
+    after Retry-After, the reset of the quota or an exponential backoff, with jitter so that
+    queries throttled together are not retried together.
+    """
+
+    max_concurrency: int = 1
+    max_retries: int = 5
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 60.0
+    pace_below: int = 5
+    stats: SchedulerStats = None
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        pace_below: int = 5,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_concurrency : int
+            Maximum count of requests in flight
+        max_retries : int
+            Count of retries of a throttled request before its error is raised
+        backoff_seconds : float
+            Delay before the first retry of a throttled request without Retry-After nor quota
+            headers, doubled at each retry
+        max_backoff_seconds : float
+            Maximum delay before retrying a throttled request
+        pace_below : int
+            Remaining quota below which requests are spread until the quota resets
+        """
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.pace_below = pace_below
+        self._condition = threading.Condition()
+        self.reset(max_concurrency)
+
+    def reset(self, max_concurrency: int) -> None:
+        """
+        Forget the quota and the stats, before a new extraction
+
+        Parameters
+        ----------
+        max_concurrency : int
+            Maximum count of requests in flight
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
+
+        with self._condition:
+            self.max_concurrency = max_concurrency
+            self.stats = SchedulerStats(max_concurrency)
+            self._concurrency = max_concurrency
+            self._successes = 0
+            self._in_flight = 0
+            self._remaining = None
+            self._resets_at = None
+            self._not_before = 0.0
+
+    def _delay(self, now: float) -> float:
+        """
+        Seconds to wait before sending a request, called with the condition held
+        """
+        if self._resets_at is not None and now >= self._resets_at:
+            self._remaining = None
+            self._resets_at = None
+
+        delay = self._not_before - now
+
+        if self._remaining is not None and self._remaining - self._in_flight <= 0:
+            delay = max(delay, (self._resets_at or now) - now)
+
+        return delay
+
+    def _acquire(self, retry: bool) -> None:
+        """
+        Wait for a slot within the concurrency and the quota, then pace the next request
+        """
+        with self._condition:
+            start = time.monotonic()
+
+            while True:
+                now = time.monotonic()
+                delay = self._delay(now)
+
+                if delay <= 0 and self._in_flight < self._concurrency:
+                    break
+
+                self._condition.wait(delay if delay > 0 else None)
+
+            self._in_flight += 1
+            self.stats.requests += 1
+            self.stats.retries += retry
+            self.stats.wait_seconds += now - start
+
+            if (
+                self._remaining is not None
+                and self._resets_at is not None
+                and self._remaining < self.pace_below
+            ):
+                left = max(self._remaining - self._in_flight, 0) + 1
+                self._not_before = max(self._not_before, now + (self._resets_at - now) / left)
+
+    def _update_quota(self, headers: Dict[str, str]) -> None:
+        """
+        Update the quota from the headers of a response, until the quota resets the lowest
+        remaining quota is kept as responses of concurrent requests arrive in any order
+        """
+        remaining = _header(headers, QUOTA_REMAINING_HEADER)
+        if remaining is None or not remaining.isdigit():
+            return
+
+        now = time.monotonic()
+
+        if self._resets_at is not None and now < self._resets_at:
+            self._remaining = min(self._remaining, int(remaining))
+            return
+
+        resets_after = parse_duration(_header(headers, QUOTA_RESETS_AFTER_HEADER))
+        self._remaining = int(remaining)
+        self._resets_at = None if resets_after is None else now + resets_after
+
+    def _release(self, headers: Dict[str, str], throttled: bool, attempt: int = 0) -> None:
+        """
+        Free the slot of a request, update the quota from its headers and adapt the concurrency
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._update_quota(headers)
+
+            if throttled:
+                delay = parse_duration(_header(headers, RETRY_AFTER_HEADER))
+                if delay is None and self._resets_at is not None:
+                    delay = self._resets_at - time.monotonic()
+                if delay is None:
+                    delay = self.backoff_seconds * 2**attempt
+
+                backoff = min(self.backoff_seconds * 2**attempt, self.max_backoff_seconds)
+                delay = min(delay, self.max_backoff_seconds) + random.uniform(0, backoff)
+
+                self._concurrency = max(self._concurrency // 2, 1)
+                self._successes = 0
+                self._not_before = max(self._not_before, time.monotonic() + delay)
+                self.stats.throttled += 1
+
+                logger.info(
+                    f"Request throttled, retry in {delay:.1f}s with concurrency {self._concurrency}"
+                )
+            elif self._concurrency < self.max_concurrency:
+                self._successes += 1
+
+                if self._successes >= self._concurrency:
+                    self._concurrency += 1
+                    self._successes = 0
+
+            self.stats.concurrency = self._concurrency
+            self._condition.notify_all()
+
+    def run(self, send: Callable[[], Tuple[Any, Dict[str, str]]]) -> Any:
+        """
+        Send a request once the quota and the concurrency allow it, throttled requests are sent again
+
+        Parameters
+        ----------
+        send : Callable[[], Tuple[Any, Dict[str, str]]]
+            Send the request and return its result with the headers of its response
+
+        Returns
+        -------
+        Any
+            The result of the request
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.count("retries")
+
+            with metrics.phase("throttling_wait"):
+                self._acquire(attempt > 0)
+
+            try:
+                result, headers = send()
+            except HttpResponseError as error:
+                throttled = error.status_code == THROTTLED_STATUS_CODE
+                response = error.response
+                self._release({} if response is None else response.headers, throttled, attempt)
+
+                if not throttled:
+                    raise
+
+                metrics.count("throttled_requests")
+
+                if attempt == self.max_retries:
+                    raise
+
+                continue
+            except BaseException:
+                self._release({}, False)
+                raise
+
+            self._release(headers, False)
+
+            return result
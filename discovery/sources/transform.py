@@ -0,0 +1,232 @@
+import multiprocessing
+import sys
+import zlib
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from discovery.helpers.flatten_json import MISSING, KeyPathCache, flatten_json_with_projection
+from discovery.repository.targets.schema import TableSchema, normalize_column_name
+
+GENERIC_RESOURCE_PROJECTION = {
+    "id": MISSING,
+    "name": MISSING,
+    "type": MISSING,
+    "location": "",
+    "tags": {},
+}
+"""
+Properties common to all Azure resources with their default value, stored in az_resources
+"""
+
+GENERIC_RESOURCES_TABLE_NAME = "az_resources"
+
+_key_paths_caches: Dict[str, KeyPathCache] = {}
+"""
+Key paths caches by resource type of the worker process, resource types are sharded
+by worker so each cache is only filled by its worker
+"""
+
+
+def child_table_name(table_name: str, key_path: str) -> str:
+    """
+    Name of the child table of the elements of the list at the key path of resources of the table
+    """
+    return normalize_column_name(f"{table_name}_{key_path}")
+
+
+class TransformedTable:
+    """
+    Flattened resources of a table and the schema inferred over them, sent back by a worker
+    in a compact form: resources are tuples of values sharing the tuple of their keys
+    """
+
+    table_name: str = None
+    shapes: List[Tuple[str, ...]] = []
+    rows: List[tuple] = []
+    rows_shapes: array = None
+    schema: TableSchema = None
+
+    def __init__(self, table_name: str, resources: List[Dict]) -> None:
+        """
+        Parameters
+        ----------
+        table_name : str
+            The name of the table of the resources
+        resources : List[Dict]
+            The flattened resources, their schema is inferred without spilling columns
+        """
+        self.table_name = table_name
+        self.shapes = []
+        self.rows = []
+        self.rows_shapes = array("I")
+        self.schema = TableSchema(table_name, {}, max_columns=sys.maxsize)
+        self.schema.update(resources)
+
+        shapes_indexes = {}
+
+        for resource in resources:
+            keys = tuple(resource)
+            shape_index = shapes_indexes.get(keys)
+            if shape_index is None:
+                shape_index = shapes_indexes[keys] = len(self.shapes)
+                self.shapes.append(keys)
+
+            self.rows.append(tuple(resource.values()))
+            self.rows_shapes.append(shape_index)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def resources(self) -> List[Dict]:
+        """
+        The resources rebuilt as dictionaries
+        """
+        shapes = self.shapes
+
+        return [
+            dict(zip(shapes[shape_index], values))
+            for shape_index, values in zip(self.rows_shapes, self.rows)
+        ]
+
+
+def transform_shard(shard: List[Tuple[str, list]], child_tables: bool) -> List[TransformedTable]:
+    """
+    Flatten the resources of a shard of a page and infer the schemas of their tables, run in a worker
+
+    Parameters
+    ----------
+    shard : List[Tuple[str, list]]
+        Resources of the page by normalized resource type
+    child_tables : bool
+        Add the elements of lists to child tables, see AzureARM
+
+    Returns
+    -------
+    List[TransformedTable]
+        The generic resources of the shard, then the tables of each type followed by their child tables
+    """
+    generic_resources = []
+    tables = []
+
+    for normalized_resource_type, resources in shard:
+        table_name = f"az_{normalized_resource_type}"
+        key_paths_cache = _key_paths_caches.setdefault(normalized_resource_type, {})
+        flattened_resources = []
+        children: Dict[str, List[Dict]] = {}
+
+        for resource in resources:
+            child_rows = {} if child_tables else None
+            flattened_generic_resource, flattened_resource = flatten_json_with_projection(
+                resource, GENERIC_RESOURCE_PROJECTION, key_paths_cache, child_rows
+            )
+            generic_resources.append(flattened_generic_resource)
+            flattened_resources.append(flattened_resource)
+
+            if child_rows:
+                for key_path, rows in child_rows.items():
+                    children.setdefault(key_path, []).extend(rows)
+
+        tables.append(TransformedTable(table_name, flattened_resources))
+        tables.extend(
+            TransformedTable(child_table_name(table_name, key_path), rows)
+            for key_path, rows in children.items()
+        )
+
+    return [TransformedTable(GENERIC_RESOURCES_TABLE_NAME, generic_resources)] + tables
+
+
+class TransformedPage:
+    """
+    Page of resources being transformed by the workers
+    """
+
+    futures: List[Future] = []
+    resources_count: int = 0
+
+    def __init__(self, futures: List[Future], resources_count: int) -> None:
+        self.futures = futures
+        self.resources_count = resources_count
+
+    def result(self) -> List[TransformedTable]:
+        """
+        The tables of the page once transformed, in the order of the shards
+        """
+        return [table for future in self.futures for table in future.result()]
+
+
+class TransformPool:
+    """
+    Flatten pages of resources and infer the schemas of their tables in worker processes,
+    so that the main process only adds them to the repository and writes them to the target
+
+    Resources of a page are sharded by type, a type is always transformed by the same worker
+    which keeps its key paths cache warm. Each worker is a process pool of one process,
+    a page is transformed by all workers holding some of its types in parallel.
+    """
+
+    workers: int = 1
+    child_tables: bool = False
+    executors: List[ProcessPoolExecutor] = []
+
+    def __init__(self, workers: int, child_tables: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        workers : int
+            The count of worker processes
+        child_tables : bool
+            Add the elements of lists to child tables, see AzureARM
+        """
+        if workers < 1:
+            raise ValueError("workers must be greater than 0")
+
+        # spawned workers do not inherit the locks of the threads querying Resource Graph
+        context = multiprocessing.get_context("spawn")
+
+        self.workers = workers
+        self.child_tables = child_tables
+        self.executors = [ProcessPoolExecutor(1, mp_context=context) for _ in range(workers)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        for executor in self.executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, resources: list, normalize_resource_type: Callable[[str], str]) -> TransformedPage:
+        """
+        Submit the shards of a page to their workers
+
+        Parameters
+        ----------
+        resources : list
+            The resources of the page as returned by Resource Graph
+        normalize_resource_type : Callable[[str], str]
+            Normalize the type of a resource to the suffix of its table name
+        """
+        shards: List[List[Tuple[str, list]]] = [[] for _ in self.executors]
+        resources_by_type: Dict[str, list] = {}
+
+        for resource in resources:
+            normalized_resource_type = normalize_resource_type(resource["type"])
+            type_resources = resources_by_type.get(normalized_resource_type)
+
+            if type_resources is None:
+                type_resources = resources_by_type[normalized_resource_type] = []
+                worker = zlib.crc32(normalized_resource_type.encode()) % self.workers
+                shards[worker].append((normalized_resource_type, type_resources))
+
+            type_resources.append(resource)
+
+        return TransformedPage(
+            [
+                executor.submit(transform_shard, shard, self.child_tables)
+                for executor, shard in zip(self.executors, shards)
+                if shard
+            ],
+            len(resources),
+        )
@@ -19,7 +19,7 @@ def test_sqlite_repository_target(tmp_path):
 
     with sqlite3.connect(db_path) as target:
         cursor = target.cursor()
-        cursor.execute("SELECT * FROM sqlite_master WHERE type='table';")
+        cursor.execute("SELECT * FROM sqlite_master WHERE type='table' AND substr(name, 1, 1) != '_';")
         tables = cursor.fetchall()
         assert len(tables) == 1
 
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+
+def test_normalize_sql():
+    from discovery.agents.cache import normalize_sql
+
+    assert normalize_sql("SELECT  name\n FROM T WHERE name = 'A  B';") == normalize_sql(
+        "select name from t where name = 'A  B'"
+    )
+    assert normalize_sql("SELECT 'A'") != normalize_sql("SELECT 'a'")
+
+
+def test_result_cache_lru():
+    from discovery.agents.cache import ResultCache
+
+    cache = ResultCache(max_bytes=200)
+    db_path = __file__
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value * 20
+
+    assert cache.get_or_compute(db_path, "tool", "SELECT 1", lambda: compute("a")) == "a" * 20
+    assert cache.get_or_compute(db_path, "tool", "select 1;", lambda: compute("a")) == "a" * 20
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+    for query in ("SELECT 2", "SELECT 3", "SELECT 4"):
+        cache.get_or_compute(db_path, "tool", query, lambda: compute("b"))
+
+    assert cache.size <= 200
+    cache.get_or_compute(db_path, "tool", "SELECT 1", lambda: compute("a"))
+    assert calls == ["a", "b", "b", "b", "a"]
+
+
+def test_execute_select_query_cached(tmp_path):
+    import sqlite3
+    from discovery.agents.cache import file_identity, results_cache
+    from discovery.agents.sqlite import execute_select_query, get_table_schema
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        target.save({"resource_type_1": [{"id": "id_1", "name": "a"}]})
+
+    hits = results_cache.hits
+
+    assert execute_select_query(str(db_path), "SELECT name FROM resource_type_1") == "name\na"
+    assert execute_select_query(str(db_path), "select name from resource_type_1;") == "name\na"
+    get_table_schema(str(db_path), "resource_type_1")
+    get_table_schema(str(db_path), "resource_type_1")
+
+    assert results_cache.hits == hits + 2
+
+    identity = file_identity(str(db_path))
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE resource_type_1 SET name = 'b'")
+
+    assert file_identity(str(db_path)) != identity
@@ -0,0 +1,48 @@
+import sqlite3
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        target.save({"az_resources": [{"id": "id_1", "name": "a"}]})
+
+    return str(db_path)
+
+
+def test_connection_pool_reuses_connections(db_path):
+    from discovery.agents.connections import SQLiteConnectionPool
+
+    pool = SQLiteConnectionPool()
+    conn = pool.get(db_path)
+
+    assert pool.get(str(Path(db_path).parent / "." / "test.db")) is conn
+    assert conn.execute("SELECT name FROM az_resources").fetchall() == [("a",)]
+
+    pool.close()
+
+    assert pool.connections == {}
+    assert pool.get(db_path) is not conn
+
+
+def test_connection_pool_is_read_only(db_path):
+    from discovery.agents.connections import SQLiteConnectionPool
+
+    conn = SQLiteConnectionPool().get(db_path)
+
+    for query in (
+        "DELETE FROM az_resources",
+        "CREATE TABLE t (a)",
+        "CREATE TEMP TABLE t (a)",
+        "ATTACH DATABASE ':memory:' AS other",
+        "PRAGMA query_only = OFF",
+    ):
+        with pytest.raises(sqlite3.Error):
+            conn.execute(query)
+
+    assert conn.execute("PRAGMA table_info(az_resources)").fetchall()
@@ -0,0 +1,70 @@
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    from discovery.repository.targets import DuckDBTarget
+
+    db_path = Path(tmp_path / "test.duckdb")
+
+    with DuckDBTarget(db_path) as target:
+        target.save(
+            {"resource_type_1": [{"id": f"id_{i}", "location": f"l_{i % 3}"} for i in range(300)]}
+        )
+
+    return str(db_path)
+
+
+def test_duckdb_tools(db_path):
+    from discovery.agents.duckdb import execute_select_query, get_table_schema, list_tables_names
+
+    assert list_tables_names(db_path) == "resource_type_1"
+    assert "location VARCHAR" not in get_table_schema(db_path, "resource_type_1")
+    assert "location TEXT, 0% NULL, 3 distinct values" in get_table_schema(db_path, "resource_type_1")
+    assert execute_select_query(
+        db_path, "SELECT location, COUNT(*) AS n FROM resource_type_1 GROUP BY location ORDER BY location"
+    ) == "location\tn\nl_0\t100\nl_1\t100\nl_2\t100"
+
+
+def test_duckdb_tools_paginate(db_path):
+    from discovery.agents.duckdb import execute_select_query
+
+    query = "SELECT id FROM resource_type_1 ORDER BY id"
+    lines = execute_select_query(db_path, query).split("\n")
+
+    assert len(lines) == 202
+    assert "of 300 are shown" in lines[-1]
+
+    cursor_token = lines[-1].split("cursor_token='")[1].split("'")[0]
+    lines = execute_select_query(db_path, query, cursor_token).split("\n")
+
+    assert len(lines) == 101
+
+
+def test_duckdb_tools_read_only(db_path):
+    from discovery.agents.duckdb import execute_select_query
+
+    for query in ["CREATE TEMP TABLE t AS SELECT 1", "SELECT * FROM read_csv('/etc/passwd')"]:
+        with pytest.raises(Exception):
+            execute_select_query(db_path, query)
+
+
+def test_duckdb_tools_paginate_unordered_query(db_path):
+    import duckdb
+    from discovery.agents.duckdb import _is_ordered, execute_select_query
+
+    conn = duckdb.connect()
+    assert _is_ordered(conn, "SELECT id FROM t ORDER BY id LIMIT 3")
+    assert _is_ordered(conn, "SELECT id FROM t UNION SELECT id FROM u ORDER BY 1")
+    assert not _is_ordered(conn, "SELECT id, row_number() OVER (ORDER BY id) FROM t")
+    assert not _is_ordered(conn, "SELECT * FROM (SELECT id FROM t ORDER BY id)")
+
+    query = "SELECT location, id FROM resource_type_1 GROUP BY location, id"
+    lines = execute_select_query(db_path, query).split("\n")
+    rows = lines[1:201]
+
+    cursor_token = lines[-1].split("cursor_token='")[1].split("'")[0]
+    rows += execute_select_query(db_path, query, cursor_token).split("\n")[1:]
+
+    assert rows == sorted(f"l_{i % 3}\tid_{i}" for i in range(300))
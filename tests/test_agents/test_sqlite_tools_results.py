@@ -0,0 +1,101 @@
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        target.save(
+            {"resource_type_1": [{"id": f"id_{i}", "name": f"name_{i}"} for i in range(25)]}
+        )
+
+    return str(db_path)
+
+
+@pytest.fixture
+def budget():
+    from discovery.agents.sqlite import results_budget
+
+    max_rows, max_bytes, timeout_seconds = (
+        results_budget.max_rows,
+        results_budget.max_bytes,
+        results_budget.timeout_seconds,
+    )
+    yield results_budget
+
+    results_budget.max_rows = max_rows
+    results_budget.max_bytes = max_bytes
+    results_budget.timeout_seconds = timeout_seconds
+
+
+def test_execute_select_query_within_budget(db_path, budget):
+    from discovery.agents.sqlite import execute_select_query
+
+    response = execute_select_query(db_path, "SELECT id FROM resource_type_1 WHERE id = 'id_3'")
+
+    assert response == "id\nid_3"
+
+
+def test_execute_select_query_paginates(db_path, budget):
+    from discovery.agents.sqlite import execute_select_query
+
+    budget.max_rows = 10
+    query = "SELECT id FROM resource_type_1 ORDER BY rowid;"
+    ids = []
+    cursor_token = None
+
+    for _ in range(3):
+        response = execute_select_query(db_path, query, cursor_token)
+        lines = response.split("\n")
+        assert lines[0] == "id"
+
+        if lines[-1].startswith("-- Truncated"):
+            assert "of 25 are shown" in lines[-1]
+            cursor_token = lines[-1].split("cursor_token='")[1].split("'")[0]
+            lines = lines[:-1]
+        else:
+            cursor_token = None
+
+        ids += lines[1:]
+
+    assert ids == [f"id_{i}" for i in range(25)]
+    assert cursor_token is None
+
+
+def test_execute_select_query_bytes_budget(db_path, budget):
+    from discovery.agents.sqlite import execute_select_query
+
+    budget.max_bytes = 40
+
+    lines = execute_select_query(db_path, "SELECT id FROM resource_type_1").split("\n")
+
+    assert len(lines) < 10
+    assert "of 25 are shown" in lines[-1]
+
+
+def test_execute_select_query_rejects_token_of_another_query(db_path, budget):
+    from discovery.agents.results import encode_cursor_token
+    from discovery.agents.sqlite import execute_select_query
+
+    with pytest.raises(ValueError):
+        execute_select_query(
+            db_path, "SELECT id FROM resource_type_1", encode_cursor_token("SELECT 1", 10)
+        )
+
+
+def test_execute_select_query_time_limit(db_path, budget):
+    from discovery.agents.results import QueryInterrupted
+    from discovery.agents.sqlite import execute_select_query
+
+    budget.timeout_seconds = 0.1
+
+    with pytest.raises(QueryInterrupted):
+        execute_select_query(
+            db_path,
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+            "SELECT COUNT(*) FROM n",
+        )
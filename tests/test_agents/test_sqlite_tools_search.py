@@ -0,0 +1,70 @@
+from pathlib import Path
+
+
+def resources(names):
+    return {
+        "az_microsoft_keyvault_vaults": [
+            {"id": f"/vaults/{name}", "name": name, "type": "microsoft.keyvault/vaults", "tags_env": "prod-westeu"}
+            for name in names
+        ],
+        "az_microsoft_web_sites": [
+            {"id": "/sites/app", "name": "app", "properties_keyvaultid": f"/vaults/{names[0]}"}
+        ],
+    }
+
+
+def test_search_resources(tmp_path):
+    from discovery.agents.sqlite import search_resources
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path, full_text_search=True) as target:
+        target.save(resources(["kv-1", "kv-2"]))
+
+    response = search_resources(str(db_path), "prod-westeu").split("\n")
+    assert response[0] == "id\ttables"
+    assert sorted(response[1:]) == [
+        "/vaults/kv-1\taz_microsoft_keyvault_vaults",
+        "/vaults/kv-2\taz_microsoft_keyvault_vaults",
+    ]
+
+    assert sorted(search_resources(str(db_path), "kv-1").split("\n")[1:]) == [
+        "/sites/app\taz_microsoft_web_sites",
+        "/vaults/kv-1\taz_microsoft_keyvault_vaults",
+    ]
+
+
+def test_search_resources_without_index(tmp_path):
+    from discovery.agents.sqlite import search_resources
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        target.save(resources(["kv-1"]))
+
+    assert "not available" in search_resources(str(db_path), "kv-1")
+
+
+def test_search_resources_incremental(tmp_path):
+    from discovery.agents.sqlite import search_resources
+    from discovery.repository.targets import IncrementalSQLiteTarget
+
+    full_path = Path(tmp_path / "full.db")
+    incremental_path = Path(tmp_path / "incremental.db")
+
+    with IncrementalSQLiteTarget(full_path, full_text_search=True) as target:
+        target.save(resources(["kv-1", "kv-2", "kv-3"]))
+
+    with IncrementalSQLiteTarget(incremental_path, base_path=full_path, full_text_search=True) as target:
+        data = resources(["kv-1", "kv-2"])
+        data["az_microsoft_keyvault_vaults"][1]["tags_env"] = "dev"
+        target.save(data)
+
+    assert search_resources(str(incremental_path), "prod-westeu").split("\n")[1:] == [
+        "/vaults/kv-1\taz_microsoft_keyvault_vaults"
+    ]
+    assert search_resources(str(incremental_path), "kv-2 dev").split("\n")[1:] == [
+        "/vaults/kv-2\taz_microsoft_keyvault_vaults"
+    ]
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+
+def test_sqlite_tools_describe_spilled_columns(tmp_path):
+    from discovery.agents.sqlite import get_table_schema, list_tables_names
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path, max_columns=3) as target:
+        target.save({"resource_type_1": [{"id": "id_1", "name": "a", "tags_0": "b", "tags_1": "c"}]})
+
+    assert list_tables_names(str(db_path)) == "resource_type_1"
+    assert "json_extract(_spilled, '$.tags_1') TEXT, 0% NULL, 1 distinct values, values examples: c" in get_table_schema(
+        str(db_path), "resource_type_1"
+    )
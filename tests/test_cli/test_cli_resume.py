@@ -0,0 +1,63 @@
+import json
+import pytest
+
+
+def extract(target_path, client, *options):
+    from unittest import mock
+    from click.testing import CliRunner
+    from discovery.cli import cli
+
+    with mock.patch("azure.identity.DefaultAzureCredential"), mock.patch(
+        "discovery.sources.azure_arm.ResourceGraphClient", return_value=client
+    ):
+        return CliRunner().invoke(cli, ["extract", "--target-path", str(target_path), *options])
+
+
+def failing_client(resources, resource_containers):
+    from benchmarks.synthetic import FakeResourceGraphClient
+
+    class FailingResourceGraphClient(FakeResourceGraphClient):
+        def _response(self, query):
+            response = super()._response(query)
+            if self.requests_count == 3:
+                raise RuntimeError("Connection reset")
+
+            return response
+
+    return FailingResourceGraphClient(resources, resource_containers, page_size=10)
+
+
+@pytest.mark.parametrize("options", [["--incremental"], ["--bulk-load"]])
+def test_extract_resume_rejects_non_resumable_extraction(tmp_path, options):
+    from benchmarks.synthetic import generate_tenant
+
+    resource_containers, resources = generate_tenant(2, 20)
+
+    result = extract(tmp_path, failing_client(resources, resource_containers), "--stream", *options)
+    assert result.exit_code != 0
+
+    manifest = json.loads((tmp_path / "snapshots.json").read_text())["snapshots"]
+    assert [(e["status"], e["resumable"]) for e in manifest] == [("partial", False)]
+
+    result = extract(tmp_path, failing_client(resources, resource_containers), "--stream", "--resume")
+    assert result.exit_code != 0
+    assert "No interrupted resumable extraction" in result.output
+
+    assert json.loads((tmp_path / "snapshots.json").read_text())["snapshots"] == manifest
+
+
+def test_extract_resume_continues_resumable_extraction(tmp_path):
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+
+    resource_containers, resources = generate_tenant(2, 20)
+
+    result = extract(tmp_path, failing_client(resources, resource_containers), "--stream")
+    assert result.exit_code != 0
+
+    client = FakeResourceGraphClient(resources, resource_containers, page_size=10)
+    result = extract(tmp_path, client, "--stream", "--resume")
+    assert result.exit_code == 0, result.output
+
+    manifest = json.loads((tmp_path / "snapshots.json").read_text())["snapshots"]
+    assert [e["status"] for e in manifest] == ["complete"]
+    assert manifest[0]["tables_rows_counts"]["az_resources"] == len(resources) + len(resource_containers)
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import pytest
+
+
+def imported_modules(statement: str, extra_env: dict = None) -> set:
+    env = {k: v for k, v in os.environ.items() if not k.upper().startswith("DISCOVERY_")}
+    process = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**env, **(extra_env or {}), "PYTHONPATH": os.getcwd()},
+    )
+
+    return set(process.stdout.split())
+
+
+def test_cli_imports_without_settings_nor_heavy_dependencies():
+    modules = imported_modules("import discovery.cli")
+
+    assert "discovery.settings" not in modules
+    assert "smolagents" not in modules
+    assert "duckdb" not in modules
+
+
+def test_extract_does_not_import_duckdb_nor_agents(tmp_path):
+    from benchmarks.bench_startup import command_statement
+
+    modules = imported_modules(command_statement(["extract", "--target-path", str(tmp_path)]))
+
+    assert "discovery.repository.targets.sqlite" in modules
+    assert "duckdb" not in modules
+    assert "smolagents" not in modules
+
+
+def test_run_does_not_import_duckdb_nor_azure_sdk(tmp_path):
+    from benchmarks.bench_startup import AGENT_ENVIRONMENT, command_statement
+
+    modules = imported_modules(
+        command_statement(["run", "--target-path", str(tmp_path), "--query", "count resources"]),
+        AGENT_ENVIRONMENT,
+    )
+
+    assert "discovery.agents.sqlite" in modules
+    assert "duckdb" not in modules
+    assert "azure.mgmt.resourcegraph" not in modules
+
+
+def test_extract_settings_without_agent_settings(monkeypatch):
+    from discovery.settings import AgentSettings, ExtractSettings
+
+    for name in list(os.environ):
+        if name.upper().startswith("DISCOVERY_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("DISCOVERY_EXTRACT_TARGET_FOLDER_PATH", "snapshots")
+
+    assert ExtractSettings(_env_file=None).extract_target_folder_path == "snapshots"
+
+    with pytest.raises(ValueError, match="azure_openai_key"):
+        AgentSettings(_env_file=None)
+
+
+def test_lazy_exports():
+    modules = imported_modules(
+        "from discovery.repository.targets import DuckDBTarget; import discovery.agents"
+    )
+
+    assert "duckdb" in modules
+    assert "smolagents" not in modules
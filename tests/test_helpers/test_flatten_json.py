@@ -0,0 +1,99 @@
+import pytest
+
+
+def test_flatten_json():
+    from discovery.helpers.flatten_json import flatten_json
+
+    assert flatten_json({"a": 1, "b": {"c": "x", "d": [1, {"e": None}]}, "f": {}, "g": []}) == {
+        "a": 1,
+        "b_c": "x",
+        "b_d_0": 1,
+        "b_d_1_e": None,
+    }
+    assert flatten_json([{"a": 1}, 2]) == {"0_a": 1, "1": 2}
+    assert flatten_json({"": {"a": 1}}) == {"_a": 1}
+
+
+def test_flatten_json_deeply_nested():
+    from discovery.helpers.flatten_json import flatten_json
+
+    nested = "leaf"
+    for _ in range(10000):
+        nested = {"a": [nested]}
+
+    flattened = flatten_json(nested)
+
+    assert list(flattened.values()) == ["leaf"]
+    assert len(next(iter(flattened))) == 10000 * 4 - 1
+
+
+def test_flatten_json_reuses_cached_keys():
+    from discovery.helpers.flatten_json import flatten_json
+
+    cache = {}
+    first = flatten_json({"properties": {"state": "a"}}, cache)
+    second = flatten_json({"properties": {"state": "b"}}, cache)
+
+    assert next(iter(first)) is next(iter(second))
+
+
+def test_flatten_json_with_projection():
+    from discovery.helpers.flatten_json import MISSING, flatten_json, flatten_json_with_projection
+
+    projection = {"id": MISSING, "name": MISSING, "location": "", "tags": {}}
+    resource = {"name": "vm", "id": "/vm", "tags": {"env": "prod"}, "properties": {"tags": {"x": 1}}}
+
+    projected, flattened = flatten_json_with_projection(resource, projection)
+
+    assert list(projected.items()) == [("id", "/vm"), ("name", "vm"), ("location", ""), ("tags_env", "prod")]
+    assert flattened == flatten_json(resource)
+
+    with pytest.raises(KeyError):
+        flatten_json_with_projection({"name": "vm"}, projection)
+
+
+def test_flatten_json_with_projection_child_rows():
+    from discovery.helpers.flatten_json import MISSING, flatten_json_with_projection
+
+    resource = {
+        "id": "/nic",
+        "properties": {
+            "ipConfigurations": [
+                {"name": "a", "properties": {"subnets": [{"id": "/s1"}, {"id": "/s2"}]}},
+                {"name": "b", "properties": {"subnets": []}},
+            ],
+            "dnsServers": ["10.0.0.1", ["x"]],
+        },
+    }
+    child_rows = {}
+
+    _, flattened = flatten_json_with_projection(resource, {"id": MISSING}, child_rows=child_rows)
+
+    assert flattened == {"id": "/nic"}
+    assert child_rows == {
+        "properties_ipConfigurations": [
+            {"id": "/nic/properties_ipConfigurations/0", "parent_id": "/nic", "ordinal": 0, "value_name": "a"},
+            {"id": "/nic/properties_ipConfigurations/1", "parent_id": "/nic", "ordinal": 1, "value_name": "b"},
+        ],
+        "properties_dnsServers": [
+            {"id": "/nic/properties_dnsServers/0", "parent_id": "/nic", "ordinal": 0, "value": "10.0.0.1"},
+            {"id": "/nic/properties_dnsServers/1", "parent_id": "/nic", "ordinal": 1},
+        ],
+        "properties_dnsServers_value": [
+            {"id": "/nic/properties_dnsServers/1/value/0", "parent_id": "/nic/properties_dnsServers/1", "ordinal": 0, "value": "x"},
+        ],
+        "properties_ipConfigurations_value_properties_subnets": [
+            {
+                "id": "/nic/properties_ipConfigurations/0/value_properties_subnets/0",
+                "parent_id": "/nic/properties_ipConfigurations/0",
+                "ordinal": 0,
+                "value_id": "/s1",
+            },
+            {
+                "id": "/nic/properties_ipConfigurations/0/value_properties_subnets/1",
+                "parent_id": "/nic/properties_ipConfigurations/0",
+                "ordinal": 1,
+                "value_id": "/s2",
+            },
+        ],
+    }
@@ -0,0 +1,63 @@
+import time
+import pytest
+
+
+def test_metrics_phases():
+    from discovery.helpers.metrics import ExtractionMetrics
+
+    metrics = ExtractionMetrics()
+
+    with metrics.phase("outer"):
+        time.sleep(0.02)
+
+        for _ in range(2):
+            with metrics.phase("inner"):
+                time.sleep(0.01)
+
+    metrics.count("pages")
+    metrics.count("payload_bytes", 100)
+    report = metrics.report({"az_resources": {"rows": 1, "columns": 2}})
+
+    outer, inner = report["phases"]["outer"], report["phases"]["inner"]
+    assert inner["calls"] == 2
+    assert outer["wall_seconds"] >= 0.04
+    assert outer["self_wall_seconds"] == pytest.approx(outer["wall_seconds"] - inner["wall_seconds"], abs=1e-5)
+    assert report["counters"] == {"pages": 1, "payload_bytes": 100}
+    assert report["tables"] == {"az_resources": {"rows": 1, "columns": 2}}
+    assert report["peak_memory_bytes"] > 0
+
+
+def test_extraction_metrics(tmp_path):
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+    from discovery.helpers.metrics import metrics
+    from discovery.repository import StreamingRepository
+    from discovery.repository.targets import SQLiteTarget
+    from discovery.sources.azure_arm import AzureARM
+
+    resource_containers, resources = generate_tenant(subscriptions_count=2, resources_per_subscription=30)
+    metrics.reset()
+
+    with SQLiteTarget(tmp_path / "snapshot.db") as target:
+        repository = StreamingRepository(target, batch_size=10)
+        client = FakeResourceGraphClient(resources, resource_containers, page_size=25)
+        AzureARM(None, repository, client=client).extract_all_resources()
+        repository.save_to(target)
+
+    report = metrics.report()
+
+    assert set(report["phases"]) >= {
+        "resource_graph_query",
+        "flatten",
+        "repository_add",
+        "schema_inference",
+        "insert",
+        "finalize",
+        "create_indexes",
+        "save_catalog",
+    }
+    assert report["counters"]["pages"] == 1 + 3
+    assert report["counters"]["resources"] == len(resources) + len(resource_containers)
+    assert report["counters"]["payload_bytes"] > 0
+
+    repository_add = report["phases"]["repository_add"]
+    assert repository_add["self_wall_seconds"] < repository_add["wall_seconds"]
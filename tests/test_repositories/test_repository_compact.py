@@ -0,0 +1,66 @@
+import sqlite3
+from pathlib import Path
+
+
+def test_repository_compact_shares_keys_of_shapes():
+    from discovery.repository import CompactMemoryRepository
+
+    repository = CompactMemoryRepository()
+    assert repository.get_all() == {}
+
+    repository.add("resource_type_1", {"id": "id_1", "name": "name_1"})
+    repository.add("resource_type_1", {"id": "id_2", "name": "name_2"})
+    repository.add("resource_type_1", {"id": "id_3", "location": "westeurope"})
+
+    assert repository.get_all_by_type("resource_type_1") == [
+        {"id": "id_1", "name": "name_1"},
+        {"id": "id_2", "name": "name_2"},
+        {"id": "id_3", "location": "westeurope"},
+    ]
+    assert repository.get_all_by_type("resource_type_2") == []
+    assert repository.get_count_by_type("resource_type_1") == 3
+    assert len(repository.tables["resource_type_1"].shapes) == 2
+
+
+def test_repository_compact_replaces_duplicates():
+    from discovery.repository import CompactMemoryRepository
+
+    repository = CompactMemoryRepository()
+
+    repository.add("resource_type_1", {"id": "id_1", "name": "name_1"})
+    repository.add("resource_type_1", {"id": "id_2", "name": "name_2"})
+    repository.add("resource_type_1", {"id": "id_1", "name": "name_1", "location": "westeurope"})
+
+    assert repository.get_all() == {
+        "resource_type_1": [
+            {"id": "id_1", "name": "name_1", "location": "westeurope"},
+            {"id": "id_2", "name": "name_2"},
+        ]
+    }
+    assert repository.duplicates_count == 1
+
+
+def test_repository_compact_saves_by_batches(tmp_path):
+    from discovery.repository import CompactMemoryRepository
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+    repository = CompactMemoryRepository(batch_size=10)
+
+    for i in range(25):
+        repository.add("resource_type_1", {"id": f"id_{i % 20}", "name": f"name_{i}"})
+
+    with SQLiteTarget(db_path) as target:
+        repository.save_to(target)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM resource_type_1").fetchone() == (20,)
+        assert conn.execute("SELECT name FROM resource_type_1 WHERE id = 'id_0'").fetchone() == ("name_20",)
+
+
+def test_repository_memory_counts_by_instance():
+    from discovery.repository import MemoryRepository
+
+    MemoryRepository().add("resource_type_1", {"id": "id_1"})
+
+    assert MemoryRepository().get_count_by_type("resource_type_1") == 0
@@ -0,0 +1,46 @@
+import sqlite3
+from pathlib import Path
+
+
+def test_repository_streaming_writes_bounded_batches(tmp_path):
+    from discovery.repository import StreamingRepository
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        repository = StreamingRepository(target, batch_size=10)
+
+        for i in range(25):
+            repository.add("resource_type_1", {"id": f"id_{i}", "name": f"name_{i}"})
+            assert len(repository.get_all_by_type("resource_type_1")) < 10
+
+        assert repository.get_count_by_type("resource_type_1") == 25
+
+        repository.save_to(target)
+        assert repository.get_all_by_type("resource_type_1") == []
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM resource_type_1").fetchone() == (25,)
+
+
+def test_repository_streaming_evolves_table_schema(tmp_path):
+    from discovery.repository import StreamingRepository
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        repository = StreamingRepository(target, batch_size=2)
+
+        repository.add("resource_type_1", {"id": "id_1", "key1": "value1"})
+        repository.add("resource_type_1", {"id": "id_2", "key1": "value2"})
+        repository.add("resource_type_1", {"id": "id_3", "key-2": 3})
+        repository.save_to(target)
+
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(resource_type_1)")]
+        assert columns == ["id", "key1", "key_2"]
+
+        rows = conn.execute("SELECT id, key1, key_2 FROM resource_type_1 ORDER BY id").fetchall()
+        assert rows == [("id_1", "value1", None), ("id_2", "value2", None), ("id_3", None, 3)]
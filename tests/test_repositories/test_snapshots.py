@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def test_snapshots_manifest_resolves_latest_and_as_of(tmp_path):
+    from discovery.repository.snapshots import (
+        SNAPSHOT_COMPLETE,
+        SNAPSHOT_PARTIAL,
+        SnapshotsManifest,
+        get_latest_snapshot_path,
+    )
+
+    manifest = SnapshotsManifest(tmp_path)
+    now = datetime.now()
+
+    manifest.record(tmp_path / "extract_2.db", SNAPSHOT_COMPLETE, now - timedelta(hours=1), {"t": 2})
+    manifest.record(tmp_path / "extract_1.db", SNAPSHOT_COMPLETE, now - timedelta(hours=2), {"t": 1})
+    manifest.record(tmp_path / "extract_3.db", SNAPSHOT_PARTIAL, now)
+
+    assert [e["file_name"] for e in manifest.read()] == [
+        "extract_1.db",
+        "extract_2.db",
+        "extract_3.db",
+    ]
+    assert get_latest_snapshot_path(tmp_path) == tmp_path / "extract_2.db"
+    assert get_latest_snapshot_path(
+        tmp_path, (now - timedelta(minutes=90)).isoformat()
+    ) == tmp_path / "extract_1.db"
+    assert get_latest_snapshot_path(tmp_path, now - timedelta(hours=3)) is None
+
+    manifest.record(tmp_path / "extract_3.db", SNAPSHOT_COMPLETE, now, {"t": 3})
+
+    assert get_latest_snapshot_path(tmp_path) == tmp_path / "extract_3.db"
+    assert manifest.read()[-1]["tables_rows_counts"] == {"t": 3}
+    assert sorted(os.listdir(tmp_path)) == [".snapshots.json.lock", "snapshots.json"]
+    assert len(json.loads(Path(tmp_path / "snapshots.json").read_text())["snapshots"]) == 3
+
+
+def test_snapshots_manifest_resolves_resumable(tmp_path):
+    from discovery.repository.snapshots import SNAPSHOT_COMPLETE, SNAPSHOT_PARTIAL, SnapshotsManifest
+
+    manifest = SnapshotsManifest(tmp_path)
+    now = datetime.now()
+
+    assert manifest.resolve_resumable() is None
+
+    manifest.record(tmp_path / "extract_1.db", SNAPSHOT_PARTIAL, now - timedelta(hours=2), resumable=True)
+    assert manifest.resolve_resumable()["file_name"] == "extract_1.db"
+
+    manifest.record(tmp_path / "extract_2.db", SNAPSHOT_COMPLETE, now - timedelta(hours=1))
+    assert manifest.resolve_resumable() is None
+
+    manifest.record(tmp_path / "extract_3.db", SNAPSHOT_PARTIAL, now)
+    assert manifest.resolve_resumable() is None
+
+    manifest.record(tmp_path / "extract_4.duckdb", SNAPSHOT_PARTIAL, now + timedelta(hours=1))
+    manifest.record(tmp_path / "extract_3.db", SNAPSHOT_PARTIAL, now, resumable=True)
+    assert manifest.resolve_resumable(suffix=".db")["file_name"] == "extract_3.db"
+
+
+def record_snapshots(target_path, first, count):
+    from discovery.repository.snapshots import SNAPSHOT_COMPLETE, SnapshotsManifest
+
+    manifest = SnapshotsManifest(target_path)
+    for i in range(first, first + count):
+        manifest.record(Path(target_path) / f"extract_{i}.db", SNAPSHOT_COMPLETE, datetime.now())
+
+
+def test_snapshots_manifest_concurrent_writers(tmp_path):
+    import multiprocessing
+    from discovery.repository.snapshots import SnapshotsManifest
+
+    context = multiprocessing.get_context("spawn")
+    writers = [
+        context.Process(target=record_snapshots, args=(str(tmp_path), first, 20))
+        for first in (0, 100)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert [writer.exitcode for writer in writers] == [0, 0]
+    assert {e["file_name"] for e in SnapshotsManifest(tmp_path).read()} == {
+        f"extract_{i}.db" for first in (0, 100) for i in range(first, first + 20)
+    }
+
+
+def test_get_latest_snapshot_path_without_manifest(tmp_path):
+    from discovery.repository.snapshots import get_latest_snapshot_path
+
+    for i, file_name in enumerate(["extract_1.db", "extract_2.db", "notes.txt"]):
+        path = tmp_path / file_name
+        path.touch()
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+
+    assert get_latest_snapshot_path(tmp_path) == tmp_path / "extract_2.db"
+    assert get_latest_snapshot_path(
+        tmp_path, datetime.fromtimestamp(1_700_000_000).astimezone()
+    ) == tmp_path / "extract_1.db"
+
+
+def test_get_latest_snapshot_path_tool(tmp_path):
+    import pytest
+    from discovery.agents.sqlite import get_latest_snapshot_path
+    from discovery.repository.snapshots import SNAPSHOT_COMPLETE, SnapshotsManifest
+
+    with pytest.raises(FileNotFoundError):
+        get_latest_snapshot_path(str(tmp_path))
+
+    SnapshotsManifest(tmp_path).record(tmp_path / "extract_1.db", SNAPSHOT_COMPLETE, datetime.now())
+
+    assert get_latest_snapshot_path(str(tmp_path)) == str(tmp_path / "extract_1.db")
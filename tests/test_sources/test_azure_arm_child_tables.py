@@ -0,0 +1,43 @@
+import sqlite3
+
+
+def test_azure_arm_child_tables(tmp_path):
+    from benchmarks.synthetic import FakeResourceGraphClient
+    from discovery.repository import MemoryRepository
+    from discovery.repository.targets import SQLiteTarget
+    from discovery.sources.azure_arm import AzureARM
+
+    resources = [
+        {
+            "id": f"/nic{i}",
+            "name": f"nic{i}",
+            "type": "Microsoft.Network/networkInterfaces",
+            "properties": {
+                "ipConfigurations": [
+                    {"name": f"ip{i}-{j}", "properties": {"privateIPAddress": f"10.0.{i}.{j}"}}
+                    for j in range(i + 1)
+                ]
+            },
+        }
+        for i in range(3)
+    ]
+    repository = MemoryRepository()
+    AzureARM(None, repository, client=FakeResourceGraphClient(resources, []), child_tables=True).extract_all_resources()
+
+    with SQLiteTarget(tmp_path / "snapshot.db") as target:
+        repository.save_to(target)
+
+    conn = sqlite3.connect(tmp_path / "snapshot.db")
+    child_table = "az_microsoft_network_networkinterfaces_properties_ipconfigurations"
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(az_microsoft_network_networkinterfaces)")]
+    assert not any("ipconfigurations" in column for column in columns)
+
+    assert conn.execute(
+        f"SELECT p.name FROM az_microsoft_network_networkinterfaces p JOIN {child_table} c "
+        "ON c.parent_id = p.id WHERE c.value_properties_privateipaddress = '10.0.2.1'"
+    ).fetchall() == [("nic2",)]
+    assert conn.execute(f"SELECT COUNT(*) FROM {child_table}").fetchone() == (6,)
+    assert (f"ix_{child_table}_parent_id",) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    ).fetchall()
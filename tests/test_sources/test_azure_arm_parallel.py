@@ -0,0 +1,57 @@
+def extract(client, concurrency):
+    from discovery.repository import MemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+
+    repository = MemoryRepository()
+    client.max_in_flight = 0
+    AzureARM(None, repository, client=client).extract_all_resources(concurrency=concurrency)
+
+    return repository, client.max_in_flight
+
+
+def test_azure_arm_extract_by_subscription():
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+
+    resource_containers, resources = generate_tenant(
+        subscriptions_count=8, resources_per_subscription=20
+    )
+    client = FakeResourceGraphClient(
+        resources, resource_containers, page_size=10, latency=0.02
+    )
+
+    serial_repository, serial_in_flight = extract(client, concurrency=1)
+    parallel_repository, parallel_in_flight = extract(client, concurrency=8)
+
+    expected_count = len(resources) + len(resource_containers)
+    assert serial_repository.get_count_by_type("az_resources") == expected_count
+    assert parallel_repository.get_count_by_type("az_resources") == expected_count
+
+    serial_ids = {r["id"] for r in serial_repository.get_all_by_type("az_resources")}
+    parallel_ids = {r["id"] for r in parallel_repository.get_all_by_type("az_resources")}
+    assert parallel_ids == serial_ids
+
+    # Queries of subscriptions overlap, the latency of the fake client keeps them in flight
+    assert serial_in_flight == 1
+    assert 1 < parallel_in_flight <= 8
+
+
+def test_azure_arm_stream_with_concurrency(tmp_path):
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+    from discovery.repository import StreamingRepository
+    from discovery.repository.targets import SQLiteTarget
+    from discovery.sources.azure_arm import AzureARM
+
+    resource_containers, resources = generate_tenant(
+        subscriptions_count=8, resources_per_subscription=20
+    )
+    client = FakeResourceGraphClient(resources, resource_containers, page_size=10, latency=0.01)
+
+    # The connection of the target is created here and written to from the threads of the queries
+    with SQLiteTarget(tmp_path / "extract.db") as target:
+        repository = StreamingRepository(target, batch_size=5)
+        AzureARM(None, repository, client=client).extract_all_resources(concurrency=8)
+        repository.save_to(target)
+
+        (count,) = target.conn.execute("SELECT COUNT(*) FROM az_resources").fetchone()
+
+    assert count == len(resources) + len(resource_containers)
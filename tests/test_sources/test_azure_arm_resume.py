@@ -0,0 +1,106 @@
+import sqlite3
+import pytest
+
+
+def flaky_client(resources, resource_containers, failing_request):
+    """
+    Fake client which serves, on its failing_request-th request, a page holding a new
+    property then an invalid resource, so batches and columns are written before failing
+    """
+    from benchmarks.synthetic import FakeQueryResponse, FakeResourceGraphClient
+
+    class FlakyResourceGraphClient(FakeResourceGraphClient):
+        def _response(self, query):
+            response = super()._response(query)
+
+            if self.requests_count == failing_request:
+                page = [dict(resource, properties={"new": 1}) for resource in response.data]
+                page.insert(len(page) // 2, {"name": "invalid"})
+
+                return FakeQueryResponse(page, response.skip_token)
+
+            return response
+
+    return FlakyResourceGraphClient(resources, resource_containers, page_size=10)
+
+
+def extract(path, client, resume=False, concurrency=1):
+    from discovery.repository import StreamingRepository
+    from discovery.repository.targets import SQLiteTarget
+    from discovery.sources.azure_arm import AzureARM
+
+    with SQLiteTarget(path, resumable=True, resume=resume) as target:
+        repository = StreamingRepository(target, batch_size=3)
+        AzureARM(None, repository, client=client).extract_all_resources(
+            concurrency=concurrency, subscriptions_per_query=2
+        )
+        repository.save_to(target)
+
+        return client.requests_count, {
+            name: (table.rows_count, {c.name: c.values_count for c in table.columns.values()})
+            for name, table in target.schema.tables.items()
+        }
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_azure_arm_resume(tmp_path, concurrency):
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+
+    resource_containers, resources = generate_tenant(
+        subscriptions_count=8, resources_per_subscription=20
+    )
+
+    full_requests_count, full_tables = extract(
+        tmp_path / "full.db",
+        FakeResourceGraphClient(resources, resource_containers, page_size=10),
+        concurrency=concurrency,
+    )
+
+    with pytest.raises(KeyError):
+        extract(
+            tmp_path / "resumed.db",
+            flaky_client(resources, resource_containers, failing_request=6),
+            concurrency=concurrency,
+        )
+
+    resumed_requests_count, resumed_tables = extract(
+        tmp_path / "resumed.db",
+        FakeResourceGraphClient(resources, resource_containers, page_size=10),
+        resume=True,
+        concurrency=concurrency,
+    )
+
+    assert resumed_tables == full_tables
+    assert resumed_requests_count < full_requests_count
+
+    conn = sqlite3.connect(tmp_path / "resumed.db")
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "_checkpoints" not in tables
+    assert conn.execute("SELECT COUNT(*) FROM az_resources").fetchone() == (len(resources) + len(resource_containers),)
+    for table in tables:
+        assert "properties_new" not in [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def test_sqlite_target_resume_requires_snapshot(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    with pytest.raises(ValueError):
+        SQLiteTarget(tmp_path / "missing.db", resume=True)
+
+    with pytest.raises(ValueError):
+        SQLiteTarget(tmp_path / "bulk.db", bulk_load=True, resumable=True)
+
+
+def test_sqlite_target_resume_requires_checkpoints(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    with SQLiteTarget(tmp_path / "extract.db") as target:
+        target.write("az_resources", [{"id": "id_1", "name": "a"}])
+
+    with pytest.raises(ValueError, match="no checkpoints"):
+        SQLiteTarget(tmp_path / "extract.db", resume=True)
+
+    conn = sqlite3.connect(tmp_path / "extract.db")
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert tables == {"az_resources"}
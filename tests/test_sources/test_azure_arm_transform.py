@@ -0,0 +1,43 @@
+import sqlite3
+
+
+def extract(db_path, transform_workers: int) -> None:
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_resources, generate_tenant
+    from discovery.repository import StreamingRepository
+    from discovery.repository.targets import SQLiteTarget
+    from discovery.sources.azure_arm import AzureARM
+
+    resource_containers, _ = generate_tenant(2, 0)
+    resources = generate_resources(600, subscriptions_count=2, types_count=4, array_size=2)
+    client = FakeResourceGraphClient(resources, resource_containers, page_size=100)
+
+    with SQLiteTarget(db_path) as target:
+        repository = StreamingRepository(target, batch_size=150)
+        AzureARM(
+            None, repository, client=client, child_tables=True, transform_workers=transform_workers
+        ).extract_all_resources(concurrency=2)
+        repository.save_to(target)
+
+
+def test_azure_arm_transform_workers(tmp_path):
+    extract(tmp_path / "serial.db", transform_workers=0)
+    extract(tmp_path / "workers.db", transform_workers=2)
+
+    catalogs = []
+
+    for name in ("serial.db", "workers.db"):
+        with sqlite3.connect(tmp_path / name) as conn:
+            catalogs.append(
+                (
+                    conn.execute("SELECT * FROM _catalog_tables ORDER BY table_name").fetchall(),
+                    conn.execute(
+                        "SELECT table_name, column_name, type, null_ratio, distinct_count "
+                        "FROM _catalog_columns ORDER BY table_name, column_name"
+                    ).fetchall(),
+                )
+            )
+
+    serial_catalog, workers_catalog = catalogs
+
+    assert len(serial_catalog[0]) > 4
+    assert workers_catalog == serial_catalog
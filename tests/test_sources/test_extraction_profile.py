@@ -0,0 +1,60 @@
+import pytest
+
+
+def test_extraction_profile_queries():
+    from discovery.sources.profile import ExtractionProfile
+
+    assert ExtractionProfile().queries() == ["Resources"]
+
+    profile = ExtractionProfile(
+        exclude_types=["Microsoft.Insights/components"],
+        properties={"Microsoft.Compute/virtualMachines": ["properties.hardwareProfile.vmSize", "zones[0]"]},
+    )
+    assert profile.queries() == [
+        "Resources | where type =~ 'microsoft.compute/virtualmachines' | project id, name, type, location, "
+        "tags, subscriptionId, resourceGroup, properties_hardwareProfile_vmSize = properties.hardwareProfile.vmSize, "
+        "zones_0 = zones[0]",
+        "Resources | where type !in~ ('microsoft.insights/components', 'microsoft.compute/virtualmachines')",
+    ]
+
+    profile = ExtractionProfile(include_types=["a/b", "c/d"], exclude_types=["c/d"])
+    assert profile.queries() == ["Resources | where type in~ ('a/b')"]
+
+    with pytest.raises(ValueError):
+        ExtractionProfile(properties={"a/b": ["properties') | project secret"]})
+
+
+def test_extraction_profile_from_settings(monkeypatch):
+    from discovery.settings import ExtractSettings
+
+    monkeypatch.setenv("DISCOVERY_EXTRACT_PROFILE", '{"include_types": ["Microsoft.Storage/storageAccounts"]}')
+
+    settings = ExtractSettings()
+
+    assert settings.extract_profile.include_types == ["microsoft.storage/storageaccounts"]
+
+
+def test_azure_arm_extraction_profile():
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+    from discovery.repository import MemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+    from discovery.sources.profile import ExtractionProfile
+
+    resource_containers, resources = generate_tenant(subscriptions_count=2, resources_per_subscription=9)
+    profile = ExtractionProfile(
+        exclude_types=["Microsoft.Storage/storageAccounts"],
+        properties={"Microsoft.Compute/virtualMachines": ["properties.index"]},
+    )
+
+    for concurrency in (1, 2):
+        repository = MemoryRepository()
+        client = FakeResourceGraphClient(resources, resource_containers)
+        AzureARM(None, repository, client=client, profile=profile).extract_all_resources(concurrency)
+
+        assert "az_microsoft_storage_storageaccounts" not in repository.get_all()
+        assert repository.get_count_by_type("az_microsoft_network_networkinterfaces") == 6
+
+        virtual_machines = repository.get_all_by_type("az_microsoft_compute_virtualmachines")
+        assert len(virtual_machines) == 6
+        assert all("properties_provisioningState" not in vm for vm in virtual_machines)
+        assert {vm["properties_index"] for vm in virtual_machines} == {0, 3, 6}
@@ -0,0 +1,110 @@
+import pytest
+
+
+def test_parse_duration():
+    from discovery.sources.scheduler import parse_duration
+
+    assert parse_duration("00:00:05") == 5
+    assert parse_duration("01:02:03.5") == 3723.5
+    assert parse_duration("3") == 3
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+def test_azure_arm_paces_requests_by_quota():
+    from benchmarks.synthetic import ThrottlingResourceGraphClient, generate_tenant
+    from discovery.repository import CompactMemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+    from discovery.sources.scheduler import RequestScheduler
+
+    resource_containers, resources = generate_tenant(4, 25)
+    client = ThrottlingResourceGraphClient(
+        resources, resource_containers, page_size=10, quota=4, window_seconds=0.2
+    )
+    repository = CompactMemoryRepository()
+    azure_arm = AzureARM(
+        None, repository, client=client, scheduler=RequestScheduler(backoff_seconds=0.01)
+    )
+
+    azure_arm.extract_all_resources(concurrency=4)
+
+    stats = azure_arm.scheduler.stats
+    assert repository.get_count_by_type("az_resources") == 108
+    assert stats.requests == client.requests_count + stats.throttled
+    assert stats.wait_seconds > 0.2
+    assert stats.throttled <= 1
+
+
+def test_scheduler_retries_throttled_requests():
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+    from discovery.repository import CompactMemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+    from discovery.sources.scheduler import RequestScheduler
+
+    class ThrottledOnceClient(FakeResourceGraphClient):
+        def _headers(self):
+            from azure.core.exceptions import HttpResponseError
+            from benchmarks.synthetic import FakeHttpResponse
+
+            self.calls = getattr(self, "calls", 0) + 1
+            if self.calls in (3, 4, 7):
+                raise HttpResponseError(response=FakeHttpResponse(b"", {"Retry-After": "0"}, 429))
+
+            return {}
+
+    resource_containers, resources = generate_tenant(1, 50)
+    client = ThrottledOnceClient(resources, resource_containers, page_size=10)
+    repository = CompactMemoryRepository()
+    azure_arm = AzureARM(
+        None, repository, client=client, scheduler=RequestScheduler(backoff_seconds=0.01)
+    )
+
+    azure_arm.extract_all_resources()
+
+    assert repository.get_count_by_type("az_resources") == 52
+    assert repository.duplicates_count == 0
+    assert azure_arm.scheduler.stats.throttled == 3
+    assert azure_arm.scheduler.stats.retries == 3
+
+
+def test_scheduler_raises_after_max_retries():
+    from azure.core.exceptions import HttpResponseError
+    from benchmarks.synthetic import FakeHttpResponse
+    from discovery.sources.scheduler import RequestScheduler
+
+    scheduler = RequestScheduler(max_retries=2, backoff_seconds=0.001)
+
+    def send():
+        raise HttpResponseError(response=FakeHttpResponse(b"", {}, 429))
+
+    with pytest.raises(HttpResponseError):
+        scheduler.run(send)
+
+    assert scheduler.stats.requests == 3
+    assert scheduler.stats.retries == 2
+
+
+def test_resource_graph_client_leaves_throttled_requests_to_scheduler():
+    from types import SimpleNamespace
+    from azure.core.pipeline.policies import RetryPolicy
+    from discovery.repository import CompactMemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+    from discovery.sources.scheduler import SchedulerRetryPolicy
+
+    credential = SimpleNamespace(get_token=lambda *scopes, **kwargs: None)
+    azure_arm = AzureARM(credential, CompactMemoryRepository())
+
+    pipeline = azure_arm.azure_resource_graph_client._client._pipeline
+    retry_policies = [p for p in pipeline._impl_policies if isinstance(p, RetryPolicy)]
+    assert len(retry_policies) == 1
+    assert isinstance(retry_policies[0], SchedulerRetryPolicy)
+
+    def response(status_code):
+        return SimpleNamespace(
+            http_request=SimpleNamespace(method="POST"),
+            http_response=SimpleNamespace(status_code=status_code, headers={"Retry-After": "1"}),
+        )
+
+    settings = retry_policies[0].configure_retries({})
+    assert not retry_policies[0].is_retry(settings, response(429))
+    assert retry_policies[0].is_retry(settings, response(503))
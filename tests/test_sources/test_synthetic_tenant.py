@@ -0,0 +1,34 @@
+def test_generate_resources():
+    from benchmarks.synthetic import generate_resources
+    from discovery.helpers.flatten_json import flatten_json
+
+    resources = generate_resources(500, types_count=4, type_skew=2, nesting_depth=2, array_size=2, tags_cardinality=3)
+
+    assert resources == generate_resources(500, types_count=4, type_skew=2, nesting_depth=2, array_size=2, tags_cardinality=3)
+    assert len({resource["id"] for resource in resources}) == 500
+
+    types_counts = [sum(r["type"] == f"microsoft.synthetic/type{t}" for r in resources) for t in range(4)]
+    assert types_counts == sorted(types_counts, reverse=True)
+
+    assert {resource["tags"]["owner"] for resource in resources} == {"team-0", "team-1", "team-2"}
+    assert max(len(resource["properties"]["items"]) for resource in resources) == 2
+
+    keys = set().union(*(flatten_json(resource) for resource in resources))
+    assert "properties_profile_index" in keys
+    assert "properties_profile_profile_index" not in keys
+
+
+def test_fake_client_pages_generated_resources():
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_resources, generate_tenant
+    from discovery.repository import MemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+
+    resource_containers, _ = generate_tenant(4, 0)
+    resources = generate_resources(250, subscriptions_count=4)
+    client = FakeResourceGraphClient(resources, resource_containers, page_size=100)
+    repository = MemoryRepository()
+
+    AzureARM(None, repository, client=client).extract_all_resources(concurrency=2)
+
+    assert repository.get_count_by_type("az_resources") == len(resources) + len(resource_containers)
+    assert client.requests_count == 1 + 4 * 1
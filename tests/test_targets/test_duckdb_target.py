@@ -0,0 +1,68 @@
+from pathlib import Path
+
+
+def test_duckdb_target(tmp_path):
+    import duckdb
+    from discovery.repository.targets import DuckDBTarget
+
+    db_path = Path(tmp_path / "test.duckdb")
+
+    with DuckDBTarget(db_path) as target:
+        target.write("az_resources", [{"id": "id_1", "location": "westeurope", "size": 1, "tags_env": "prod"}])
+        target.write("az_resources", [{"id": "id_2", "location": "northeurope", "size": "large", "ok": True}])
+        target.finalize()
+
+    conn = duckdb.connect(str(db_path), read_only=True)
+
+    assert conn.execute("SELECT id, location, size, ok FROM az_resources ORDER BY id").fetchall() == [
+        ("id_1", "westeurope", "1", None),
+        ("id_2", "northeurope", "large", 1),
+    ]
+    assert conn.execute("SELECT * FROM az_resource_tags").fetchall() == [("id_1", "env", "prod")]
+    assert conn.execute(
+        "SELECT constraint_type FROM duckdb_constraints() WHERE table_name = 'az_resource_tags'"
+    ).fetchall() == [("NOT NULL",), ("NOT NULL",)]
+    assert conn.execute("SELECT * FROM _catalog_tables ORDER BY table_name").fetchall() == [
+        ("az_resource_tags", 1, 3),
+        ("az_resources", 2, 5),
+    ]
+
+
+def test_duckdb_and_sqlite_targets_share_database_target(tmp_path):
+    import pytest
+    from discovery.repository import Checkpoint
+    from discovery.repository.targets import DatabaseTarget, DuckDBTarget, SQLiteTarget
+
+    with DuckDBTarget(tmp_path / "test.duckdb", max_columns=3) as duckdb_target, SQLiteTarget(
+        tmp_path / "test.db", max_columns=3
+    ) as sqlite_target:
+        for target in (duckdb_target, sqlite_target):
+            assert isinstance(target, DatabaseTarget)
+            assert target.schema.max_columns == 3
+
+        assert duckdb_target.schema is not sqlite_target.schema
+        assert sqlite_target.checkpointed_keys_counts is not SQLiteTarget.checkpointed_keys_counts
+
+        # SQLite checkpoints, full-text index and bulk load are not reachable on DuckDB
+        assert not isinstance(duckdb_target, SQLiteTarget)
+        assert not duckdb_target.resumable
+        assert duckdb_target.get_checkpoints() == {}
+        with pytest.raises(NotImplementedError):
+            duckdb_target.checkpoint(Checkpoint("Resources"))
+
+
+def test_duckdb_target_spilled_columns(tmp_path):
+    import duckdb
+    from discovery.repository.targets import DuckDBTarget
+
+    db_path = Path(tmp_path / "test.duckdb")
+
+    with DuckDBTarget(db_path, max_columns=3) as target:
+        target.save({"resource_type_1": [{"id": "id_1", "name": "a", "tags_0": "b", "tags_1": "c"}]})
+
+    conn = duckdb.connect(str(db_path), read_only=True)
+    expression = conn.execute(
+        "SELECT expression FROM _catalog_columns WHERE column_name = 'tags_1'"
+    ).fetchone()[0]
+
+    assert conn.execute(f"SELECT {expression} FROM resource_type_1").fetchall() == [("c",)]
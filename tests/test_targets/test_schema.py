@@ -0,0 +1,74 @@
+def test_schema_inference_types():
+    from discovery.repository.targets.schema import SchemaInference
+
+    schema = SchemaInference()
+    columns, new_columns = schema.update(
+        "resource_type_1",
+        [
+            {"id": 1, "count": 1, "ratio": 1, "name": None, "enabled": True},
+            {"id": 2, "count": 2, "ratio": 0.5, "name": "a", "enabled": False},
+        ],
+    )
+
+    assert columns == new_columns
+    assert [column.definition() for column in columns] == [
+        "id INTEGER NOT NULL PRIMARY KEY",
+        "count INTEGER",
+        "ratio REAL",
+        "name TEXT",
+        "enabled INTEGER",
+    ]
+
+    columns, new_columns = schema.update("resource_type_1", [{"id": 3, "count": "many", "tag@1": None}])
+
+    assert [column.name for column in columns] == ["id", "count", "tag_1"]
+    assert [column.definition() for column in new_columns] == ["tag_1 TEXT"]
+    assert schema.tables["resource_type_1"].columns["count"].type == "TEXT"
+
+
+def test_schema_inference_collisions():
+    from discovery.repository.targets.schema import SchemaInference
+
+    schema = SchemaInference()
+    columns, new_columns = schema.update(
+        "resource_type_1",
+        [{"id": "a", "tags_Env": "prod"}, {"id": "b", "tags_env": "dev"}],
+    )
+
+    assert [column.name for column in new_columns] == ["id", "tags_env"]
+    assert columns[1].keys == ["tags_Env", "tags_env"]
+    assert [columns[1].value(resource) for resource in ({"tags_Env": "prod"}, {"tags_env": "dev"})] == ["prod", "dev"]
+    assert schema.column_names == {"id": "id", "tags_Env": "tags_env", "tags_env": "tags_env"}
+
+
+def test_schema_merge_matches_update():
+    from discovery.repository.targets.schema import TableSchema
+
+    batches = [
+        [{"id": "a", "count": 1, "name": None}, {"id": "b", "count": 2, "name": "x"}],
+        [{"id": "c", "count": 2.5, "tags_Env": "prod"}, {"id": "d", "tags_env": "dev"}],
+    ]
+
+    updated = TableSchema("resource_type_1", {})
+    merged = TableSchema("resource_type_1", {})
+
+    for batch in batches:
+        columns, new_columns = updated.update(batch)
+
+        inferred = TableSchema("resource_type_1", {})
+        inferred.update(batch)
+        merged_columns, merged_new_columns = merged.merge(inferred)
+
+        assert [column.name for column in merged_columns] == [column.name for column in columns]
+        assert [column.name for column in merged_new_columns] == [column.name for column in new_columns]
+
+    assert merged.rows_count == updated.rows_count == 4
+
+    for name, column in updated.columns.items():
+        merged_column = merged.columns[name]
+
+        assert merged_column.keys == column.keys
+        assert merged_column.type == column.type
+        assert merged_column.values_count == column.values_count
+        assert merged_column.distinct_values == column.distinct_values
+        assert merged_column.examples == column.examples
@@ -0,0 +1,28 @@
+import sqlite3
+import pytest
+from pathlib import Path
+
+
+def test_sqlite_target_bulk_load(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+    data = {
+        "resource_type_1": [{"id": f"id_{i}", "key1": i} for i in range(100)],
+        "resource_type_2": [{"id": "id_1", "key@2": "value"}],
+    }
+
+    with SQLiteTarget(db_path, bulk_load=True) as target:
+        target.save(data)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM resource_type_1").fetchone() == (100,)
+        assert conn.execute("SELECT id, key_2 FROM resource_type_2").fetchall() == [("id_1", "value")]
+
+        indexes = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'pk_%' ORDER BY name"
+        ).fetchall()
+        assert indexes == [("pk_resource_type_1",), ("pk_resource_type_2",)]
+
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO resource_type_1 (id) VALUES ('id_1')")
@@ -0,0 +1,63 @@
+import json
+import sqlite3
+from pathlib import Path
+
+
+def test_sqlite_target_catalog(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        target.save(
+            {
+                "resource_type_1": [
+                    {"id": f"id_{i}", "location": "westeurope", "size": i if i % 2 else None}
+                    for i in range(300)
+                ]
+            }
+        )
+
+    conn = sqlite3.connect(db_path)
+
+    assert conn.execute("SELECT * FROM _catalog_tables").fetchall() == [
+        ("resource_type_1", 300, 3)
+    ]
+
+    columns = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            "SELECT column_name, type, null_ratio, distinct_count, examples "
+            "FROM _catalog_columns WHERE table_name = 'resource_type_1' ORDER BY ordinal"
+        )
+    }
+
+    assert list(columns) == ["id", "location", "size"]
+    assert columns["location"][:3] == ("TEXT", 0.0, 1)
+    assert json.loads(columns["location"][3]) == ["westeurope"]
+    assert columns["size"][:3] == ("INTEGER", 0.5, None)
+    assert len(json.loads(columns["size"][3])) == 10
+
+
+def test_sqlite_tools_read_catalog(tmp_path):
+    from discovery.agents.sqlite import get_table_schema, list_tables_names
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path) as target:
+        target.save(
+            {
+                "resource_type_2": [{"id": "id_1", "location": None}],
+                "resource_type_1": [{"id": "id_2", "location": "westeurope"}],
+            }
+        )
+
+    assert list_tables_names(str(db_path)) == "resource_type_1\nresource_type_2"
+    assert get_table_schema(str(db_path), "resource_type_1") == (
+        "id TEXT, 0% NULL, 1 distinct values, values examples: id_2\n"
+        "location TEXT, 0% NULL, 1 distinct values, values examples: westeurope\n"
+    )
+    assert "location TEXT, 100% NULL, 0 distinct values" in get_table_schema(
+        str(db_path), "resource_type_2"
+    )
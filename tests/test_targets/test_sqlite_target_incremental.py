@@ -0,0 +1,66 @@
+import sqlite3
+from pathlib import Path
+
+
+def save_snapshot(path: Path, base_path: Path | None, resources: list) -> None:
+    from discovery.repository.targets import IncrementalSQLiteTarget
+
+    with IncrementalSQLiteTarget(path, base_path=base_path) as target:
+        target.save({"az_resources": resources})
+
+
+def test_incremental_sqlite_target(tmp_path):
+    from discovery.agents.sqlite import execute_select_query, list_tables_names
+    from discovery.repository.targets.incremental import resolve_base_snapshot
+
+    full_path = Path(tmp_path / "extract_1.db")
+    incremental_path = Path(tmp_path / "extract_2.db")
+
+    save_snapshot(
+        full_path,
+        None,
+        [
+            {"id": "unchanged", "name": "a"},
+            {"id": "updated", "name": "b"},
+            {"id": "deleted", "name": "c"},
+        ],
+    )
+
+    base_path = resolve_base_snapshot(full_path)
+    assert base_path == full_path
+
+    save_snapshot(
+        incremental_path,
+        base_path,
+        [
+            {"id": "unchanged", "name": "a"},
+            {"id": "updated", "name": "b2", "location": "westeurope"},
+            {"id": "inserted", "name": "d"},
+        ],
+    )
+
+    with sqlite3.connect(incremental_path) as conn:
+        assert conn.execute("SELECT id FROM az_resources ORDER BY id").fetchall() == [
+            ("inserted",),
+            ("updated",),
+        ]
+        assert conn.execute("SELECT id, change FROM _changes ORDER BY id").fetchall() == [
+            ("deleted", "deleted"),
+            ("inserted", "inserted"),
+            ("updated", "updated"),
+        ]
+
+    assert resolve_base_snapshot(incremental_path, rebase_ratio=1.0) == full_path
+    assert resolve_base_snapshot(incremental_path, rebase_ratio=0.5) is None
+
+    assert list_tables_names(str(incremental_path)) == "az_resources"
+    assert execute_select_query(
+        str(incremental_path), "SELECT id, name, location FROM az_resources ORDER BY id"
+    ) == "\n".join(
+        [
+            "id\tname\tlocation",
+            "inserted\td\tNone",
+            "unchanged\ta\tNone",
+            "updated\tb2\twesteurope",
+        ]
+    )
@@ -0,0 +1,65 @@
+import sqlite3
+from pathlib import Path
+
+
+def resources(tags_by_id):
+    return {
+        "az_resources": [
+            {"id": resource_id, "type": "t", "location": f"l_{i % 2}"}
+            | {f"tags_{key}": value for key, value in tags.items()}
+            for i, (resource_id, tags) in enumerate(tags_by_id.items())
+        ]
+    }
+
+
+def test_sqlite_target_indexes_and_tags(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+
+    with SQLiteTarget(db_path, bulk_load=True) as target:
+        target.save(resources({"id_1": {"env": "prod"}, "id_2": {"env": "dev", "team": "a"}, "id_3": {}}))
+
+    conn = sqlite3.connect(db_path)
+    indexes = {
+        name
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'")
+    }
+
+    assert indexes == {"ix_az_resources_location", "ix_az_resource_tags_key_value"}
+    assert conn.execute("SELECT id, key, value FROM az_resource_tags ORDER BY id, key").fetchall() == [
+        ("id_1", "env", "prod"),
+        ("id_2", "env", "dev"),
+        ("id_2", "team", "a"),
+    ]
+
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM az_resource_tags WHERE key = 'env' AND value = 'prod'"
+    ).fetchall()
+    assert "ix_az_resource_tags_key_value" in str(plan)
+
+    assert conn.execute(
+        "SELECT rows_count FROM _catalog_tables WHERE table_name = 'az_resource_tags'"
+    ).fetchone() == (3,)
+
+
+def test_incremental_sqlite_target_tags_view(tmp_path):
+    from discovery.repository.targets import IncrementalSQLiteTarget
+    from discovery.repository.targets.incremental import create_logical_views
+
+    full_path = Path(tmp_path / "full.db")
+    incremental_path = Path(tmp_path / "incremental.db")
+
+    with IncrementalSQLiteTarget(full_path) as target:
+        target.save(resources({"id_1": {"env": "prod"}, "id_2": {"env": "dev"}, "id_3": {"env": "dev"}}))
+
+    with IncrementalSQLiteTarget(incremental_path, base_path=full_path) as target:
+        target.save(resources({"id_1": {"env": "prod"}, "id_2": {"env": "prod"}}))
+
+    conn = sqlite3.connect(incremental_path)
+    create_logical_views(conn, str(incremental_path))
+
+    assert conn.execute("SELECT id, key, value FROM az_resource_tags ORDER BY id").fetchall() == [
+        ("id_1", "env", "prod"),
+        ("id_2", "env", "prod"),
+    ]
@@ -0,0 +1,105 @@
+import sqlite3
+from pathlib import Path
+
+
+def test_json_sqlite_target(tmp_path):
+    from discovery.repository.targets import JSONSQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+    resources = [
+        {
+            "id": f"id_{i}",
+            "location": f"l_{i % 2}",
+            "tags": {"env": "prod"} if i == 0 else {},
+            "properties": {"state": "ok", "rare": i if i == 1 else None, "deep": {"a": {"b": i}}},
+            "zones": ["1"],
+        }
+        for i in range(4)
+    ]
+
+    with JSONSQLiteTarget(db_path) as target:
+        target.save({"az_resources": resources})
+
+    conn = sqlite3.connect(db_path)
+
+    assert conn.execute(
+        "SELECT id, location, properties_state FROM az_resources ORDER BY id LIMIT 1"
+    ).fetchone() == ("id_0", "l_0", "ok")
+    assert conn.execute(
+        "SELECT json_extract(_json, '$.properties.deep.a.b'), json_extract(_json, '$.zones[0]') "
+        "FROM az_resources WHERE id = 'id_3'"
+    ).fetchone() == (3, "1")
+
+    catalog = dict(
+        conn.execute(
+            "SELECT column_name, expression FROM _catalog_columns WHERE table_name = 'az_resources'"
+        )
+    )
+    assert catalog["location"] == "location"
+    assert catalog["properties_rare"] == """json_extract(_json, '$."properties"."rare"')"""
+    assert catalog["tags_env"] == """json_extract(_json, '$."tags"."env"')"""
+    assert "properties_deep_a_b" not in catalog
+
+    assert conn.execute(
+        f"SELECT id FROM az_resources WHERE {catalog['properties_rare']} = 1"
+    ).fetchall() == [("id_1",)]
+    assert conn.execute("SELECT * FROM az_resource_tags").fetchall() == [("id_0", "env", "prod")]
+    assert "ix_az_resources_location" in str(
+        conn.execute("EXPLAIN QUERY PLAN SELECT id FROM az_resources WHERE location = 'l_1'").fetchall()
+    )
+
+
+def test_azure_arm_without_flattening(tmp_path):
+    from benchmarks.synthetic import FakeResourceGraphClient, generate_tenant
+    from discovery.repository import MemoryRepository
+    from discovery.sources.azure_arm import AzureARM
+
+    resource_containers, resources = generate_tenant(subscriptions_count=1, resources_per_subscription=3)
+    repository = MemoryRepository()
+    azure_arm = AzureARM(
+        None,
+        repository,
+        client=FakeResourceGraphClient(resources, resource_containers, page_size=10, latency=0),
+        flatten=False,
+    )
+    azure_arm.extract_all_resources()
+
+    generic_resources = repository.get_all_by_type("az_resources")
+
+    assert sorted(generic_resources[0]) == ["id", "location", "name", "tags", "type"]
+    assert type(generic_resources[0]["tags"]) is dict
+
+
+def test_json_sqlite_target_unusual_keys(tmp_path):
+    from discovery.repository.targets import JSONSQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+    resources = [
+        {
+            "id": f"id_{i}",
+            "tags": {'env"x': "prod", "team\\ops": "core", "Team": "a", "team": "b"},
+            "a": {"b": "nested"},
+            "a_b": "flat",
+        }
+        for i in range(2)
+    ]
+
+    with JSONSQLiteTarget(db_path) as target:
+        target.save({"az_resources": resources})
+
+    conn = sqlite3.connect(db_path)
+    catalog = dict(
+        conn.execute(
+            "SELECT column_name, expression FROM _catalog_columns WHERE table_name = 'az_resources'"
+        )
+    )
+
+    # No JSON path can address a key with a double quote, it is only kept in _json
+    assert "tags_env_x" not in catalog
+    assert conn.execute(
+        "SELECT a_b, a_b_2, tags_team_ops, tags_team, tags_team_2 "
+        "FROM az_resources WHERE id = 'id_0'"
+    ).fetchone() == ("nested", "flat", "core", "a", "b")
+    assert conn.execute(
+        "SELECT key, value FROM az_resource_tags WHERE id = 'id_0' ORDER BY key"
+    ).fetchall() == [("Team", "a"), ("team", "b"), ("team\\ops", "core")]
@@ -0,0 +1,43 @@
+import sqlite3
+from pathlib import Path
+
+
+def test_sqlite_target_spills_wide_tables(tmp_path):
+    from discovery.repository.targets import SQLiteTarget
+
+    db_path = Path(tmp_path / "test.db")
+    resources = [
+        {
+            "id": f"id_{i}",
+            "name": f"nsg_{i}",
+            "location": "westeurope",
+            **{f"properties_securityRules_{r}_access": "Allow" for r in range(i)},
+        }
+        for i in range(10)
+    ]
+
+    with SQLiteTarget(db_path, max_columns=6) as target:
+        target.write("resource_type_1", resources[:5])
+        target.write("resource_type_1", resources[5:])
+        target.finalize()
+
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(resource_type_1)")]
+        assert columns == [
+            "id",
+            "name",
+            "location",
+            "properties_securityrules_0_access",
+            "properties_securityrules_1_access",
+            "_spilled",
+        ]
+
+        spilled_columns = conn.execute(
+            "SELECT column_name FROM _spilled_columns WHERE table_name = 'resource_type_1'"
+        ).fetchall()
+        assert len(spilled_columns) == 7
+
+        value = conn.execute(
+            "SELECT json_extract(_spilled, '$.properties_securityrules_8_access') FROM resource_type_1 WHERE id = 'id_9'"
+        ).fetchone()
+        assert value == ("Allow",)